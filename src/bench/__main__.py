@@ -0,0 +1,70 @@
+"""
+Набор бенчмарков на синтетическом логе: разбор строк, подсчет статистики
+построчно и по колонкам, фильтры по времени и по полям, перцентили и
+построение отчета. Каждый сценарий запускается в отдельном процессе,
+чтобы пиковая память (RSS) относилась только к нему.
+
+Запуск: PYTHONPATH=. python -m src.bench [--lines N] [--scenario NAME ...]
+        [--save FILE] [--compare FILE]
+"""
+
+import json
+import os
+import tempfile
+from argparse import ArgumentParser
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict
+from multiprocessing import get_context
+
+from src.bench.log_generator import add_profile_arguments, profile_from_args, write_log
+from src.bench.suite import SCENARIOS, run_scenario
+from src.parser_process.profiler import format_size
+
+
+def main() -> None:
+    cli_parser = ArgumentParser(description="Набор бенчмарков на синтетическом логе")
+    add_profile_arguments(cli_parser)
+    cli_parser.add_argument("--repeat", type=int, default=3)
+    cli_parser.add_argument(
+        "--scenario", action="append", choices=list(SCENARIOS), dest="scenarios"
+    )
+    cli_parser.add_argument("--save", help="Сохранить результаты в JSON")
+    cli_parser.add_argument(
+        "--compare", help="Сравнить с результатами, сохраненными через --save"
+    )
+    args = cli_parser.parse_args()
+
+    profile = profile_from_args(args)
+    baseline = {}
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as file:
+            baseline = {item["name"]: item for item in json.load(file)}
+
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "access.log")
+        write_log(path, args.lines, profile)
+        print(f"{args.lines:_} lines, {os.path.getsize(path) / (1 << 20):.0f} MiB")
+        for name in args.scenarios or SCENARIOS:
+            # Новый процесс на сценарий: пиковая память не наследуется
+            with ProcessPoolExecutor(1, mp_context=get_context("spawn")) as pool:
+                result = pool.submit(
+                    run_scenario, name, path, profile, args.lines, args.repeat
+                ).result()
+            results.append(result)
+            line = (
+                f"{name:<20}{result.items_per_second:>14_.0f} items/s"
+                f"{result.seconds:>9.3f} s{format_size(result.peak_rss):>12}"
+            )
+            if name in baseline:
+                previous = baseline[name]["items"] / baseline[name]["seconds"]
+                line += f"  x{result.items_per_second / previous:.2f}"
+            print(line)
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as file:
+            json.dump([asdict(result) for result in results], file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
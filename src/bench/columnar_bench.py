@@ -0,0 +1,56 @@
+"""
+Бенчмарк подсчета статистики: построчный цикл против колоночного режима
+(пачки строк, счетчики по колонкам и векторные операции NumPy)
+
+Запуск: PYTHONPATH=. python -m src.bench.columnar_bench [--lines N]
+"""
+
+import time
+from argparse import ArgumentParser
+
+from src.bench.parser_bench import make_lines
+from src.databases.log_data import LogData
+from src.databases.quantiles import DDSketchQuantiles
+from src.parser_process.log_processor import LogParserProcessor
+
+
+def measure(lines: list[str], engine: str, repeat: int, **settings) -> float:
+    """
+    Разбор и подсчет уже прочитанных строк, в строках в секунду (лучший из
+    repeat запусков)
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        processor = LogParserProcessor(LogData(**settings), engine=engine)
+        start = time.perf_counter()
+        processor._consume(lines)
+        best = min(best, time.perf_counter() - start)
+    return len(lines) / best
+
+
+def main() -> None:
+    cli_parser = ArgumentParser(description="Бенчмарк колоночного режима")
+    cli_parser.add_argument("--lines", type=int, default=500_000)
+    cli_parser.add_argument("--repeat", type=int, default=3)
+    args = cli_parser.parse_args()
+
+    lines = make_lines(args.lines)
+    for name, settings in (
+        ("exact", {}),
+        ("sketch", {"size_sketch": DDSketchQuantiles()}),
+        (
+            "time filter",
+            {"from_date": "2024-11-09T10:15", "to_date": "2024-11-09T10:45"},
+        ),
+    ):
+        baseline = measure(lines, "rows", args.repeat, **settings)
+        columnar = measure(lines, "columnar", args.repeat, **settings)
+        for engine, lines_per_sec in (("rows", baseline), ("columnar", columnar)):
+            print(
+                f"{name + ' ' + engine:<22}{lines_per_sec:>14_.0f} lines/s"
+                f"  x{lines_per_sec / baseline:.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""
+Генератор синтетических логов NGINX в формате combined
+
+Строки детерминированы: при тех же параметрах и seed генерируется тот же
+лог. Ресурсы и IP-адреса выбираются неравномерно (первые встречаются
+чаще, как в реальных логах), время идет по lines_per_second строк в
+секунду от start.
+
+Запуск: PYTHONPATH=. python -m src.bench.log_generator --lines N --output FILE
+"""
+
+import random
+from argparse import ArgumentParser
+from collections.abc import Iterator
+from dataclasses import dataclass
+from datetime import UTC, datetime
+
+from src.parser_process.time_decoder import TIME_LOCAL_FORMAT
+
+METHODS = ("GET", "GET", "GET", "GET", "POST", "POST", "PUT", "DELETE", "HEAD")
+OK_STATUSES = ("200", "200", "200", "200", "301", "302", "304")
+ERROR_STATUSES = ("400", "403", "404", "404", "404", "499", "500", "502", "503")
+USER_AGENTS = (
+    "Mozilla/5.0 (X11; Linux x86_64; rv:132.0) Gecko/20100101 Firefox/132.0",
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 Chrome/130.0",
+    "Mozilla/5.0 (iPhone; CPU iPhone OS 17_6 like Mac OS X) Safari/604.1",
+    "curl/8.5.0",
+    "Googlebot/2.1 (+http://www.google.com/bot.html)",
+)
+
+
+@dataclass(frozen=True)
+class LogProfile:
+    """
+    Параметры синтетического лога: urls и ips - количество различных
+    ресурсов и IP-адресов, error_rate - доля ответов 4xx/5xx,
+    malformed_ratio - доля строк, которые не разбираются
+    """
+
+    urls: int = 1000
+    ips: int = 10_000
+    error_rate: float = 0.05
+    malformed_ratio: float = 0.001
+    seed: int = 0
+    start: str = "2024-11-09T00:00:00"
+    lines_per_second: int = 10
+
+    @property
+    def start_timestamp(self) -> int:
+        start = datetime.fromisoformat(self.start).replace(tzinfo=UTC)
+        return int(start.timestamp())
+
+    def time_bounds(self, count: int, part: float = 1 / 3) -> tuple[str, str]:
+        """Границы --from/--to средней части лога из count строк (доля part)"""
+        span = count / self.lines_per_second
+        start = self.start_timestamp + span * (1 - part) / 2
+        return tuple(
+            datetime.fromtimestamp(ts, UTC)
+            .replace(tzinfo=None)
+            .isoformat(timespec="seconds")
+            for ts in (start, start + span * part)
+        )
+
+
+def generate_lines(count: int, profile: LogProfile | None = None) -> Iterator[str]:
+    """count строк лога по профилю (по умолчанию LogProfile())"""
+    profile = profile or LogProfile()
+    rng = random.Random(profile.seed)
+    urls = [
+        f"/{('page', 'api/v1/items', 'static/js')[n % 3]}/{n}"
+        for n in range(profile.urls)
+    ]
+    ips = [f"10.{n >> 16 & 255}.{n >> 8 & 255}.{n & 255}" for n in range(profile.ips)]
+    start = profile.start_timestamp
+    second, time_local = None, ""
+    for i in range(count):
+        timestamp = start + i // profile.lines_per_second
+        if timestamp != second:
+            second = timestamp
+            time_local = datetime.fromtimestamp(timestamp, UTC).strftime(
+                TIME_LOCAL_FORMAT
+            )
+        # Степень у random() смещает выбор к первым ресурсам и адресам
+        url = urls[int(profile.urls * rng.random() ** 3)]
+        ip = ips[int(profile.ips * rng.random() ** 2)]
+        if rng.random() < profile.error_rate:
+            status = rng.choice(ERROR_STATUSES)
+        else:
+            status = rng.choice(OK_STATUSES)
+        line = (
+            f"{ip} - - [{time_local}] "
+            f'"{rng.choice(METHODS)} {url} HTTP/1.1" {status} '
+            f"{int(rng.lognormvariate(7, 1.5))} "
+            f'"-" "{rng.choice(USER_AGENTS)}"'
+        )
+        if rng.random() < profile.malformed_ratio:
+            # Обрезанная строка, как при записи во время ротации
+            line = line[: rng.randrange(1, len(line) // 2)]
+        yield line
+
+
+def write_log(path: str, count: int, profile: LogProfile | None = None) -> None:
+    with open(path, "w", encoding="utf-8") as file:
+        file.writelines(line + "\n" for line in generate_lines(count, profile))
+
+
+def add_profile_arguments(cli_parser: ArgumentParser) -> None:
+    defaults = LogProfile()
+    cli_parser.add_argument("--lines", type=int, default=200_000)
+    cli_parser.add_argument("--urls", type=int, default=defaults.urls)
+    cli_parser.add_argument("--ips", type=int, default=defaults.ips)
+    cli_parser.add_argument("--error-rate", type=float, default=defaults.error_rate)
+    cli_parser.add_argument("--malformed", type=float, default=defaults.malformed_ratio)
+    cli_parser.add_argument("--seed", type=int, default=defaults.seed)
+
+
+def profile_from_args(args) -> LogProfile:
+    return LogProfile(
+        urls=args.urls,
+        ips=args.ips,
+        error_rate=args.error_rate,
+        malformed_ratio=args.malformed,
+        seed=args.seed,
+    )
+
+
+def main() -> None:
+    cli_parser = ArgumentParser(description="Генератор синтетических логов NGINX")
+    add_profile_arguments(cli_parser)
+    cli_parser.add_argument("--output", required=True)
+    args = cli_parser.parse_args()
+    write_log(args.output, args.lines, profile_from_args(args))
+
+
+if __name__ == "__main__":
+    main()
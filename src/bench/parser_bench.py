@@ -0,0 +1,82 @@
+"""
+Бенчмарк разбора строк лога: прежний разбор (re.compile на каждую строку
+и полный groupdict) против LineParser, захватывающего только нужные поля
+
+Запуск: PYTHONPATH=. python -m src.bench.parser_bench [--lines N]
+"""
+
+import re
+import time
+from argparse import ArgumentParser
+from collections.abc import Callable
+
+from src.parser_process.line_parser import LineParser
+
+# Поля, которые использует LogParserProcessor.process
+PROCESS_FIELDS = (
+    "remote_addr",
+    "time_local",
+    "method",
+    "source",
+    "status",
+    "body_bytes_sent",
+)
+
+
+def legacy_parse_log_line(line: str) -> dict[str, str] | None:
+    log_pattern = re.compile(
+        r"(?P<remote_addr>\S+) "
+        r"- (?P<remote_user>\S*) "
+        r"\[(?P<time_local>[^\]]+)\] "
+        r'"(?P<method>\S+) (?P<source>\S+) (?P<protocol>\S+)" '
+        r"(?P<status>\d{3}) "
+        r"(?P<body_bytes_sent>\d+) "
+        r'"(?P<http_referer>[^"]*)" '
+        r'"(?P<http_user_agent>[^"]*)"'
+    )
+    match = log_pattern.match(line)
+    if match:
+        return match.groupdict()
+
+
+def make_lines(count: int) -> list[str]:
+    methods = ("GET", "POST", "PUT", "DELETE")
+    statuses = ("200", "200", "200", "301", "404", "500")
+    return [
+        f"10.0.{i % 256}.{i % 199} - - [09/Nov/2024:10:{i // 60 % 60:02}:{i % 60:02} +0000] "
+        f'"{methods[i % 4]} /page/{i % 997}.html HTTP/1.1" {statuses[i % 6]} {i * 37 % 100_000} '
+        f'"https://example.com/ref/{i % 13}" "Mozilla/5.0 (X11; Linux x86_64) Firefox/{i % 120}.0"'
+        for i in range(count)
+    ]
+
+
+def measure(parse: Callable[[str], object], lines: list[str]) -> float:
+    """Возвращает пропускную способность в строках в секунду"""
+    start = time.perf_counter()
+    for line in lines:
+        parse(line)
+    return len(lines) / (time.perf_counter() - start)
+
+
+def main() -> None:
+    cli_parser = ArgumentParser(description="Бенчмарк разбора строк лога")
+    cli_parser.add_argument("--lines", type=int, default=200_000)
+    args = cli_parser.parse_args()
+
+    lines = make_lines(args.lines)
+    results = {
+        "legacy regex": measure(legacy_parse_log_line, lines),
+        "LineParser.parse": measure(LineParser().parse, lines),
+        "LineParser.parse_values": measure(
+            LineParser(PROCESS_FIELDS).parse_values, lines
+        ),
+    }
+    baseline = results["legacy regex"]
+    for name, lines_per_sec in results.items():
+        print(
+            f"{name:<28}{lines_per_sec:>14_.0f} lines/s  x{lines_per_sec / baseline:.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Бенчмарк конвейера (--pipeline) на медленном источнике: строки отдаются
+кусками с задержкой, как при чтении с медленного диска или из сети
+(ожидание отпускает GIL), и считаются последовательно или пока
+в фоновом потоке читаются следующие
+
+Запуск: PYTHONPATH=. python -m src.bench.pipeline_bench [--lines N] [--mb-per-second S]
+"""
+
+import time
+from argparse import ArgumentParser
+from collections.abc import Iterator
+
+from src.bench.log_generator import generate_lines
+from src.databases.log_data import LogData
+from src.parser_process.log_processor import LogParserProcessor
+
+# Размер куска, который читается за одно ожидание
+READ_SIZE = 1 << 16
+
+
+def slow_lines(lines: list[str], bytes_per_second: float) -> Iterator[str]:
+    """Строки lines с задержкой на каждые READ_SIZE байт"""
+    delay = READ_SIZE / bytes_per_second
+    read = 0
+    for line in lines:
+        read += len(line) + 1
+        if read >= READ_SIZE:
+            time.sleep(delay)
+            read -= READ_SIZE
+        yield line
+
+
+def measure(lines: list[str], bytes_per_second: float, pipeline: bool) -> float:
+    """Время обработки в секундах"""
+    processor = LogParserProcessor(LogData(), pipeline=pipeline)
+    source = slow_lines(lines, bytes_per_second)
+    start = time.perf_counter()
+    if pipeline:
+        processor._process_pipeline(source)
+    else:
+        processor._consume(source)
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    cli_parser = ArgumentParser(description="Бенчмарк конвейера на медленном источнике")
+    cli_parser.add_argument("--lines", type=int, default=300_000)
+    cli_parser.add_argument("--mb-per-second", type=float, default=50.0)
+    args = cli_parser.parse_args()
+
+    lines = list(generate_lines(args.lines))
+    bytes_per_second = args.mb_per_second * (1 << 20)
+    sequential = measure(lines, bytes_per_second, pipeline=False)
+    pipelined = measure(lines, bytes_per_second, pipeline=True)
+    for name, seconds in (("sequential", sequential), ("pipeline", pipelined)):
+        print(
+            f"{name:<12}{seconds:>8.3f} s{args.lines / seconds:>14_.0f} lines/s"
+            f"  x{sequential / seconds:.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+Бенчмарк чтения локальных файлов: текстовый итератор (open и разбор str)
+против чтения через mmap с разбором строк в байтах
+
+Запуск: PYTHONPATH=. python -m src.bench.reader_bench [--lines N]
+"""
+
+import os
+import tempfile
+import time
+from argparse import ArgumentParser
+
+from src.bench.parser_bench import make_lines
+from src.databases.log_data import LogData
+from src.iterators.file_range import iter_mmap_lines
+from src.iterators.local_path_iterator import LocalPathIterator
+from src.parser_process.log_processor import LogParserProcessor
+
+
+def measure_reading(path: str, reader: str) -> float:
+    """Только чтение строк, в строках в секунду"""
+    start = time.perf_counter()
+    if reader == "mmap":
+        count = sum(1 for _ in iter_mmap_lines(path))
+    else:
+        count = sum(1 for _ in LocalPathIterator(path))
+    return count / (time.perf_counter() - start)
+
+
+def measure_processing(path: str, reader: str, lines: int) -> float:
+    """Полная обработка (чтение, разбор, статистика), в строках в секунду"""
+    start = time.perf_counter()
+    LogParserProcessor(LogData(), reader=reader).process(path)
+    return lines / (time.perf_counter() - start)
+
+
+def main() -> None:
+    cli_parser = ArgumentParser(description="Бенчмарк чтения локальных файлов")
+    cli_parser.add_argument("--lines", type=int, default=500_000)
+    args = cli_parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as test_dir:
+        path = os.path.join(test_dir, "access.log")
+        with open(path, "w") as file:
+            file.write("\n".join(make_lines(args.lines)) + "\n")
+
+        for name, measure in (
+            ("read", measure_reading),
+            ("process", lambda p, r: measure_processing(p, r, args.lines)),
+        ):
+            baseline = measure(path, "text")
+            mapped = measure(path, "mmap")
+            for reader, lines_per_sec in (("text", baseline), ("mmap", mapped)):
+                print(
+                    f"{name + ' ' + reader:<16}{lines_per_sec:>14_.0f} lines/s"
+                    f"  x{lines_per_sec / baseline:.2f}"
+                )
+
+
+if __name__ == "__main__":
+    main()
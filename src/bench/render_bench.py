@@ -0,0 +1,58 @@
+"""
+Бенчмарк построения отчета по статистике с большим количеством ключей
+(ресурсы и IP-адреса), полного и с --top, во всех форматах
+
+Запуск: PYTHONPATH=. python -m src.bench.render_bench [--keys N]
+"""
+
+import io
+import time
+from argparse import ArgumentParser
+
+from src.databases.log_data import LogData
+from src.renderer.log_data_repr import LogDataRepr
+
+
+def make_log_data(keys: int) -> LogData:
+    """Статистика с keys различными ресурсами и IP-адресами"""
+    log_data = LogData(file_names=["access.log"])
+    statuses = ("200", "200", "301", "404", "500", "999")
+    for i in range(keys):
+        count = i * 7919 % 5000 + 1
+        log_data.total_requests_cnt += count
+        log_data.sources_statistics[f"/page/{i}.html"] += count
+        log_data.ip_statistics[f"10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}"] += count
+        log_data.request_types[("GET", "POST", "PUT", "DELETE")[i % 4]] += count
+        log_data.response_codes_statistics[statuses[i % 6]] += count
+        if i % 6 in (3, 4):
+            log_data.error_urls.add(f"/page/{i}.html")
+    log_data.response_sizes = list(range(1000))
+    return log_data
+
+
+def measure(log_data: LogData, format_type: str, top: int | None, repeat: int) -> float:
+    """Время построения отчета в секундах (лучшее из repeat запусков)"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        LogDataRepr(log_data, top).write(io.StringIO(), format_type)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    cli_parser = ArgumentParser(description="Бенчмарк построения отчета")
+    cli_parser.add_argument("--keys", type=int, default=1_000_000)
+    cli_parser.add_argument("--repeat", type=int, default=3)
+    args = cli_parser.parse_args()
+
+    log_data = make_log_data(args.keys)
+    for format_type in ("markdown", "adoc", "json", "ndjson", "csv"):
+        for top in (None, 100):
+            seconds = measure(log_data, format_type, top, args.repeat)
+            name = f"{format_type} {'all' if top is None else f'top {top}'}"
+            print(f"{name:<16}{seconds:>8.3f} s{args.keys / seconds:>14_.0f} keys/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Бенчмарк запуска: время отчета по небольшому файлу в новом интерпретаторе
+(импорт модулей, разбор и вывод отчета, как у main.py) и тяжелые модули,
+которые при этом загружаются. Отчет пишется во временный каталог
+
+Запуск: PYTHONPATH=. python -m src.bench.startup_bench [--repeat N] [--lines N] [--max-ms MS]
+"""
+
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from argparse import ArgumentParser
+
+from src.bench.log_generator import write_log
+
+# Зависимости, которые не должны загружаться при отчете по локальному файлу
+HEAVY_MODULES = ("numpy", "requests", "urllib3")
+
+_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+_MAIN = os.path.join(_ROOT, "src", "main.py")
+
+# main.py запускается как скрипт, после отчета в stderr пишутся
+# загруженные тяжелые модули
+_RUN_MAIN = f"""
+import runpy, sys
+sys.argv = [{_MAIN!r}, *sys.argv[1:]]
+runpy.run_path({_MAIN!r}, run_name="__main__")
+print(",".join(m for m in {HEAVY_MODULES!r} if m in sys.modules), file=sys.stderr)
+"""
+
+
+def run_report(log_path: str, *args: str) -> tuple[float, list[str]]:
+    """Время запуска main.py в секундах и загруженные тяжелые модули"""
+    with tempfile.TemporaryDirectory() as workdir:
+        os.makedirs(os.path.join(workdir, "src", "output"))
+        start = time.perf_counter()
+        result = subprocess.run(
+            [sys.executable, "-c", _RUN_MAIN, "--path", log_path, *args],
+            cwd=workdir,
+            env=dict(os.environ, PYTHONPATH=_ROOT),
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+            text=True,
+            check=True,
+        )
+        seconds = time.perf_counter() - start
+    modules = result.stderr.strip().splitlines()[-1] if result.stderr.strip() else ""
+    return seconds, [module for module in modules.split(",") if module]
+
+
+def interpreter_startup() -> float:
+    """Время запуска пустого интерпретатора в секундах"""
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-c", "pass"], check=True)
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    cli_parser = ArgumentParser(description="Бенчмарк запуска main.py")
+    cli_parser.add_argument("--repeat", type=int, default=10)
+    cli_parser.add_argument("--lines", type=int, default=100)
+    cli_parser.add_argument(
+        "--max-ms",
+        type=float,
+        default=None,
+        help="Код возврата 1, если медиана без запуска интерпретатора больше",
+    )
+    args = cli_parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        log_path = os.path.join(directory, "access.log")
+        write_log(log_path, args.lines)
+        runs = [run_report(log_path) for _ in range(args.repeat)]
+    baseline = statistics.median(interpreter_startup() for _ in range(args.repeat))
+    report = statistics.median(seconds for seconds, _ in runs)
+    modules = runs[0][1]
+
+    print(f"interpreter {baseline * 1000:>8.1f} ms")
+    print(f"report      {report * 1000:>8.1f} ms")
+    print(f"overhead    {(report - baseline) * 1000:>8.1f} ms")
+    print(f"heavy modules: {', '.join(modules) or '-'}")
+    if args.max_ms is not None and (report - baseline) * 1000 > args.max_ms:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Сценарии набора бенчмарков (src.bench): разбор строк, подсчет статистики
+построчно и по колонкам, фильтры по времени и по полям, перцентили и
+построение отчета на синтетическом логе
+"""
+
+import io
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+
+from src.bench.log_generator import LogProfile
+from src.bench.parser_bench import PROCESS_FIELDS
+from src.databases.log_data import LogData
+from src.databases.quantiles import DDSketchQuantiles
+from src.parser_process.line_parser import LineParser
+from src.parser_process.log_processor import LogParserProcessor
+from src.parser_process.profiler import peak_rss
+from src.renderer.log_data_repr import LogDataRepr
+
+FIELD_FILTER = "status >= 400 AND method = GET"
+
+
+@dataclass(frozen=True)
+class ScenarioResult:
+    """items - обработано строк (ключей для render) за лучшее время seconds"""
+
+    name: str
+    items: int
+    seconds: float
+    peak_rss: int | None
+
+    @property
+    def items_per_second(self) -> float:
+        return self.items / self.seconds
+
+
+def _read_lines(path: str) -> list[str]:
+    with open(path, encoding="utf-8") as file:
+        return [line.strip() for line in file if line.strip()]
+
+
+def _parse(path: str, profile: LogProfile, count: int) -> Callable[[], int]:
+    lines = _read_lines(path)
+    parse = LineParser(PROCESS_FIELDS).parse_values
+
+    def run() -> int:
+        for line in lines:
+            parse(line)
+        return len(lines)
+
+    return run
+
+
+def _processing(**settings) -> Callable:
+    """Сценарий полной обработки файла с настройками LogData и процессора"""
+    data_keys = {"from_date", "to_date", "size_sketch"}
+
+    def scenario(path: str, profile: LogProfile, count: int) -> Callable[[], int]:
+        options = dict(settings)
+        if options.pop("time_range", False):
+            options["from_date"], options["to_date"] = profile.time_bounds(count)
+        data_settings = {k: options.pop(k) for k in data_keys & options.keys()}
+        if options.get("time_index"):
+            LogParserProcessor(LogData(**data_settings)).build_time_index(path)
+
+        def run() -> int:
+            log_data = LogData(
+                **{
+                    # Скетч накапливает значения, нужен новый на каждый запуск
+                    k: DDSketchQuantiles() if k == "size_sketch" else v
+                    for k, v in data_settings.items()
+                }
+            )
+            LogParserProcessor(log_data, **options).process(path)
+            return count
+
+        return run
+
+    return scenario
+
+
+def _render(path: str, profile: LogProfile, count: int) -> Callable[[], int]:
+    log_data = LogData()
+    LogParserProcessor(log_data).process(path)
+    keys = len(log_data.sources_statistics) + len(log_data.ip_statistics)
+
+    def run() -> int:
+        LogDataRepr(log_data).write(io.StringIO(), "markdown")
+        return keys
+
+    return run
+
+
+SCENARIOS: dict[str, Callable] = {
+    "parse": _parse,
+    "aggregate rows": _processing(),
+    "aggregate columnar": _processing(engine="columnar"),
+    "time filter": _processing(time_range=True),
+    "time filter index": _processing(time_range=True, time_index=True),
+    "field filter": _processing(filter_expression=FIELD_FILTER),
+    "percentiles sketch": _processing(size_sketch=True),
+    "render markdown": _render,
+}
+
+
+def run_scenario(
+    name: str, path: str, profile: LogProfile, count: int, repeat: int
+) -> ScenarioResult:
+    """Запуск сценария в текущем процессе: лучшее время из repeat запусков"""
+    run = SCENARIOS[name](path, profile, count)
+    best, items = float("inf"), 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        items = run()
+        best = min(best, time.perf_counter() - start)
+    return ScenarioResult(name, items, best, peak_rss())
@@ -0,0 +1,64 @@
+"""
+Бенчмарк фильтра по времени: прежняя проверка (разбор границ и strptime
+на каждую строку) против TimeDecoder с границами, разобранными один раз
+
+Запуск: PYTHONPATH=. python -m src.bench.time_bench [--lines N]
+"""
+
+import time
+from argparse import ArgumentParser
+from datetime import UTC, datetime
+
+from src.parser_process.time_decoder import TIME_LOCAL_FORMAT, TimeDecoder
+
+FROM_DATE = "2024-11-09T10:00:00"
+TO_DATE = "2024-11-09T12:00:00"
+
+
+def make_times(count: int) -> list[str]:
+    # Несколько строк лога на каждую секунду, как в нагруженном NGINX
+    return [
+        f"09/Nov/2024:{9 + i // 36_000 % 4:02}:{i // 600 % 60:02}:{i // 10 % 60:02} +0000"
+        for i in range(count)
+    ]
+
+
+def parse_iso8601(date_str: str | None) -> datetime | None:
+    if date_str:
+        return datetime.fromisoformat(date_str).replace(tzinfo=UTC)
+
+
+def legacy_matches(time_local: str) -> bool:
+    start_time = parse_iso8601(FROM_DATE)
+    end_time = parse_iso8601(TO_DATE)
+    log_time = datetime.strptime(time_local, TIME_LOCAL_FORMAT)
+    if start_time is not None and log_time < start_time:
+        return False
+    return not (end_time is not None and log_time > end_time)
+
+
+def main() -> None:
+    cli_parser = ArgumentParser(description="Бенчмарк фильтра по времени")
+    cli_parser.add_argument("--lines", type=int, default=200_000)
+    args = cli_parser.parse_args()
+
+    times = make_times(args.lines)
+    decode = TimeDecoder().decode
+    start_ts = parse_iso8601(FROM_DATE).timestamp()
+    end_ts = parse_iso8601(TO_DATE).timestamp()
+
+    start = time.perf_counter()
+    legacy_matched = sum(legacy_matches(t) for t in times)
+    legacy_rate = len(times) / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    matched = sum(start_ts <= decode(t) <= end_ts for t in times)
+    rate = len(times) / (time.perf_counter() - start)
+
+    assert matched == legacy_matched
+    print(f"{'strptime на строку':<24}{legacy_rate:>14_.0f} lines/s  x1.00")
+    print(f"{'TimeDecoder':<24}{rate:>14_.0f} lines/s  x{rate / legacy_rate:.2f}")
+
+
+if __name__ == "__main__":
+    main()
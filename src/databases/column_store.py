@@ -0,0 +1,238 @@
+import json
+import os
+from collections.abc import Iterable, Sequence
+from datetime import UTC, datetime
+from itertools import chain, compress
+
+import numpy as np
+
+# Версия формата хранилища; хранилище другой версии не читается
+STORE_VERSION = 1
+# Файл описания хранилища: поля и разделы с диапазонами времени
+MANIFEST_NAME = "columns.json"
+# Сколько строк одного дня собирается в памяти перед записью части
+PART_ROWS = 1 << 20
+
+# Числовые колонки; остальные поля хранятся словарным кодированием
+TIMESTAMP_COLUMN = "timestamp"
+SIZE_COLUMN = "body_bytes_sent"
+
+
+class ColumnStore:
+    """
+    Разобранные строки логов в колоночном виде на диске
+
+    Каталог хранилища разбит на разделы по дням (UTC): day=2024-11-09/
+    part-00000.npz. Каждая часть - сжатый архив NumPy: время запроса
+    (int64, секунды Unix-времени), размер ответа (uint64) и строковые поля
+    как словарь различных значений в порядке первого появления
+    (<поле>.values) и номера значений по строкам (<поле>.ids, uint32).
+    Колонки архива читаются по отдельности, поэтому при чтении
+    распаковываются только нужные поля. В columns.json для каждой части
+    записаны день, количество строк и минимальное/максимальное время, по
+    ним части вне диапазона --from/--to не открываются.
+    """
+
+    def __init__(self, directory: str):
+        self.directory: str = directory
+        self.fields: list[str] = []
+        self.partitions: list[dict] = []
+        self._pending: dict[str, list[tuple[dict[str, list], np.ndarray]]] = {}
+        self._pending_rows: dict[str, int] = {}
+
+    @staticmethod
+    def is_store(path: str) -> bool:
+        return os.path.isfile(os.path.join(path, MANIFEST_NAME))
+
+    @classmethod
+    def open(cls, directory: str) -> "ColumnStore":
+        """Хранилище из каталога; если его нет, создается пустое"""
+        store = cls(directory)
+        if cls.is_store(directory):
+            with open(os.path.join(directory, MANIFEST_NAME), encoding="utf-8") as file:
+                manifest = json.load(file)
+            if manifest.get("version") != STORE_VERSION:
+                raise ValueError(f"Unsupported column store version in {directory}")
+            store.fields = manifest["fields"]
+            store.partitions = manifest["partitions"]
+        return store
+
+    @property
+    def rows_count(self) -> int:
+        return sum(partition["rows"] for partition in self.partitions)
+
+    def append(self, columns: dict[str, list[str]], timestamps: np.ndarray) -> None:
+        """
+        Добавляет строки: columns - значения полей по колонкам (размер ответа
+        строкой, как в логе), timestamps - время запросов. Строки
+        раскладываются по дням и записываются частями по PART_ROWS
+        """
+        if not len(timestamps):
+            return
+        if not self.fields:
+            self.fields = list(columns)
+        elif list(columns) != self.fields:
+            raise ValueError("Column store fields do not match appended columns")
+
+        days = timestamps // 86400
+        for day in np.unique(days).tolist():
+            in_day = days == day
+            selectors = in_day.tolist()
+            piece = {
+                field: list(compress(column, selectors))
+                for field, column in columns.items()
+            }
+            day_timestamps = timestamps[in_day]
+            key = _format_day(day)
+            self._pending.setdefault(key, []).append((piece, day_timestamps))
+            self._pending_rows[key] = self._pending_rows.get(key, 0) + len(
+                day_timestamps
+            )
+            if self._pending_rows[key] >= PART_ROWS:
+                self._write_part(key)
+
+    def save(self) -> None:
+        """Записывает накопленные строки и атомарно обновляет columns.json"""
+        for day in list(self._pending):
+            self._write_part(day)
+        os.makedirs(self.directory, exist_ok=True)
+        manifest = {
+            "version": STORE_VERSION,
+            "fields": self.fields,
+            "partitions": self.partitions,
+        }
+        path = os.path.join(self.directory, MANIFEST_NAME)
+        with open(f"{path}.tmp", "w", encoding="utf-8") as file:
+            file.write(json.dumps(manifest, ensure_ascii=False, indent=1))
+        os.replace(f"{path}.tmp", path)
+
+    def _write_part(self, day: str) -> None:
+        pieces = self._pending.pop(day)
+        self._pending_rows.pop(day)
+        timestamps = np.concatenate(
+            [piece_timestamps for _, piece_timestamps in pieces]
+        )
+        arrays = {TIMESTAMP_COLUMN: timestamps.astype(np.int64)}
+        for field in self.fields:
+            column = list(chain.from_iterable(piece[field] for piece, _ in pieces))
+            if field == SIZE_COLUMN:
+                arrays[field] = np.array(list(map(int, column)), dtype=np.uint64)
+                continue
+            index = {
+                value: position for position, value in enumerate(dict.fromkeys(column))
+            }
+            arrays[f"{field}.values"] = np.array(list(index), dtype=str)
+            arrays[f"{field}.ids"] = np.fromiter(
+                map(index.__getitem__, column), dtype=np.uint32, count=len(column)
+            )
+
+        relative_path = os.path.join(
+            f"day={day}", f"part-{len(self.partitions):05d}.npz"
+        )
+        path = os.path.join(self.directory, relative_path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(f"{path}.tmp", "wb") as file:
+            np.savez_compressed(file, **arrays)
+        os.replace(f"{path}.tmp", path)
+        self.partitions.append(
+            {
+                "path": relative_path,
+                "day": day,
+                "rows": len(timestamps),
+                "min_time": int(timestamps.min()),
+                "max_time": int(timestamps.max()),
+            }
+        )
+
+    def select_partitions(
+        self, start_ts: float = -np.inf, end_ts: float = np.inf
+    ) -> list[dict]:
+        """Части, время строк которых может попасть в [start_ts, end_ts]"""
+        return [
+            partition
+            for partition in self.partitions
+            if partition["max_time"] >= start_ts and partition["min_time"] <= end_ts
+        ]
+
+    def read(self, partition: dict, fields: Sequence[str]) -> "ColumnPart":
+        """Колонки части: читаются и распаковываются только поля fields"""
+        unknown = set(fields).difference(self.fields)
+        if unknown:
+            raise ValueError(
+                f"Column store has no fields: {', '.join(sorted(unknown))}"
+            )
+        arrays = {}
+        with np.load(os.path.join(self.directory, partition["path"])) as part:
+            arrays[TIMESTAMP_COLUMN] = part[TIMESTAMP_COLUMN]
+            for field in fields:
+                if field == SIZE_COLUMN:
+                    arrays[field] = part[field]
+                else:
+                    arrays[f"{field}.values"] = part[f"{field}.values"]
+                    arrays[f"{field}.ids"] = part[f"{field}.ids"]
+        return ColumnPart(arrays, partition["rows"])
+
+
+class ColumnPart:
+    """
+    Прочитанные колонки одной части хранилища
+
+    Поддерживает те же операции, что и ColumnBatch, поэтому добавляется в
+    статистику через add_batch. Счетчики строковых полей считаются по
+    номерам значений (np.bincount), без создания строк для каждой строки лога
+    """
+
+    def __init__(self, arrays: dict[str, np.ndarray], size: int):
+        self.arrays: dict[str, np.ndarray] = arrays
+        self.size: int = size
+
+    def __len__(self) -> int:
+        return self.size
+
+    @property
+    def timestamps(self) -> np.ndarray:
+        return self.arrays[TIMESTAMP_COLUMN]
+
+    def sizes(self) -> np.ndarray:
+        return self.arrays[SIZE_COLUMN]
+
+    def statuses(self) -> np.ndarray:
+        """Статусы ответа (uint16): в число переводится только словарь"""
+        values, ids = self.encoded("status")
+        return np.array(list(map(int, values.tolist())), dtype=np.uint16)[ids]
+
+    def encoded(self, field: str) -> tuple[np.ndarray, np.ndarray]:
+        """Словарь значений и номера значений по строкам"""
+        return self.arrays[f"{field}.values"], self.arrays[f"{field}.ids"]
+
+    def strings(self, field: str) -> list[str]:
+        """Значения поля по строкам"""
+        if field == SIZE_COLUMN:
+            return list(map(str, self.sizes().tolist()))
+        values, ids = self.encoded(field)
+        return values.astype(object)[ids].tolist()
+
+    def counts(self, field: str) -> Iterable[tuple[str, int]]:
+        """Количество строк по значениям поля в порядке первого появления"""
+        values, ids = self.encoded(field)
+        counts = np.bincount(ids, minlength=len(values))
+        present, first = np.unique(ids, return_index=True)
+        order = present[np.argsort(first, kind="stable")]
+        return zip(values[order].tolist(), counts[order].tolist())
+
+    def values_where(self, field: str, mask: np.ndarray) -> list[str]:
+        """Различные значения поля в строках mask"""
+        values, ids = self.encoded(field)
+        return values[np.unique(ids[mask])].tolist()
+
+    def select(self, mask: np.ndarray) -> "ColumnPart":
+        """Строки, для которых mask истинна (словари значений не меняются)"""
+        arrays = {
+            name: array if name.endswith(".values") else array[mask]
+            for name, array in self.arrays.items()
+        }
+        return ColumnPart(arrays, int(np.count_nonzero(mask)))
+
+
+def _format_day(day: int) -> str:
+    return datetime.fromtimestamp(day * 86400, UTC).strftime("%Y-%m-%d")
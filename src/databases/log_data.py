@@ -1,5 +1,8 @@
 from dataclasses import dataclass, field
 from collections import defaultdict
+from src.databases.quantiles import BaseQuantiles, DDSketchQuantiles, ExactQuantiles
+from src.databases.sampling import SampleStats
+from src.databases.sketches import TopKCounter
 from src.renderer.log_data_repr import LogDataRepr
 
 
@@ -20,6 +23,133 @@ class LogData:
     from_date: str | None = field(default=None, init=True)
     to_date: str | None = field(default=None, init=True)
     repr_format: str = field(default="markdown", init=True)
+    # Скетч размеров ответов; если не задан, размеры хранятся в response_sizes
+    size_sketch: DDSketchQuantiles | None = field(default=None, init=True)
+    percentiles: tuple[float, ...] = field(default=(95,), init=True)
+    # Выборка блоков (--sample): счетчики - оценки по всем логам; не сохраняется
+    sample: SampleStats | None = field(default=None, init=True)
+
+    @property
+    def size_quantiles(self) -> BaseQuantiles:
+        """Хранилище размеров ответов для расчета среднего и перцентилей"""
+        if self.size_sketch is not None:
+            return self.size_sketch
+        return ExactQuantiles(self.response_sizes)
+
+    def new_partial(self) -> "LogData":
+        """Пустая статистика с теми же настройками для подсчета части логов"""
+        return LogData(
+            from_date=self.from_date,
+            to_date=self.to_date,
+            repr_format=self.repr_format,
+            sources_statistics=self._new_counter(self.sources_statistics),
+            ip_statistics=self._new_counter(self.ip_statistics),
+            size_sketch=(
+                None if self.size_sketch is None else self.size_sketch.new_empty()
+            ),
+            percentiles=self.percentiles,
+        )
+
+    @staticmethod
+    def _new_counter(counter: dict[str, int]) -> dict[str, int]:
+        if isinstance(counter, TopKCounter):
+            return counter.new_empty()
+        return defaultdict(int)
+
+    def merge(self, other: "LogData") -> None:
+        """
+        Добавляет к статистике частичный результат other
+
+        Счетчики складываются, размеры ответов дописываются в конец
+        (или объединяются скетчи).
+        Новые ключи other добавляются после уже известных в порядке их
+        появления в other, поэтому объединение частей по порядку дает ту же
+        статистику, что и последовательный подсчет. Имена файлов, даты и
+        формат отображения не меняются.
+        """
+        self.total_requests_cnt += other.total_requests_cnt
+        for counter, other_counter in (
+            (self.sources_statistics, other.sources_statistics),
+            (self.response_codes_statistics, other.response_codes_statistics),
+            (self.request_types, other.request_types),
+            (self.ip_statistics, other.ip_statistics),
+        ):
+            if isinstance(counter, TopKCounter):
+                counter.merge(other_counter)
+                continue
+            for key, count in other_counter.items():
+                counter[key] = counter.get(key, 0) + count
+        self.size_quantiles.merge(other.size_quantiles)
+        self.error_urls.update(other.error_urls)
+
+    def scale(self, factor: float) -> None:
+        """Умножает счетчики на factor с округлением (оценка по выборке)"""
+        self.total_requests_cnt = round(self.total_requests_cnt * factor)
+        for counter in (
+            self.sources_statistics,
+            self.response_codes_statistics,
+            self.request_types,
+            self.ip_statistics,
+        ):
+            for key, count in counter.items():
+                counter[key] = round(count * factor)
+
+    def to_dict(self) -> dict:
+        """
+        Статистика и настройки подсчета для сохранения в JSON. Имена файлов
+        не сохраняются, они задаются при каждом запуске
+        """
+        return {
+            "total_requests_cnt": self.total_requests_cnt,
+            "sources_statistics": self._counter_to_dict(self.sources_statistics),
+            "response_codes_statistics": dict(self.response_codes_statistics),
+            "response_sizes": self.response_sizes,
+            "request_types": dict(self.request_types),
+            "ip_statistics": self._counter_to_dict(self.ip_statistics),
+            "error_urls": sorted(self.error_urls),
+            "from_date": self.from_date,
+            "to_date": self.to_date,
+            "repr_format": self.repr_format,
+            "size_sketch": (
+                None if self.size_sketch is None else self.size_sketch.to_dict()
+            ),
+            "percentiles": list(self.percentiles),
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "LogData":
+        return cls(
+            total_requests_cnt=data["total_requests_cnt"],
+            sources_statistics=cls._counter_from_dict(data["sources_statistics"]),
+            response_codes_statistics=defaultdict(
+                int, data["response_codes_statistics"]
+            ),
+            response_sizes=data["response_sizes"],
+            request_types=defaultdict(int, data["request_types"]),
+            ip_statistics=cls._counter_from_dict(data["ip_statistics"]),
+            error_urls=set(data["error_urls"]),
+            from_date=data["from_date"],
+            to_date=data["to_date"],
+            repr_format=data["repr_format"],
+            size_sketch=(
+                None
+                if data["size_sketch"] is None
+                else DDSketchQuantiles.from_dict(data["size_sketch"])
+            ),
+            percentiles=tuple(data["percentiles"]),
+        )
+
+    @staticmethod
+    def _counter_to_dict(counter: dict[str, int]) -> dict:
+        if isinstance(counter, TopKCounter):
+            return {"top_k": counter.to_dict()}
+        return {"counts": dict(counter)}
+
+    @staticmethod
+    def _counter_from_dict(data: dict) -> dict[str, int]:
+        if "top_k" in data:
+            return TopKCounter.from_dict(data["top_k"])
+        return defaultdict(int, data["counts"])
 
     def __repr__(self):
         return LogDataRepr(self).get_repr(self.repr_format)
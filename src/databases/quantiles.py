@@ -0,0 +1,218 @@
+import math
+from abc import ABC, abstractmethod
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import numpy as np
+
+# До этого количества значений точные среднее и перцентили считаются
+# без NumPy: импорт NumPy дольше самого расчета по небольшому списку
+NUMPY_MIN_VALUES = 10_000
+
+
+class BaseQuantiles(ABC):
+    """Хранилище размеров ответов для расчета среднего и перцентилей"""
+
+    @abstractmethod
+    def add(self, value: int) -> None:
+        """Добавляет одно значение"""
+
+    @abstractmethod
+    def add_many(self, values: "np.ndarray") -> None:
+        """Добавляет массив значений (колоночный режим)"""
+
+    @abstractmethod
+    def merge(self, other: "BaseQuantiles") -> None:
+        """Добавляет все значения другого хранилища того же типа"""
+
+    @abstractmethod
+    def __len__(self) -> int:
+        """Количество добавленных значений"""
+
+    @abstractmethod
+    def mean(self) -> float:
+        """Среднее значение"""
+
+    @abstractmethod
+    def percentile(self, percent: float) -> float:
+        """Перцентиль, percent от 0 до 100"""
+
+
+class ExactQuantiles(BaseQuantiles):
+    """
+    Точные значения: хранит все размеры ответов в списке
+
+    Память растет линейно с количеством запросов, подходит для небольших логов.
+    """
+
+    def __init__(self, values: list[int] | None = None):
+        self.values: list[int] = [] if values is None else values
+
+    def add(self, value: int) -> None:
+        self.values.append(value)
+
+    def add_many(self, values: "np.ndarray") -> None:
+        self.values.extend(values.tolist())
+
+    def merge(self, other: "ExactQuantiles") -> None:
+        self.values.extend(other.values)
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def mean(self) -> float:
+        if 0 < len(self.values) < NUMPY_MIN_VALUES:
+            return sum(self.values) / len(self.values)
+        import numpy as np
+
+        return float(np.mean(self.values))
+
+    def percentile(self, percent: float) -> float:
+        if 0 < len(self.values) < NUMPY_MIN_VALUES:
+            return linear_percentile(sorted(self.values), percent)
+        import numpy as np
+
+        return float(np.percentile(self.values, percent))
+
+
+def linear_percentile(ordered: list[int], percent: float) -> float:
+    """
+    Перцентиль отсортированного списка с линейной интерполяцией
+
+    Повторяет вычисления np.percentile (method="linear"), включая порядок
+    операций с плавающей точкой, поэтому результат совпадает до бита.
+    """
+    index = (len(ordered) - 1) * (percent / 100)
+    if index >= len(ordered) - 1:
+        return float(ordered[-1])
+    lower = math.floor(index)
+    fraction = index - lower
+    low, high = ordered[lower], ordered[lower + 1]
+    if fraction >= 0.5:
+        return high - (high - low) * (1 - fraction)
+    return low + (high - low) * fraction
+
+
+class DDSketchQuantiles(BaseQuantiles):
+    """
+    Приближенные перцентили по скетчу DDSketch
+
+    Значения раскладываются по логарифмическим корзинам с основанием
+    gamma = (1 + accuracy) / (1 - accuracy), поэтому любой перцентиль
+    вычисляется с относительной ошибкой не больше accuracy. Количество
+    корзин ограничено max_bins (при переполнении сливаются младшие корзины),
+    так что память не зависит от объема логов. Среднее считается точно.
+    Скетчи с одинаковыми параметрами объединяются без потери точности.
+    """
+
+    def __init__(self, accuracy: float = 0.01, max_bins: int = 2048):
+        if not 0 < accuracy < 1:
+            raise ValueError("Sketch accuracy must be between 0 and 1")
+        self.accuracy: float = accuracy
+        self.max_bins: int = max_bins
+        self._gamma: float = (1 + accuracy) / (1 - accuracy)
+        self._log_gamma: float = math.log(self._gamma)
+        self._bins: dict[int, int] = {}
+        self._zero_count: int = 0
+        self._count: int = 0
+        self._sum: int = 0
+
+    def new_empty(self) -> "DDSketchQuantiles":
+        """Пустой скетч с теми же параметрами"""
+        return DDSketchQuantiles(self.accuracy, self.max_bins)
+
+    def add(self, value: int) -> None:
+        self._count += 1
+        self._sum += value
+        if value <= 0:
+            self._zero_count += 1
+            return
+        key = math.ceil(math.log(value) / self._log_gamma)
+        bins = self._bins
+        bins[key] = bins.get(key, 0) + 1
+        if len(bins) > self.max_bins:
+            self._collapse()
+
+    def add_many(self, values: "np.ndarray") -> None:
+        # Номера корзин считаются для всего массива, в словарь попадают
+        # только различные корзины с количеством значений
+        import numpy as np
+
+        positive = values[values > 0]
+        self._count += len(values)
+        self._sum += int(values.sum())
+        self._zero_count += len(values) - len(positive)
+        keys = np.ceil(np.log(positive) / self._log_gamma).astype(np.int64)
+        bins = self._bins
+        for key, count in zip(
+            *map(np.ndarray.tolist, np.unique(keys, return_counts=True))
+        ):
+            bins[key] = bins.get(key, 0) + count
+        while len(bins) > self.max_bins:
+            self._collapse()
+
+    def merge(self, other: "DDSketchQuantiles") -> None:
+        if other.accuracy != self.accuracy:
+            raise ValueError("Cannot merge sketches with different accuracy")
+        self._count += other._count
+        self._sum += other._sum
+        self._zero_count += other._zero_count
+        bins = self._bins
+        for key, count in other._bins.items():
+            bins[key] = bins.get(key, 0) + count
+        while len(bins) > self.max_bins:
+            self._collapse()
+
+    def _collapse(self) -> None:
+        # Младшая корзина сливается со следующей: страдает точность
+        # только самых маленьких значений
+        lowest = min(self._bins)
+        count = self._bins.pop(lowest)
+        next_key = min(self._bins)
+        self._bins[next_key] += count
+
+    def __len__(self) -> int:
+        return self._count
+
+    @property
+    def bins_count(self) -> int:
+        return len(self._bins)
+
+    def to_dict(self) -> dict:
+        """Состояние скетча для сохранения в JSON"""
+        return {
+            "accuracy": self.accuracy,
+            "max_bins": self.max_bins,
+            "bins": [[key, count] for key, count in self._bins.items()],
+            "zero_count": self._zero_count,
+            "count": self._count,
+            "sum": self._sum,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "DDSketchQuantiles":
+        sketch = cls(data["accuracy"], data["max_bins"])
+        sketch._bins = {key: count for key, count in data["bins"]}
+        sketch._zero_count = data["zero_count"]
+        sketch._count = data["count"]
+        sketch._sum = data["sum"]
+        return sketch
+
+    def mean(self) -> float:
+        if self._count == 0:
+            return math.nan
+        return self._sum / self._count
+
+    def percentile(self, percent: float) -> float:
+        if self._count == 0:
+            return math.nan
+        rank = percent / 100 * (self._count - 1)
+        seen = self._zero_count
+        if rank < seen:
+            return 0.0
+        for key in sorted(self._bins):
+            seen += self._bins[key]
+            if rank < seen:
+                # Середина корзины (gamma^(key-1), gamma^key] в смысле относительной ошибки
+                return 2 * self._gamma**key / (self._gamma + 1)
+        return 2 * self._gamma ** max(self._bins) / (self._gamma + 1)
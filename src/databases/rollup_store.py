@@ -0,0 +1,252 @@
+import json
+import math
+import os
+import sqlite3
+from array import array
+from collections import defaultdict
+from collections.abc import Iterator
+
+from src.databases.log_data import LogData
+from src.databases.sketches import TopKCounter
+
+# Версия схемы; база другой версии не используется
+ROLLUP_VERSION = 1
+# Длина интервала агрегации в секундах
+ROLLUP_SECONDS = 3600
+# Сколько строк счетчиков передается в одном executemany
+INSERT_BATCH_SIZE = 10_000
+
+# Счетчики LogData, которые хранятся построчно в таблице counts
+_COUNTERS = (
+    "sources_statistics",
+    "response_codes_statistics",
+    "request_types",
+    "ip_statistics",
+)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS hours (
+    hour INTEGER PRIMARY KEY,
+    requests INTEGER NOT NULL,
+    sizes BLOB,
+    size_sketch TEXT,
+    top_k TEXT
+);
+CREATE TABLE IF NOT EXISTS counts (
+    hour INTEGER NOT NULL,
+    position INTEGER NOT NULL,
+    counter TEXT NOT NULL,
+    key TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (hour, position)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS error_urls (
+    hour INTEGER NOT NULL,
+    url TEXT NOT NULL,
+    PRIMARY KEY (hour, url)
+) WITHOUT ROWID;
+"""
+
+
+class RollupStore:
+    """
+    Почасовые агрегаты статистики в локальной базе SQLite
+
+    Для каждого часа (UTC) хранятся количество запросов, счетчики
+    ресурсов, статусов, методов и IP (таблица counts, упорядочена по часу
+    и порядку первого появления ключей, вставка идет в конец индекса), ресурсы с ошибками и размеры ответов: все значения
+    (uint64) или скетч DDSketch. Счетчики --top-k хранятся целиком в JSON.
+    Отчет за интервал - объединение часов, которые он задевает, без
+    повторного чтения логов. Агрегаты годятся только для тех же настроек
+    подсчета и фильтров (config), с которыми они записаны.
+    """
+
+    def __init__(self, path: str):
+        self.path: str = path
+        self._connection = sqlite3.connect(path)
+        # WAL: чтение отчетов не блокируется записью новых часов
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        with self._connection:
+            self._connection.executescript(_SCHEMA)
+        version = self._meta("version")
+        if version is None:
+            self._set_meta("version", ROLLUP_VERSION)
+        elif version != ROLLUP_VERSION:
+            self.close()
+            raise ValueError(f"Unsupported rollup store version in {path}")
+
+    @staticmethod
+    def is_store(path: str) -> bool:
+        """Файл базы SQLite (проверяется заголовок файла)"""
+        if not os.path.isfile(path):
+            return False
+        with open(path, "rb") as file:
+            return file.read(16) == b"SQLite format 3\x00"
+
+    def close(self) -> None:
+        self._connection.close()
+
+    def _meta(self, key: str):
+        row = self._connection.execute(
+            "SELECT value FROM meta WHERE key = ?", (key,)
+        ).fetchone()
+        return None if row is None else json.loads(row[0])
+
+    def _set_meta(self, key: str, value) -> None:
+        with self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+                (key, json.dumps(value)),
+            )
+
+    def use_config(self, config: dict) -> None:
+        """
+        Задает настройки подсчета для пустой базы; для базы с агрегатами
+        настройки должны совпадать с сохраненными
+        """
+        # Сравнение в том виде, в котором настройки читаются из JSON
+        config = json.loads(json.dumps(config))
+        stored = self._meta("config")
+        if stored is None:
+            self._set_meta("config", config)
+        elif stored != config:
+            raise ValueError(
+                f"Rollup store {self.path} was built with different "
+                "statistics settings or filters"
+            )
+
+    @property
+    def hours_count(self) -> int:
+        return self._connection.execute("SELECT COUNT(*) FROM hours").fetchone()[0]
+
+    def add(self, hours: dict[int, LogData], template: LogData) -> None:
+        """
+        Добавляет статистику по часам (ключ - начало часа в секундах
+        Unix-времени) одной транзакцией; уже записанные часы объединяются
+        с новыми. template - пустая статистика с настройками подсчета
+        """
+        if not hours:
+            return
+        keys = sorted(hours)
+        merged = {
+            hour: log_data
+            for hour, log_data in self.read_range(keys[0], keys[-1], template)
+            if hour in hours
+        }
+        for hour in keys:
+            if hour in merged:
+                merged[hour].merge(hours[hour])
+            else:
+                merged[hour] = hours[hour]
+
+        connection = self._connection
+        with connection:
+            for table in ("hours", "counts", "error_urls"):
+                connection.executemany(
+                    f"DELETE FROM {table} WHERE hour = ?", [(hour,) for hour in keys]
+                )
+            connection.executemany(
+                "INSERT INTO hours (hour, requests, sizes, size_sketch, top_k) "
+                "VALUES (?, ?, ?, ?, ?)",
+                [_hour_row(hour, merged[hour]) for hour in keys],
+            )
+            for query, rows in (
+                (
+                    (
+                        "INSERT INTO counts (hour, position, counter, key, count) "
+                        "VALUES (?, ?, ?, ?, ?)"
+                    ),
+                    _count_rows(merged, keys),
+                ),
+                (
+                    "INSERT INTO error_urls (hour, url) VALUES (?, ?)",
+                    (
+                        (hour, url)
+                        for hour in keys
+                        for url in sorted(merged[hour].error_urls)
+                    ),
+                ),
+            ):
+                rows = iter(rows)
+                while batch := [row for _, row in zip(range(INSERT_BATCH_SIZE), rows)]:
+                    connection.executemany(query, batch)
+
+    def read_range(
+        self, start_ts: float, end_ts: float, template: LogData
+    ) -> Iterator[tuple[int, LogData]]:
+        """
+        Статистика часов, которые пересекаются с [start_ts, end_ts], по
+        возрастанию времени
+        """
+        first = _hour_start(start_ts) if math.isfinite(start_ts) else -(2**62)
+        last = int(end_ts) if math.isfinite(end_ts) else 2**62
+        bounds = (first, last)
+        connection = self._connection
+
+        counts = defaultdict(list)
+        for hour, counter, key, count in connection.execute(
+            "SELECT hour, counter, key, count FROM counts "
+            "WHERE hour BETWEEN ? AND ? ORDER BY hour, position",
+            bounds,
+        ):
+            counts[hour].append((counter, key, count))
+        error_urls = defaultdict(set)
+        for hour, url in connection.execute(
+            "SELECT hour, url FROM error_urls WHERE hour BETWEEN ? AND ?", bounds
+        ):
+            error_urls[hour].add(url)
+
+        for hour, requests, sizes, size_sketch, top_k in connection.execute(
+            "SELECT hour, requests, sizes, size_sketch, top_k FROM hours "
+            "WHERE hour BETWEEN ? AND ? ORDER BY hour",
+            bounds,
+        ):
+            data = template.new_partial().to_dict()
+            data["total_requests_cnt"] = requests
+            if sizes is not None:
+                data["response_sizes"] = array("Q", sizes).tolist()
+            if size_sketch is not None:
+                data["size_sketch"] = json.loads(size_sketch)
+            for counter, sketch in json.loads(top_k or "{}").items():
+                data[counter] = {"top_k": sketch}
+            log_data = LogData.from_dict(data)
+            for counter, key, count in counts[hour]:
+                getattr(log_data, counter)[key] = count
+            log_data.error_urls = error_urls[hour]
+            yield hour, log_data
+
+
+def _hour_start(timestamp: float) -> int:
+    return int(timestamp // ROLLUP_SECONDS * ROLLUP_SECONDS)
+
+
+def _hour_row(hour: int, log_data: LogData) -> tuple:
+    sketch = log_data.size_sketch
+    return (
+        hour,
+        log_data.total_requests_cnt,
+        (array("Q", log_data.response_sizes).tobytes() if sketch is None else None),
+        None if sketch is None else json.dumps(sketch.to_dict()),
+        json.dumps(
+            {
+                counter: getattr(log_data, counter).to_dict()
+                for counter in _COUNTERS
+                if isinstance(getattr(log_data, counter), TopKCounter)
+            }
+        ),
+    )
+
+
+def _count_rows(hours: dict[int, LogData], keys: list[int]) -> Iterator[tuple]:
+    # position сохраняет порядок первого появления ключей внутри часа
+    for hour in keys:
+        position = 0
+        for counter in _COUNTERS:
+            values = getattr(hours[hour], counter)
+            if isinstance(values, TopKCounter):
+                continue
+            for key, count in values.items():
+                yield hour, position, counter, key, count
+                position += 1
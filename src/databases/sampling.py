@@ -0,0 +1,165 @@
+import math
+from dataclasses import dataclass, field
+from itertools import accumulate, pairwise
+from typing import TYPE_CHECKING
+
+from src.databases.quantiles import ExactQuantiles
+
+if TYPE_CHECKING:
+    from src.databases.log_data import LogData
+
+# Уровень доверия интервалов и соответствующий квантиль нормального распределения
+CONFIDENCE_LEVEL = 0.95
+CONFIDENCE_Z = 1.959963984540054
+
+
+@dataclass
+class SampleStats:
+    """
+    Выборка блоков логов (--sample) для оценок по всем логам и их
+    доверительных интервалов
+
+    Блок - единица выборки: диапазон байт файла или подряд идущие строки,
+    его размер - в байтах. Счетчики выборки переводятся на все логи
+    множителем scale = total_size / sampled_size (оценка отношения), а
+    дисперсии оценок считаются по разбросу значений между блоками.
+    Размеры ответов выборки идут по блокам подряд: у i-го блока их
+    unit_requests[i].
+    """
+
+    fraction: float
+    # Размер всех логов, из которых выбирались блоки
+    total_size: int = 0
+    unit_sizes: list[int] = field(default_factory=list)
+    unit_requests: list[int] = field(default_factory=list)
+    # Суммы по блокам для долей кодов ответа: Σa, Σa², Σa·y, где a -
+    # запросы блока с кодом, y - все запросы блока
+    status_sums: dict[str, list[int]] = field(default_factory=dict)
+
+    def add_unit(self, size: int, log_data: "LogData") -> None:
+        """Добавляет выбранный блок размера size со статистикой log_data"""
+        requests = log_data.total_requests_cnt
+        self.unit_sizes.append(size)
+        self.unit_requests.append(requests)
+        for code, count in log_data.response_codes_statistics.items():
+            sums = self.status_sums.setdefault(code, [0, 0, 0])
+            sums[0] += count
+            sums[1] += count * count
+            sums[2] += count * requests
+
+    @property
+    def units(self) -> int:
+        return len(self.unit_sizes)
+
+    @property
+    def sampled_size(self) -> int:
+        return sum(self.unit_sizes)
+
+    @property
+    def scale(self) -> float:
+        """Множитель счетчиков выборки, 0 - ни один блок не выбран"""
+        sampled_size = self.sampled_size
+        return self.total_size / sampled_size if sampled_size else 0.0
+
+    def total_error(self) -> float | None:
+        """Половина доверительного интервала количества запросов"""
+        ratio_error = self._ratio_error(self.unit_requests, self.unit_sizes)
+        return None if ratio_error is None else ratio_error * self.total_size
+
+    def share(self, code: str) -> tuple[float, float | None]:
+        """Доля запросов с кодом ответа и половина ее доверительного интервала"""
+        requests = sum(self.unit_requests)
+        count, count_squares, count_requests = self.status_sums.get(code, (0, 0, 0))
+        if not requests:
+            return 0.0, None
+        share = count / requests
+        residual_squares = (
+            count_squares
+            - 2 * share * count_requests
+            + share * share * sum(y * y for y in self.unit_requests)
+        )
+        return share, self._ratio_half_width(requests, residual_squares)
+
+    def mean_error(self, sizes: ExactQuantiles) -> float | None:
+        """Половина доверительного интервала среднего размера ответа"""
+        return self._ratio_error(
+            [sum(values) for values in self._unit_values(sizes)], self.unit_requests
+        )
+
+    def percentile_interval(
+        self, sizes: ExactQuantiles, percent: float
+    ) -> tuple[float, float] | None:
+        """
+        Доверительный интервал перцентиля размера ответа (метод Вудраффа):
+        интервал доли запросов не больше оценки перцентиля переводится
+        обратно в перцентили выборки
+        """
+        if not len(sizes):
+            return None
+        estimate = sizes.percentile(percent)
+        below = [
+            sum(1 for value in values if value <= estimate)
+            for values in self._unit_values(sizes)
+        ]
+        share_error = self._ratio_error(below, self.unit_requests)
+        if share_error is None:
+            return None
+        share = percent / 100
+        return (
+            sizes.percentile(100 * max(0.0, share - share_error)),
+            sizes.percentile(100 * min(1.0, share + share_error)),
+        )
+
+    def _unit_values(self, sizes: ExactQuantiles) -> list[list[int]]:
+        """Размеры ответов каждого блока"""
+        bounds = accumulate(self.unit_requests, initial=0)
+        return [sizes.values[start:end] for start, end in pairwise(bounds)]
+
+    def _ratio_error(
+        self, numerators: list[int], denominators: list[int]
+    ) -> float | None:
+        """
+        Половина доверительного интервала отношения сумм по блокам
+        Σnumerators / Σdenominators, None - блоков меньше двух
+        """
+        denominator = sum(denominators)
+        if not denominator:
+            return None
+        ratio = sum(numerators) / denominator
+        residual_squares = sum(
+            (a - ratio * b) ** 2 for a, b in zip(numerators, denominators)
+        )
+        return self._ratio_half_width(denominator, residual_squares)
+
+    def _ratio_half_width(
+        self, denominator: float, residual_squares: float
+    ) -> float | None:
+        # Дисперсия оценки отношения: (1 - f) * s² / (m * b̄²), где s² -
+        # дисперсия остатков a - R*b по m блокам, f - выбранная доля логов
+        units = self.units
+        if units < 2 or denominator <= 0:
+            return None
+        finite_correction = 1 - self.sampled_size / self.total_size
+        variance = (
+            max(finite_correction, 0.0)
+            * max(residual_squares, 0.0)
+            / (units - 1)
+            * units
+            / denominator**2
+        )
+        return student_quantile(units - 1) * math.sqrt(variance)
+
+
+def student_quantile(degrees: int) -> float:
+    """
+    Квантиль распределения Стьюдента для CONFIDENCE_LEVEL (разложение
+    Корниша-Фишера от CONFIDENCE_Z): при небольшом количестве блоков
+    интервал шире нормального
+    """
+    z = CONFIDENCE_Z
+    return (
+        z
+        + (z**3 + z) / (4 * degrees)
+        + (5 * z**5 + 16 * z**3 + 3 * z) / (96 * degrees**2)
+        + (3 * z**7 + 19 * z**5 + 17 * z**3 - 15 * z) / (384 * degrees**3)
+    )
@@ -0,0 +1,147 @@
+import base64
+import hashlib
+import heapq
+import math
+from operator import itemgetter
+
+
+class HyperLogLog:
+    """
+    Оценка количества различных значений (алгоритм HyperLogLog)
+
+    Занимает 2^precision байт, стандартная ошибка оценки около
+    1.04 / sqrt(2^precision): 0.8% при precision=14. Повторное добавление
+    значения ничего не меняет, оценки объединяются без потерь.
+    """
+
+    def __init__(self, precision: int = 14):
+        if not 4 <= precision <= 18:
+            raise ValueError("HyperLogLog precision must be between 4 and 18")
+        self.precision: int = precision
+        self._registers: bytearray = bytearray(1 << precision)
+        self._rest_bits: int = 64 - precision
+
+    def new_empty(self) -> "HyperLogLog":
+        return HyperLogLog(self.precision)
+
+    def add(self, value: str) -> None:
+        digest = hashlib.blake2b(value.encode(), digest_size=8).digest()
+        hashed = int.from_bytes(digest, "big")
+        index = hashed >> self._rest_bits
+        rest = hashed & ((1 << self._rest_bits) - 1)
+        rank = self._rest_bits - rest.bit_length() + 1
+        self._registers[index] = max(self._registers[index], rank)
+
+    def merge(self, other: "HyperLogLog") -> None:
+        if other.precision != self.precision:
+            raise ValueError("Cannot merge HyperLogLog with different precision")
+        self._registers = bytearray(map(max, self._registers, other._registers))
+
+    def to_dict(self) -> dict:
+        """Состояние оценки для сохранения в JSON"""
+        return {
+            "precision": self.precision,
+            "registers": base64.b64encode(self._registers).decode("ascii"),
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "HyperLogLog":
+        estimator = cls(data["precision"])
+        estimator._registers = bytearray(base64.b64decode(data["registers"]))
+        return estimator
+
+    def count(self) -> int:
+        size = len(self._registers)
+        alpha = 0.7213 / (1 + 1.079 / size)
+        estimate = alpha * size * size / sum(2.0**-rank for rank in self._registers)
+        zeros = self._registers.count(0)
+        if estimate <= 2.5 * size and zeros:
+            # Поправка для малых количеств (linear counting)
+            estimate = size * math.log(size / zeros)
+        return round(estimate)
+
+
+class TopKCounter(dict):
+    """
+    Счетчик самых частых ключей с ограниченной памятью (вариант Space-Saving)
+
+    Используется как обычный счетчик: counter[key] += 1. Хранит не больше
+    capacity ключей; при переполнении остаются k самых частых, а наибольший
+    вытесненный счетчик становится порогом floor. Новый ключ начинает счет
+    с floor, поэтому ключ с реальной частотой больше floor не теряется, а
+    погрешность любого счетчика не превышает floor (в худшем случае около
+    N / (capacity - k) для N добавлений).
+
+    Первое появление каждого ключа (и повторное после вытеснения) попадает
+    в HyperLogLog distinct, что дает оценку количества различных ключей.
+    """
+
+    def __init__(
+        self,
+        k: int,
+        capacity: int | None = None,
+        distinct: HyperLogLog | None = None,
+    ):
+        super().__init__()
+        if k < 1:
+            raise ValueError("Top-K size must be positive")
+        self.k: int = k
+        self.capacity: int = max(capacity or 10 * k, k + 1)
+        self.floor: int = 0
+        self.distinct: HyperLogLog = HyperLogLog() if distinct is None else distinct
+
+    def new_empty(self) -> "TopKCounter":
+        return TopKCounter(self.k, self.capacity, self.distinct.new_empty())
+
+    def __missing__(self, key: str) -> int:
+        self.distinct.add(key)
+        if len(self) >= self.capacity:
+            self._prune()
+        return self.floor
+
+    def _prune(self) -> None:
+        largest = heapq.nlargest(self.k + 1, self.items(), key=itemgetter(1))
+        self.floor = max(self.floor, largest[-1][1])
+        self.clear()
+        self.update(largest[: self.k])
+
+    def merge(self, other: "TopKCounter") -> None:
+        """
+        Складывает счетчики. Для ключа, которого нет в одной из частей, там
+        берется ее порог floor (верхняя граница его частоты), поэтому оценки
+        по-прежнему не меньше реальных, а порог результата - сумма порогов
+        """
+        own_floor, other_floor = self.floor, other.floor
+        if other_floor:
+            for key in self.keys() - other.keys():
+                self[key] += other_floor
+        for key, count in other.items():
+            self[key] = self.get(key, own_floor) + count
+        self.floor = own_floor + other_floor
+        self.distinct.merge(other.distinct)
+        if len(self) > self.capacity:
+            self._prune()
+
+    def to_dict(self) -> dict:
+        """Состояние счетчика для сохранения в JSON"""
+        return {
+            "k": self.k,
+            "capacity": self.capacity,
+            "floor": self.floor,
+            "counts": list(self.items()),
+            "distinct": self.distinct.to_dict(),
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "TopKCounter":
+        counter = cls(
+            data["k"], data["capacity"], HyperLogLog.from_dict(data["distinct"])
+        )
+        counter.floor = data["floor"]
+        counter.update(data["counts"])
+        return counter
+
+    def top(self, n: int | None = None) -> list[tuple[str, int]]:
+        """Самые частые ключи по убыванию счетчика, не больше k"""
+        limit = self.k if n is None else min(n, self.k)
+        return heapq.nlargest(limit, self.items(), key=itemgetter(1))
@@ -0,0 +1,148 @@
+import base64
+import hashlib
+import json
+import os
+import zlib
+from array import array
+from dataclasses import dataclass
+
+from src.databases.log_data import LogData
+
+# Версия формата файла состояния; состояние другой версии не используется
+STATE_VERSION = 2
+# Сколько первых байт файла сравнивается, чтобы заметить подмену файла
+HEAD_SIZE = 4096
+
+
+@dataclass
+class FileState:
+    """
+    Сохраненная статистика по файлу и его состояние на момент подсчета
+
+    Статистика stats посчитана по байтам [0, offset) - до конца последней
+    полной строки. head - хеш первых байт файла, вместе с устройством и
+    inode он отличает дописанный файл от нового файла с тем же именем.
+    Размеры ответов в stats хранятся компактно: массив array("Q"), сжатый
+    zlib, в base64 (см. encode_sizes), а не списком чисел JSON.
+    """
+
+    device: int
+    inode: int
+    size: int
+    mtime_ns: int
+    offset: int
+    head: str
+    stats: dict
+
+    @staticmethod
+    def read_head(path: str, size: int) -> str:
+        """Хеш первых min(size, HEAD_SIZE) байт файла"""
+        with open(path, "rb") as file:
+            return hashlib.blake2b(file.read(min(size, HEAD_SIZE))).hexdigest()
+
+    @classmethod
+    def snapshot(
+        cls, path: str, stat: os.stat_result, offset: int, stats: LogData
+    ) -> "FileState":
+        return cls(
+            device=stat.st_dev,
+            inode=stat.st_ino,
+            size=stat.st_size,
+            mtime_ns=stat.st_mtime_ns,
+            offset=offset,
+            head=cls.read_head(path, offset),
+            stats=encode_sizes(stats.to_dict()),
+        )
+
+    def log_data(self) -> LogData:
+        """Сохраненная статистика по файлу"""
+        return LogData.from_dict(decode_sizes(self.stats))
+
+    def is_unchanged(self, stat: os.stat_result) -> bool:
+        return (
+            self.is_same_file(stat)
+            and stat.st_size == self.size
+            and stat.st_mtime_ns == self.mtime_ns
+        )
+
+    def is_same_file(self, stat: os.stat_result) -> bool:
+        return (stat.st_dev, stat.st_ino) == (self.device, self.inode)
+
+    def is_appended(self, path: str, stat: os.stat_result) -> bool:
+        """Файл тот же и только дописан: начало не изменилось, размер не меньше"""
+        return (
+            self.is_same_file(stat)
+            and stat.st_size >= self.offset
+            and self.read_head(path, self.offset) == self.head
+        )
+
+
+def encode_sizes(stats: dict) -> dict:
+    """Статистика LogData.to_dict с размерами ответов в сжатом виде"""
+    sizes = array("Q", stats["response_sizes"]).tobytes()
+    encoded = base64.b64encode(zlib.compress(sizes)).decode("ascii")
+    return {**stats, "response_sizes": encoded}
+
+
+def decode_sizes(stats: dict) -> dict:
+    """Обратное преобразование encode_sizes"""
+    sizes = zlib.decompress(base64.b64decode(stats["response_sizes"]))
+    return {**stats, "response_sizes": array("Q", sizes).tolist()}
+
+
+class StateStore:
+    """
+    Файл состояния для инкрементального анализа (JSON)
+
+    Хранит статистику по каждому файлу отдельно вместе с inode, размером,
+    временем изменения и смещением, до которого файл уже разобран.
+    Состояние годится только для тех же настроек подсчета (config): если
+    они изменились, сохраненная статистика не используется.
+    """
+
+    def __init__(self, path: str):
+        self.path: str = path
+        self.config: dict | None = None
+        self.files: dict[str, FileState] = {}
+
+    @classmethod
+    def load(cls, path: str) -> "StateStore":
+        """Загружает состояние; если файла нет или он другой версии - пустое"""
+        store = cls(path)
+        try:
+            with open(path, "r", encoding="utf-8") as file:
+                data = json.load(file)
+        except FileNotFoundError:
+            return store
+        if data.get("version") != STATE_VERSION:
+            return store
+        store.config = data["config"]
+        store.files = {
+            file_path: FileState(**file_state)
+            for file_path, file_state in data["files"].items()
+        }
+        return store
+
+    def use_config(self, config: dict) -> None:
+        """Задает настройки подсчета, состояние для других настроек сбрасывается"""
+        # Сравнение в том виде, в котором настройки читаются из JSON
+        config = json.loads(json.dumps(config))
+        if self.config != config:
+            self.files = {}
+        self.config = config
+
+    def save(self) -> None:
+        """Атомарно записывает состояние: файл заменяется только целиком"""
+        data = {
+            "version": STATE_VERSION,
+            "config": self.config,
+            "files": {
+                file_path: vars(file_state)
+                for file_path, file_state in self.files.items()
+            },
+        }
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as file:
+            # json.dumps кодирует целиком на C, json.dump - по частям на Python
+            file.write(json.dumps(data, ensure_ascii=False))
+        os.replace(temp_path, self.path)
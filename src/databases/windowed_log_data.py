@@ -0,0 +1,69 @@
+from collections import OrderedDict
+
+from src.databases.log_data import LogData
+
+
+class WindowedLogData:
+    """
+    Статистика по скользящим окнам времени (например, за 1, 5 и 60 минут)
+
+    Запросы раскладываются по корзинам длиной bucket_seconds по времени
+    запроса. Хранятся только корзины, попадающие в самое длинное окно,
+    поэтому память не растет со временем работы. Статистика окна - это
+    объединение его корзин, так что окно длиной seconds покрывает от
+    seconds до seconds + bucket_seconds последних секунд.
+    """
+
+    def __init__(
+        self,
+        template: LogData,
+        windows: tuple[int, ...] = (60, 300, 3600),
+        bucket_seconds: int | None = None,
+    ):
+        if not windows or min(windows) <= 0:
+            raise ValueError("Windows must be positive durations in seconds")
+        self.template: LogData = template
+        self.windows: tuple[int, ...] = tuple(sorted(windows))
+        self.bucket_seconds: int = bucket_seconds or max(1, self.windows[0] // 12)
+        self._buckets: OrderedDict[int, LogData] = OrderedDict()
+        self._oldest_key: int | None = None
+
+    def bucket(self, timestamp: float) -> LogData | None:
+        """
+        Статистика корзины, в которую попадает запрос с этим временем;
+        None - запрос старше самого длинного окна
+        """
+        key = int(timestamp // self.bucket_seconds)
+        if self._oldest_key is not None and key < self._oldest_key:
+            return None
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            out_of_order = bool(self._buckets) and key < next(reversed(self._buckets))
+            bucket = self._buckets[key] = self.template.new_partial()
+            if out_of_order:
+                # Корзины хранятся по возрастанию времени
+                self._buckets = OrderedDict(sorted(self._buckets.items()))
+        return bucket
+
+    def expire(self, now: float) -> None:
+        """Удаляет корзины, которые уже не попадают ни в одно окно"""
+        self._oldest_key = self._first_key(self.windows[-1], now)
+        while self._buckets and next(iter(self._buckets)) < self._oldest_key:
+            self._buckets.popitem(last=False)
+
+    @property
+    def buckets_count(self) -> int:
+        return len(self._buckets)
+
+    def _first_key(self, seconds: int, now: float) -> int:
+        # Корзина, в которую попадает начало окна, входит в окно целиком
+        return int((now - seconds) // self.bucket_seconds)
+
+    def window(self, seconds: int, now: float) -> LogData:
+        """Статистика запросов за последние seconds секунд до now"""
+        first_key = self._first_key(seconds, now)
+        result = self.template.new_partial()
+        for key, bucket in self._buckets.items():
+            if key >= first_key:
+                result.merge(bucket)
+        return result
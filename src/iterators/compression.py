@@ -0,0 +1,177 @@
+import bz2
+import io
+import lzma
+import zlib
+from collections.abc import Callable, Iterable, Iterator
+from functools import partial
+from typing import BinaryIO, TextIO
+
+from src.iterators.file_range import (
+    READ_BUFFER_SIZE,
+    iter_mmap_lines,
+    iter_stream_lines,
+)
+
+try:
+    import zstandard
+except ImportError:  # zstd поддерживается, только если установлен zstandard
+    zstandard = None
+
+# Сигнатуры сжатых форматов в начале файла
+_MAGIC_NUMBERS: tuple[tuple[str, bytes], ...] = (
+    ("gzip", b"\x1f\x8b"),
+    ("bz2", b"BZh"),
+    ("xz", b"\xfd7zXZ\x00"),
+    ("zstd", b"\x28\xb5\x2f\xfd"),
+)
+# Сколько байт нужно, чтобы распознать любую сигнатуру
+MAGIC_SIZE = max(len(magic) for _, magic in _MAGIC_NUMBERS)
+
+
+def detect_compression(header: bytes) -> str | None:
+    """Формат сжатия по первым байтам данных, None - данные не сжаты"""
+    for compression, magic in _MAGIC_NUMBERS:
+        if header.startswith(magic):
+            return compression
+    return None
+
+
+def detect_file_compression(path: str) -> str | None:
+    with open(path, "rb") as file:
+        return detect_compression(file.read(MAGIC_SIZE))
+
+
+def _new_decompressor(compression: str):
+    match compression:
+        case "gzip":
+            return zlib.decompressobj(16 + zlib.MAX_WBITS)
+        case "bz2":
+            return bz2.BZ2Decompressor()
+        case "xz":
+            return lzma.LZMADecompressor()
+        case "zstd":
+            if zstandard is None:
+                raise ValueError("zstd-compressed input requires the zstandard package")
+            return zstandard.ZstdDecompressor().decompressobj()
+        case _:
+            raise ValueError(f"Unknown compression: {compression}")
+
+
+class DecompressingStream(io.RawIOBase):
+    """
+    Сырой поток байт, распакованных из последовательности кусков
+
+    Формат сжатия определяется по сигнатуре в начале данных, несжатые
+    данные передаются как есть. Куски распаковываются по мере чтения, так
+    что в памяти не бывает больше одного распакованного куска. Несколько
+    сжатых потоков подряд (например, склеенные .gz) читаются друг за другом,
+    нулевые байты после потока gzip пропускаются, как в модуле gzip.
+    """
+
+    def __init__(
+        self, chunks: Iterable[bytes], on_close: Callable[[], None] | None = None
+    ):
+        super().__init__()
+        self._chunks: Iterator[bytes] = iter(chunks)
+        self._on_close: Callable[[], None] | None = on_close
+        self.compression: str | None = None
+        self._decompressor = None
+        self._detected: bool = False
+        self._pending: memoryview = memoryview(b"")
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        while not self._pending:
+            if not self._fill():
+                return 0
+        size = min(len(buffer), len(self._pending))
+        buffer[:size] = self._pending[:size]
+        self._pending = self._pending[size:]
+        return size
+
+    def _fill(self) -> bool:
+        """Распаковывает следующий кусок, False - данные закончились"""
+        if not self._detected:
+            chunk = self._read_header() or None
+        else:
+            # Пустой кусок - не конец данных, конец - только конец кусков
+            chunk = next(self._chunks, None)
+        if chunk is None:
+            if self._decompressor is not None and not self._decompressor.eof:
+                raise EOFError("Compressed input ended before the end-of-stream marker")
+            return False
+        if self._decompressor is None:
+            self._pending = memoryview(chunk)
+            return True
+
+        data = self._decompressor.decompress(chunk)
+        while self._decompressor.eof:
+            unused = self._decompressor.unused_data
+            if self.compression == "gzip":
+                # Файл gzip может быть дополнен нулями (например, до размера
+                # блока): это не начало следующего потока
+                unused = unused.lstrip(b"\x00")
+            if not unused:
+                break
+            # Следующий сжатый поток сразу после конца предыдущего
+            self._decompressor = _new_decompressor(self.compression)
+            data += self._decompressor.decompress(unused)
+        self._pending = memoryview(data)
+        return True
+
+    def _read_header(self) -> bytes:
+        """Первые куски, в которых уже видна сигнатура сжатия"""
+        header = b""
+        for chunk in self._chunks:
+            header += chunk
+            if len(header) >= MAGIC_SIZE:
+                break
+        self._detected = True
+        self.compression = detect_compression(header)
+        if self.compression is not None:
+            self._decompressor = _new_decompressor(self.compression)
+        return header
+
+    def close(self) -> None:
+        if not self.closed and self._on_close is not None:
+            self._on_close()
+        super().close()
+
+
+def open_decompressed(
+    chunks: Iterable[bytes], on_close: Callable[[], None] | None = None
+) -> BinaryIO:
+    """Буферизованный поток распакованных байт (см. DecompressingStream)"""
+    return io.BufferedReader(
+        DecompressingStream(chunks, on_close), buffer_size=READ_BUFFER_SIZE
+    )
+
+
+def _open_binary_decompressed(path: str) -> BinaryIO:
+    # Файл закрывается вместе с возвращаемым потоком (on_close)
+    file = open(path, "rb", buffering=0)  # noqa: SIM115
+    return open_decompressed(
+        iter(partial(file.read, READ_BUFFER_SIZE), b""), on_close=file.close
+    )
+
+
+def open_log_file(path: str) -> TextIO:
+    """
+    Открывает файл лога как текст, так же как open(path, "r"). Сжатые
+    файлы (gzip, bz2, xz, zstd) распаковываются на лету
+    """
+    if detect_file_compression(path) is None:
+        return open(path, "r")
+    return io.TextIOWrapper(_open_binary_decompressed(path))
+
+
+def iter_log_bytes(path: str) -> Iterator[bytes]:
+    """
+    Непустые строки файла лога в байтах (см. iter_mmap_lines). Несжатые
+    файлы отображаются в память, сжатые распаковываются на лету
+    """
+    if detect_file_compression(path) is None:
+        return iter_mmap_lines(path)
+    return iter_stream_lines(_open_binary_decompressed(path))
@@ -0,0 +1,289 @@
+import fnmatch
+import os
+import re
+from collections.abc import Callable, Iterator, Sequence
+from datetime import UTC, datetime
+
+# Порядок файлов: name - по путям (каталоги обходятся по алфавиту),
+# mtime - по времени изменения, от старых к новым
+FILE_ORDERS = ("name", "mtime")
+# Запас к периоду каталога-даты: дата в имени обычно локальная, а не UTC
+DATE_DIRECTORY_MARGIN = 24 * 3600
+# Годы, которые распознаются в именах каталогов
+DATE_YEARS = range(1970, 2100)
+
+_MAGIC = re.compile(r"[*?[]")
+_SEPARATORS = re.compile(r"[\\/]+" if os.altsep else r"/+")
+# Имя каталога-даты: 2024, 2024-11, 2024-11-09, dt=2024-11-09, dt=20241109
+_DATE_NAME = re.compile(r"(\w+=)?(\d{4})(?:([-_.]?)(\d{2})(?:[-_.]?(\d{2}))?)?")
+_TWO_DIGITS = re.compile(r"\d{2}")
+
+# Период каталога-даты: начало и единица (year, month, day)
+Period = tuple[datetime, str]
+
+
+def discover_files(
+    path_pattern: str,
+    exclude: Sequence[str] = (),
+    order: str = "name",
+    time_range: tuple[float, float] | None = None,
+) -> list[str]:
+    """Файлы по шаблонам path_pattern (см. iter_patterns) в порядке order"""
+    if order not in FILE_ORDERS:
+        raise ValueError(f"Unknown file order: {order}")
+    files = list(iter_patterns(path_pattern, exclude, time_range))
+    if order == "mtime":
+        # Сортировка устойчивая: файлы с одинаковым временем остаются по именам
+        files.sort(key=os.path.getmtime)
+    return files
+
+
+def iter_patterns(
+    path_pattern: str,
+    exclude: Sequence[str] = (),
+    time_range: tuple[float, float] | None = None,
+) -> Iterator[str]:
+    """
+    Файлы по одному или нескольким шаблонам через os.pathsep (см. iter_files)
+    в порядке шаблонов и имен, без повторов
+    """
+    seen = set()
+    for pattern in path_pattern.split(os.pathsep):
+        for path in iter_files(pattern, exclude, time_range) if pattern else ():
+            if path not in seen:
+                seen.add(path)
+                yield path
+
+
+def iter_files(
+    pattern: str,
+    exclude: Sequence[str] = (),
+    time_range: tuple[float, float] | None = None,
+) -> Iterator[str]:
+    """
+    Файлы по шаблону пути в порядке имен
+
+    Каталоги читаются через os.scandir по одному и по алфавиту, поэтому
+    файлы отдаются по мере обхода, а в памяти только каталоги текущего пути.
+    Шаблон как у glob: * ? [] в пределах имени, ** - любое количество
+    каталогов (ссылки на каталоги при этом не обходятся), скрытые имена
+    подходят только явно. Каталог по шаблону - все файлы в нем и в его
+    подкаталогах (рекурсивно, как шаблон каталог/**/*). exclude -
+    шаблоны исключений для найденных при обходе имен: без разделителя
+    сравниваются с именем файла или каталога (каталог пропускается целиком),
+    с разделителем - со всем путем.
+    С time_range (Unix-время начала и конца) пропускаются каталоги-даты
+    вне интервала с запасом DATE_DIRECTORY_MARGIN, см. directory_period
+    """
+    drive, rest = os.path.splitdrive(pattern)
+    parts = [part for part in _SEPARATORS.split(rest) if part]
+    literal = 0
+    while literal < len(parts) and not _MAGIC.search(parts[literal]):
+        literal += 1
+    root = drive + (os.sep if _SEPARATORS.match(rest) else "")
+    root = os.path.join(root, *parts[:literal]) if literal else root
+    parts = parts[literal:]
+    is_excluded = _exclude_check(exclude)
+
+    if not parts:
+        if os.path.isfile(root) and (is_excluded is None or not is_excluded(root)):
+            yield root
+            return
+        if not os.path.isdir(root):
+            return
+
+    walker = _Walker(parts, is_excluded, time_range)
+    yield from walker.walk(root, frozenset({0}), None)
+
+
+def directory_period(name: str, parent: Period | None = None) -> Period | None:
+    """
+    Период, который покрывает каталог с именем-датой: год (2024,
+    year=2024), месяц (2024-11) или день (2024-11-09, dt=2024-11-09,
+    dt=20241109), а также месяц и день во вложенных каталогах 2024/11/09.
+    Слитные цифры без ключа (202411, 20241109) - не дата: это может быть
+    номер сборки или идентификатор. None - не дата
+    """
+    if parent is not None and parent[1] != "day" and _TWO_DIGITS.fullmatch(name):
+        start, unit = parent
+        try:
+            if unit == "year":
+                return start.replace(month=int(name)), "month"
+            return start.replace(day=int(name)), "day"
+        except ValueError:
+            return None
+
+    match = _DATE_NAME.fullmatch(name)
+    if match is None or int(match[2]) not in DATE_YEARS:
+        return None
+    key, year, separator, month, day = match.groups()
+    if month and not key and not separator:
+        return None
+    try:
+        start = datetime(int(year), int(month or 1), int(day or 1), tzinfo=UTC)
+    except ValueError:
+        return None
+    return start, "day" if day else "month" if month else "year"
+
+
+def period_bounds(period: Period) -> tuple[float, float]:
+    """Unix-время начала и конца (не включительно) периода"""
+    start, unit = period
+    if unit == "day":
+        return start.timestamp(), start.timestamp() + 24 * 3600
+    if unit == "month":
+        year, month = divmod(start.month, 12)
+        end = start.replace(year=start.year + year, month=month + 1)
+    else:
+        end = start.replace(year=start.year + 1)
+    return start.timestamp(), end.timestamp()
+
+
+class _Walker:
+    """
+    Обход каталогов по частям шаблона: состояние - номера частей, с которых
+    может продолжиться совпадение для имен внутри текущего каталога. К
+    шаблону добавляется **/*: так каталог, на котором шаблон закончился,
+    дает все файлы в нем и во всех его подкаталогах
+    """
+
+    def __init__(
+        self,
+        parts: list[str],
+        is_excluded: Callable[[str], bool] | None,
+        time_range: tuple[float, float] | None,
+    ):
+        self.end: int = len(parts)
+        self.parts: list[str] = parts + ["**", "*"]
+        self.matchers: list[Callable[[str], re.Match | None] | None] = [
+            None if part == "**" else _compile_part(part) for part in self.parts
+        ]
+        self.is_excluded: Callable[[str], bool] | None = is_excluded
+        self.time_range: tuple[float, float] | None = time_range
+        self._closures: dict[frozenset[int], frozenset[int]] = {}
+
+    def walk(
+        self, directory: str, states: frozenset[int], period: Period | None
+    ) -> Iterator[str]:
+        try:
+            with os.scandir(directory or os.curdir) as scanner:
+                entries = sorted(scanner, key=lambda entry: entry.name)
+        except OSError:
+            # Каталог удален во время обхода или нет прав
+            return
+
+        # Переходы одинаковы для всех имен каталога: ** забирает каталог
+        # (кроме ссылок, чтобы не зациклиться) или, в конце шаблона, файл
+        end, full_end = self.end, len(self.parts)
+        states = self._closure(states)
+        stars = frozenset(
+            state for state in states if state < full_end and self.parts[state] == "**"
+        )
+        # Файл подходит, если шаблон закончился на нем или на ** перед ним
+        file_ends = {end, full_end}
+        stars_end = end - 1 in stars
+        named = [
+            (state + 1, self.matchers[state], self.parts[state].startswith("."))
+            for state in states
+            if state < full_end and state not in stars
+        ]
+        prefix = os.path.join(directory, "")
+        is_excluded = self.is_excluded
+
+        for entry in entries:
+            name = entry.name
+            hidden = name.startswith(".")
+            key = _normcase(name)
+            next_states = {
+                state
+                for state, match, dot in named
+                if (dot or not hidden) and match(key)
+            }
+            try:
+                is_dir = entry.is_dir()
+            except OSError:
+                continue
+            if not is_dir:
+                if (
+                    not file_ends.isdisjoint(next_states) or stars_end and not hidden
+                ) and (is_excluded is None or not is_excluded(prefix + name)):
+                    yield prefix + name
+                continue
+
+            if stars and not hidden and not entry.is_symlink():
+                next_states |= stars
+            next_states.discard(full_end)
+            if not next_states:
+                continue
+            path = prefix + name
+            if is_excluded is not None and is_excluded(path):
+                continue
+            child_period = None
+            if self.time_range is not None:
+                child_period = directory_period(name, period)
+                # Каталог 2048 или 1999 может быть не годом: по одному году
+                # без ключа не отсекается, отсекаются вложенные 2024/11
+                if (
+                    child_period is not None
+                    and not (child_period[1] == "year" and name.isdigit())
+                    and not self._in_time_range(child_period)
+                ):
+                    continue
+            yield from self.walk(path, frozenset(next_states), child_period)
+
+    def _closure(self, states: frozenset[int]) -> frozenset[int]:
+        # ** подходит и для пустой последовательности каталогов
+        closure = self._closures.get(states)
+        if closure is None:
+            closure = set(states)
+            for state in states:
+                while state < len(self.parts) and self.parts[state] == "**":
+                    state += 1
+                    closure.add(state)
+            closure = self._closures[states] = frozenset(closure)
+        return closure
+
+    def _in_time_range(self, period: Period) -> bool:
+        start, end = period_bounds(period)
+        from_ts, to_ts = self.time_range
+        return (
+            start - DATE_DIRECTORY_MARGIN <= to_ts
+            and end + DATE_DIRECTORY_MARGIN > from_ts
+        )
+
+
+def _normcase(name: str) -> str:
+    return name
+
+
+if os.name == "nt":
+    _normcase = os.path.normcase
+
+
+def _compile_part(part: str) -> Callable[[str], re.Match | None]:
+    return re.compile(fnmatch.translate(_normcase(part))).match
+
+
+def _exclude_check(exclude: Sequence[str]) -> Callable[[str], bool] | None:
+    """Проверка пути по шаблонам исключений (см. iter_files), None - их нет"""
+    if not exclude:
+        return None
+    by_name = [
+        _compile_part(pattern) for pattern in exclude if not _SEPARATORS.search(pattern)
+    ]
+    by_path = [
+        _compile_part(os.path.normpath(pattern))
+        for pattern in exclude
+        if _SEPARATORS.search(pattern)
+    ]
+
+    def is_excluded(path: str) -> bool:
+        name = _normcase(os.path.basename(path))
+        if any(match(name) for match in by_name):
+            return True
+        if by_path:
+            path = _normcase(os.path.normpath(path))
+            return any(match(path) for match in by_path)
+        return False
+
+    return is_excluded
@@ -0,0 +1,137 @@
+import os
+from collections.abc import Sequence
+from typing import BinaryIO
+
+from src.iterators.file_range import TEXT_ENCODING
+from src.iterators.local_path_iterator import iter_log_paths
+
+
+class FileFollower:
+    """
+    Читает строки, которые дописываются в файл (как tail -F)
+
+    Каждый вызов read_lines возвращает полные строки, появившиеся с прошлого
+    вызова; неполная последняя строка ждет перевода строки. Ротация (по пути
+    появился другой файл) обрабатывается так: старый файл дочитывается до
+    конца, затем новый читается с начала. Если файл укоротили (copytruncate),
+    чтение начинается с начала файла. Удаленный файл дочитывается и
+    закрывается; если по пути появится новый, он читается с начала.
+    """
+
+    def __init__(self, path: str, from_start: bool = False):
+        self.path: str = path
+        self._file: BinaryIO | None = None
+        self._identity: tuple[int, int] | None = None
+        self._partial: bytes = b""
+        self._open(from_start)
+
+    def _open(self, from_start: bool) -> None:
+        try:
+            # Файл открыт, пока за ним следят, и закрывается в close
+            self._file = open(self.path, "rb")  # noqa: SIM115
+        except FileNotFoundError:
+            return
+        stat = os.fstat(self._file.fileno())
+        self._identity = (stat.st_dev, stat.st_ino)
+        if not from_start:
+            self._file.seek(stat.st_size)
+
+    def read_lines(self) -> list[str]:
+        """Новые непустые строки без пробельных символов по краям"""
+        if self._file is None:
+            # Файла еще не было: новый файл читается с начала
+            self._open(from_start=True)
+            if self._file is None:
+                return []
+
+        if os.fstat(self._file.fileno()).st_size < self._file.tell():
+            self._file.seek(0)
+            self._partial = b""
+        lines = self._read_available()
+
+        if self._is_rotated():
+            if self._partial:
+                lines.append(self._decode(self._partial))
+                self._partial = b""
+            self.close()
+            self._open(from_start=True)
+            if self._file is not None:
+                lines.extend(self._read_available())
+        elif os.fstat(self._file.fileno()).st_nlink == 0:
+            # Файл удален (в отличие от переименования, ссылок на него не
+            # осталось): дописывать его некому, дескриптор закрывается
+            if self._partial:
+                lines.append(self._decode(self._partial))
+                self._partial = b""
+            self.close()
+        return [line for line in lines if line]
+
+    @property
+    def closed(self) -> bool:
+        """Файл не открыт: удален или еще не создан"""
+        return self._file is None
+
+    def _read_available(self) -> list[str]:
+        data = self._partial + self._file.read()
+        *complete, self._partial = data.split(b"\n")
+        return [self._decode(line) for line in complete]
+
+    @staticmethod
+    def _decode(line: bytes) -> str:
+        return line.decode(TEXT_ENCODING).strip()
+
+    def _is_rotated(self) -> bool:
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            # Файл переименован, а новый еще не создан: ждем его
+            return False
+        return (stat.st_dev, stat.st_ino) != self._identity
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class LocalPathFollower:
+    """
+    Следит за всеми файлами по шаблону пути: файлы, появившиеся после
+    запуска, читаются с начала, уже существовавшие - с текущего конца.
+    Служебные файлы (индексы времени .tidx) не отслеживаются
+    """
+
+    def __init__(
+        self, path_pattern: str, from_start: bool = False, exclude: Sequence[str] = ()
+    ):
+        self.path_pattern: str = path_pattern
+        self.exclude: Sequence[str] = exclude
+        self._followers: dict[str, FileFollower] = {
+            path: FileFollower(path, from_start)
+            for path in iter_log_paths(path_pattern, exclude)
+        }
+
+    @property
+    def files(self) -> list[str]:
+        return list(self._followers)
+
+    def read_lines(self) -> list[str]:
+        for path in iter_log_paths(self.path_pattern, self.exclude):
+            if path not in self._followers:
+                self._followers[path] = FileFollower(path, from_start=True)
+        lines = [
+            line
+            for follower in self._followers.values()
+            for line in follower.read_lines()
+        ]
+        # Удаленные файлы больше не отслеживаются: новый файл с тем же
+        # именем найдется по шаблону и будет прочитан с начала
+        for path in [
+            path for path, follower in self._followers.items() if follower.closed
+        ]:
+            del self._followers[path]
+        return lines
+
+    def close(self) -> None:
+        for follower in self._followers.values():
+            follower.close()
@@ -0,0 +1,164 @@
+import io
+import locale
+import mmap
+import os
+from collections.abc import Iterator
+from itertools import chain, repeat
+from typing import BinaryIO, TextIO
+
+# Кодировка, в которой open(path, "r") читает файлы логов
+TEXT_ENCODING: str = locale.getpreferredencoding(False)
+# Размер буфера чтения диапазонов файла
+READ_BUFFER_SIZE = 1 << 20
+# Примерный размер куска отображенного файла, который делится на строки за раз
+MMAP_CHUNK_SIZE = 4 << 20
+# Пробельные символы ASCII, которые убирает str.strip()
+ASCII_WHITESPACE = b" \t\n\r\x0b\x0c\x1c\x1d\x1e\x1f"
+
+
+class FileRange(io.RawIOBase):
+    """
+    Сырой поток байт файла, ограниченный диапазоном [start, end)
+
+    Если end не задан, поток читается до конца файла.
+    """
+
+    def __init__(self, path: str, start: int = 0, end: int | None = None):
+        super().__init__()
+        # Файл принадлежит потоку и закрывается в close
+        self._file: BinaryIO = open(path, "rb", buffering=0)  # noqa: SIM115
+        self._file.seek(start)
+        self._remaining: int | None = None if end is None else max(end - start, 0)
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        if self._remaining is None:
+            return self._file.readinto(buffer)
+        if self._remaining == 0:
+            return 0
+        view = memoryview(buffer)[: self._remaining]
+        read = self._file.readinto(view)
+        self._remaining -= read
+        return read
+
+    def close(self) -> None:
+        if not self.closed:
+            self._file.close()
+        super().close()
+
+
+def encoded_size(lines: list[str | bytes]) -> int:
+    """Размер строк в байтах: текстовые строки кодируются как при чтении"""
+    if lines and isinstance(lines[0], str):
+        return len("".join(lines).encode(TEXT_ENCODING, "replace"))
+    return sum(map(len, lines))
+
+
+def open_file_range(path: str, start: int = 0, end: int | None = None) -> TextIO:
+    """
+    Открывает диапазон байт файла как текст, так же как open(path, "r"):
+    с кодировкой по умолчанию и универсальными переводами строк.
+    Границы диапазона должны совпадать с началами строк.
+    """
+    return io.TextIOWrapper(
+        io.BufferedReader(FileRange(path, start, end), buffer_size=READ_BUFFER_SIZE)
+    )
+
+
+def align_to_line_start(file: BinaryIO, offset: int) -> int:
+    """Ближайшее начало строки в файле, не меньшее offset"""
+    if offset <= 0:
+        return 0
+    file.seek(offset - 1)
+    file.readline()
+    return file.tell()
+
+
+def find_lines_end(file: BinaryIO, start: int, end: int) -> int:
+    """
+    Конец последней полной строки в диапазоне [start, end) файла: позиция
+    сразу после последнего перевода строки, start - если его нет
+    """
+    position = end
+    while position > start:
+        block_start = max(start, position - READ_BUFFER_SIZE)
+        file.seek(block_start)
+        newline = file.read(position - block_start).rfind(b"\n")
+        if newline >= 0:
+            return block_start + newline + 1
+        position = block_start
+    return start
+
+
+def iter_mmap_lines(
+    path: str, start: int = 0, end: int | None = None
+) -> Iterator[bytes]:
+    """
+    Непустые строки диапазона [start, end) файла в виде байт, без
+    пробельных символов ASCII по краям
+
+    Файл отображается в память (mmap) и делится на строки кусками по
+    MMAP_CHUNK_SIZE. Переводы строк универсальные, как у open(path, "r"):
+    \\r\\n и одиночный \\r тоже считаются концом строки. Для строк только из
+    ASCII результат совпадает с текстовым чтением после strip(), остальные
+    строки нужно декодировать и еще раз очистить от пробелов Unicode.
+    Границы диапазона должны совпадать с началами строк.
+    """
+    return _split_chunks(_iter_mmap_chunks(path, start, end))
+
+
+def iter_stream_lines(stream: BinaryIO) -> Iterator[bytes]:
+    """
+    То же, что iter_mmap_lines, для потока байт (например, распакованного
+    файла). Поток закрывается, когда строки закончатся
+    """
+    return _split_chunks(_iter_stream_chunks(stream))
+
+
+def _split_chunks(chunks: Iterator[bytes]) -> Iterator[bytes]:
+    # Строки кусков перебираются, очищаются и отбрасываются встроенными
+    # итераторами без вызова кода на Python для каждой строки
+    return chain.from_iterable(
+        filter(None, map(bytes.strip, chunk.split(b"\n"), repeat(ASCII_WHITESPACE)))
+        for chunk in chunks
+    )
+
+
+def _universal_newlines(chunk: bytes) -> bytes:
+    if b"\r" in chunk:
+        return chunk.replace(b"\r\n", b"\n").replace(b"\r", b"\n")
+    return chunk
+
+
+def _iter_mmap_chunks(path: str, start: int, end: int | None) -> Iterator[bytes]:
+    """Куски диапазона файла, которые заканчиваются переводом строки \\n"""
+    with open(path, "rb") as file:
+        size = os.fstat(file.fileno()).st_size
+        end = size if end is None else min(end, size)
+        if start >= end:
+            return
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            position = start
+            while position < end:
+                # Кусок заканчивается сразу после перевода строки, поэтому
+                # пара \r\n никогда не разрывается между кусками
+                chunk_end = buffer.find(b"\n", position + MMAP_CHUNK_SIZE, end)
+                chunk_end = end if chunk_end < 0 else chunk_end + 1
+                yield _universal_newlines(buffer[position:chunk_end])
+                position = chunk_end
+
+
+def _iter_stream_chunks(stream: BinaryIO) -> Iterator[bytes]:
+    """Куски потока, которые заканчиваются переводом строки \\n"""
+    with stream:
+        rest = b""
+        while data := stream.read(MMAP_CHUNK_SIZE):
+            data = rest + data
+            cut = data.rfind(b"\n") + 1
+            rest = data[cut:]
+            if cut:
+                yield _universal_newlines(data[:cut])
+        if rest:
+            yield _universal_newlines(rest)
@@ -1,23 +1,83 @@
-import glob
 from src.iterators.base_iterator import BaseIterator
-from typing import Iterator
+from src.iterators.compression import iter_log_bytes, open_log_file
+from src.iterators.file_discovery import discover_files, iter_patterns
+from typing import Iterator, Sequence
+
+# Индекс времени рядом с файлом лога (access.log.tidx), см. TimeIndex
+TIME_INDEX_SUFFIX = ".tidx"
+# Служебные файлы, которые не считаются логами при обходе по шаблону
+SERVICE_SUFFIXES = (TIME_INDEX_SUFFIX, TIME_INDEX_SUFFIX + ".tmp")
+
+
+def iter_log_paths(
+    path_pattern: str,
+    exclude: Sequence[str] = (),
+    time_range: tuple[float, float] | None = None,
+) -> Iterator[str]:
+    """Файлы логов по шаблонам (см. iter_patterns) без служебных файлов"""
+    for path in iter_patterns(path_pattern, exclude, time_range):
+        if not path.endswith(SERVICE_SUFFIXES):
+            yield path
 
 
 class LocalPathIterator(BaseIterator):
     """
     Реализует итератор для обхода файлов по локальному пути
+
+    Сжатые файлы (gzip, bz2, xz, zstd) распознаются по сигнатуре и
+    распаковываются на лету. Файлы ищутся по шаблонам (см. discover_files)
+    при первом обращении к files; если порядок по именам, а список не
+    нужен, чтение начинается с первого найденного файла
     """
 
-    def __init__(self, path_pattern: str):
-        self._files: list[str] = glob.glob(path_pattern)
+    def __init__(
+        self,
+        path_pattern: str,
+        exclude: Sequence[str] = (),
+        order: str = "name",
+        time_range: tuple[float, float] | None = None,
+    ):
+        self.path_pattern: str = path_pattern
+        self.exclude: Sequence[str] = exclude
+        self.order: str = order
+        # Unix-время --from/--to: каталоги-даты вне интервала пропускаются
+        self.time_range: tuple[float, float] | None = time_range
+        self._files: list[str] | None = None
 
     @property
     def files(self) -> list[str]:
+        if self._files is None:
+            self._files = [
+                path
+                for path in discover_files(
+                    self.path_pattern, self.exclude, self.order, self.time_range
+                )
+                if not path.endswith(SERVICE_SUFFIXES)
+            ]
         return self._files
 
+    def _paths(self) -> Iterator[str]:
+        if self._files is not None or self.order != "name":
+            yield from self.files
+            return
+        # Найденные при полном обходе файлы запоминаются для files
+        found = []
+        for path in iter_log_paths(self.path_pattern, self.exclude, self.time_range):
+            found.append(path)
+            yield path
+        self._files = found
+
     def __iter__(self) -> Iterator[str]:
-        for file_path in self.files:
-            with open(file_path, "r") as file:
+        for file_path in self._paths():
+            with open_log_file(file_path) as file:
                 for line in file:
                     if line.strip():
                         yield line.strip()
+
+    def iter_bytes(self) -> Iterator[bytes]:
+        """
+        Непустые строки файлов в виде байт, несжатые файлы читаются через mmap.
+        Строки передаются в LineParser.parse_values_bytes
+        """
+        for file_path in self._paths():
+            yield from iter_log_bytes(file_path)
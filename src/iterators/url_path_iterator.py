@@ -1,23 +1,211 @@
+import io
+import queue
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator
+
 import requests
+import urllib3
+from requests.adapters import HTTPAdapter
+
 from src.iterators.base_iterator import BaseIterator
-from typing import Iterator
+from src.iterators.compression import open_decompressed
+from src.iterators.file_range import TEXT_ENCODING
+
+# Размер куска при чтении ответа
+DOWNLOAD_CHUNK_SIZE = 1 << 16
+# Сколько кусков каждого URL может ждать разбора (ограничивает память)
+PREFETCH_CHUNKS = 64
+# Таймауты подключения и чтения, секунды
+TIMEOUT = (10, 60)
+# Повторы после обрыва соединения и задержка перед первым повтором
+RETRIES = 5
+RETRY_BACKOFF = 0.5
+
+# Ошибки, после которых загрузка продолжается с полученного байта
+_RETRYABLE_ERRORS = (
+    requests.ConnectionError,
+    requests.Timeout,
+    urllib3.exceptions.HTTPError,
+)
+
+
+class _ServerError(requests.RequestException):
+    """Ответ 5xx: запрос стоит повторить"""
 
 
 class URLPathIterator(BaseIterator):
     """
     Реализует итератор для обхода файлов по url
+
+    Несколько URL загружаются параллельно через общий пул соединений, пока
+    разбираются строки предыдущих. Строки отдаются в порядке URL. На каждый
+    URL в памяти не больше PREFETCH_CHUNKS кусков: загрузка ждет, пока
+    разбор догонит ее. После обрыва соединения загрузка продолжается с
+    полученного байта (заголовок Range). Ответ запрашивается сжатым
+    (Accept-Encoding: gzip), а сжатый файл (например, access.log.gz)
+    распознается по сигнатуре и распаковывается по мере загрузки.
     """
 
-    def __init__(self, url: str):
-        self._files: list[str] = [url]
+    def __init__(self, urls: str | list[str], workers: int = 4):
+        self._files: list[str] = [urls] if isinstance(urls, str) else list(urls)
+        self.workers: int = workers
+
+    @classmethod
+    def from_url_list(cls, path: str, workers: int = 4) -> "URLPathIterator":
+        """URL из файла: по одному в строке, пустые строки и # комментарии пропускаются"""
+        with open(path, "r") as file:
+            urls = [line.strip() for line in file]
+        return cls([url for url in urls if url and not url.startswith("#")], workers)
 
     @property
     def files(self) -> list[str]:
         return self._files
 
     def __iter__(self) -> Iterator[str]:
-        response = requests.get(self.files[0], stream=True)
-        response.raise_for_status()
-        for line in response.iter_lines(decode_unicode=True):
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=self.workers, pool_maxsize=self.workers)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+
+        stop = threading.Event()
+        queues = [queue.Queue(PREFETCH_CHUNKS) for _ in self.files]
+        executor = ThreadPoolExecutor(max_workers=max(1, self.workers))
+        try:
+            for url, chunks in zip(self.files, queues):
+                executor.submit(_download, session, url, chunks, stop)
+            for chunks in queues:
+                yield from _iter_queue_lines(chunks)
+        finally:
+            # Загрузки, которые уже не нужны, завершаются при следующем куске
+            stop.set()
+            executor.shutdown(wait=False, cancel_futures=True)
+            session.close()
+
+
+def _iter_queue_lines(chunks: queue.Queue) -> Iterator[str]:
+    """Строки одного URL из очереди: кодировка, куски байт, None в конце"""
+
+    def iter_chunks() -> Iterator[bytes]:
+        while (item := chunks.get()) is not None:
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+
+    encoding = chunks.get()
+    if isinstance(encoding, BaseException):
+        raise encoding
+    with io.TextIOWrapper(open_decompressed(iter_chunks()), encoding=encoding) as file:
+        for line in file:
             if line.strip():
                 yield line.strip()
+
+
+def _download(
+    session: requests.Session, url: str, chunks: queue.Queue, stop: threading.Event
+) -> None:
+    """Загружает URL в очередь; ошибка передается через очередь в разбор"""
+
+    def put(item) -> bool:
+        while not stop.is_set():
+            try:
+                chunks.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    try:
+        download = _ResumableDownload(session, url)
+        for chunk in download.chunks():
+            if download.encoding is not None and not put(download.encoding):
+                return
+            download.encoding = None
+            if not put(chunk):
+                return
+        if download.encoding is not None:
+            put(download.encoding)
+        put(None)
+    except Exception as error:  # noqa: BLE001
+        # Любая ошибка загрузки передается в разбор: иначе он ждал бы
+        # конца данных из очереди бесконечно
+        put(error)
+
+
+class _ResumableDownload:
+    """Загрузка одного URL с продолжением после обрыва соединения"""
+
+    def __init__(self, session: requests.Session, url: str):
+        self.session: requests.Session = session
+        self.url: str = url
+        # Кодировка текста, известна после первого ответа
+        self.encoding: str | None = None
+        self._received: int = 0
+        self._validator: str | None = None
+        self._content_decoder = None
+
+    def chunks(self) -> Iterator[bytes]:
+        """Куски тела ответа без Content-Encoding, но со сжатием самого файла"""
+        attempt = 0
+        while True:
+            try:
+                yield from self._request()
+                if self._content_decoder is not None:
+                    tail = self._content_decoder.flush()
+                    if tail:
+                        yield tail
+                return
+            except _RETRYABLE_ERRORS + (_ServerError,):
+                attempt += 1
+                if attempt > RETRIES:
+                    raise
+                time.sleep(RETRY_BACKOFF * 2 ** (attempt - 1))
+
+    def _request(self) -> Iterator[bytes]:
+        headers = {"Accept-Encoding": "gzip"}
+        if self._received:
+            headers["Range"] = f"bytes={self._received}-"
+            if self._validator:
+                # Продолжение только того же содержимого, иначе придет 200
+                headers["If-Range"] = self._validator
+        with self.session.get(
+            self.url, headers=headers, stream=True, timeout=TIMEOUT
+        ) as response:
+            if response.status_code >= 500:
+                raise _ServerError(f"{response.status_code} for url: {self.url}")
+            response.raise_for_status()
+
+            skip = 0
+            if not self._received:
+                self._start(response)
+            elif response.status_code != 206:
+                if self._validator:
+                    raise requests.RequestException(
+                        f"Resource changed while resuming download: {self.url}"
+                    )
+                # Сервер не поддерживает Range: пропускаем уже полученное
+                skip = self._received
+
+            for chunk in response.raw.stream(DOWNLOAD_CHUNK_SIZE, decode_content=False):
+                if skip:
+                    dropped = min(skip, len(chunk))
+                    chunk, skip = chunk[dropped:], skip - dropped
+                    if not chunk:
+                        continue
+                self._received += len(chunk)
+                if self._content_decoder is not None:
+                    # Кусок заголовка gzip распаковывается в пустые байты
+                    chunk = self._content_decoder.decompress(chunk)
+                    if not chunk:
+                        continue
+                yield chunk
+
+    def _start(self, response: requests.Response) -> None:
+        self.encoding = response.encoding or TEXT_ENCODING
+        self._validator = response.headers.get("ETag") or response.headers.get(
+            "Last-Modified"
+        )
+        if response.headers.get("Content-Encoding", "").lower() == "gzip":
+            self._content_decoder = zlib.decompressobj(16 + zlib.MAX_WBITS)
@@ -1,6 +1,15 @@
+import sys
+
 from src.parser_process.initialize_cli import initialize_cli
 from src.databases.log_data import LogData
+from src.databases.quantiles import DDSketchQuantiles
+from src.databases.sketches import TopKCounter
+from src.databases.state_store import StateStore
+from src.databases.windowed_log_data import WindowedLogData
 from src.parser_process.log_processor import LogParserProcessor
+from src.parser_process.profiler import Profiler
+from src.renderer.log_data_repr import MACHINE_FORMATS
+from src.renderer.window_repr import render_windows
 from src.saver.saver import Saver
 
 
@@ -9,22 +18,154 @@ def main() -> None:
 
     args_from_cmd = parser.parse_args()
 
+    counters = {}
+    if args_from_cmd.top_k is not None:
+        counters = {
+            "sources_statistics": TopKCounter(
+                args_from_cmd.top_k, args_from_cmd.top_k_capacity
+            ),
+            "ip_statistics": TopKCounter(
+                args_from_cmd.top_k, args_from_cmd.top_k_capacity
+            ),
+        }
+
     log_data = LogData(
         from_date=args_from_cmd.from_date,
         to_date=args_from_cmd.to_date,
         repr_format=args_from_cmd.format,
+        size_sketch=(
+            DDSketchQuantiles(args_from_cmd.sketch_accuracy)
+            if args_from_cmd.quantiles == "sketch"
+            else None
+        ),
+        percentiles=args_from_cmd.percentiles,
+        **counters,
     )
 
-    log_parser_processor = LogParserProcessor(
-        log_data, args_from_cmd.filter_field, args_from_cmd.filter_value
-    )
+    state_store = StateStore.load(args_from_cmd.state) if args_from_cmd.state else None
+
+    profiler = None
+    if (
+        args_from_cmd.profile
+        or args_from_cmd.profile_json
+        or args_from_cmd.profile_dump
+    ):
+        if (
+            args_from_cmd.follow
+            or args_from_cmd.build_time_index
+            or args_from_cmd.export_columns
+            or args_from_cmd.export_rollups
+        ):
+            parser.error("--profile is supported only when building a report")
+        profiler = Profiler(args_from_cmd.profile_dump)
+
+    # Режимы обработки, из которых выполнился бы только один
+    if args_from_cmd.state and args_from_cmd.time_index:
+        parser.error("--state cannot be combined with --time-index")
+    if args_from_cmd.pipeline and (args_from_cmd.state or args_from_cmd.time_index):
+        parser.error("--pipeline cannot be combined with --state or --time-index")
+
+    if args_from_cmd.sample is not None and (
+        args_from_cmd.follow
+        or args_from_cmd.state
+        or args_from_cmd.build_time_index
+        or args_from_cmd.export_columns
+        or args_from_cmd.export_rollups
+    ):
+        parser.error("--sample is supported only when building a report")
+    if args_from_cmd.sample is not None and (
+        args_from_cmd.time_index or args_from_cmd.pipeline
+    ):
+        parser.error("--sample cannot be combined with --time-index or --pipeline")
+
+    try:
+        log_parser_processor = LogParserProcessor(
+            log_data,
+            args_from_cmd.filter_field,
+            args_from_cmd.filter_value,
+            workers=args_from_cmd.workers,
+            reader=args_from_cmd.reader,
+            fetch_workers=args_from_cmd.fetch_workers,
+            filter_expression=args_from_cmd.filter_expression,
+            engine=args_from_cmd.engine,
+            time_index=args_from_cmd.time_index,
+            pipeline=args_from_cmd.pipeline,
+            batch_size=args_from_cmd.batch_size,
+            queue_size=args_from_cmd.queue_size,
+            exclude=args_from_cmd.exclude,
+            order=args_from_cmd.order,
+            sample=args_from_cmd.sample,
+            sample_seed=args_from_cmd.sample_seed,
+            state_store=state_store,
+            profiler=profiler,
+        )
+    except ValueError as error:
+        # Ошибка в выражении фильтра или неизвестное поле
+        parser.error(str(error))
+
+    if args_from_cmd.follow:
+        if args_from_cmd.format in MACHINE_FORMATS:
+            parser.error("--follow supports only markdown and adoc formats")
+        try:
+            log_parser_processor.follow(
+                args_from_cmd.path,
+                WindowedLogData(log_data, args_from_cmd.windows),
+                render=lambda reports: print(
+                    render_windows(reports, args_from_cmd.format), flush=True
+                ),
+                refresh_interval=args_from_cmd.refresh,
+                poll_interval=min(args_from_cmd.refresh, 1.0),
+            )
+        except KeyboardInterrupt:
+            pass
+        return
+
+    if args_from_cmd.build_time_index:
+        files = log_parser_processor.build_time_index(args_from_cmd.path)
+        print(f"Построено индексов времени: {len(files)}")
+        return
+
+    if args_from_cmd.export_columns:
+        rows = log_parser_processor.export_columns(
+            args_from_cmd.path, args_from_cmd.export_columns
+        )
+        print(f"Записано строк: {rows} в {args_from_cmd.export_columns}")
+        return
 
-    log_parser_processor.process(args_from_cmd.path)
+    if args_from_cmd.export_rollups:
+        try:
+            requests_count = log_parser_processor.export_rollups(
+                args_from_cmd.path, args_from_cmd.export_rollups
+            )
+        except ValueError as error:
+            # База записана с другими настройками подсчета
+            parser.error(str(error))
+        print(f"Записано запросов: {requests_count} в {args_from_cmd.export_rollups}")
+        return
 
-    saver = Saver(log_data)
-    saver.save("src/output/out")
+    if profiler is not None:
+        profiler.start()
+    try:
+        log_parser_processor.process(args_from_cmd.path)
+    except ValueError as error:
+        # Хранилище или база агрегатов другой версии или с другими настройками
+        parser.error(str(error))
+    if state_store is not None:
+        state_store.save()
 
-    print(log_data)
+    # Отчет строится один раз и пишется сразу в файл и на экран
+    saver = Saver(log_data, top=args_from_cmd.top)
+    if profiler is None:
+        saver.save("src/output/out", echo=sys.stdout)
+        return
+    with profiler.stage("render"):
+        saver.save("src/output/out", echo=sys.stdout)
+    profiler.stop()
+    profiler.measure_memory(log_data)
+    # Профиль в stderr, чтобы не смешивать его с отчетом
+    print(profiler.render_table(), file=sys.stderr)
+    if args_from_cmd.profile_json:
+        profiler.save(args_from_cmd.profile_json)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,128 @@
+from collections import Counter
+from collections.abc import Callable, Iterable, Iterator, Sequence
+from itertools import compress, islice
+from operator import itemgetter
+
+import numpy as np
+
+from src.databases.log_data import LogData
+
+# Количество строк в одной пачке колоночного режима
+BATCH_SIZE = 1 << 16
+
+
+def encode(column: Sequence[str]) -> tuple[list[str], np.ndarray]:
+    """
+    Словарное кодирование колонки: различные значения в порядке первого
+    появления и id значения для каждой строки
+    """
+    index = {value: position for position, value in enumerate(dict.fromkeys(column))}
+    ids = np.fromiter(map(index.__getitem__, column), dtype=np.intp, count=len(column))
+    return list(index), ids
+
+
+class ColumnBatch:
+    """
+    Пачка разобранных строк по колонкам
+
+    Строковые колонки - списки значений в порядке строк. Числовые
+    колонки строятся по запросу: статусы (uint16) и время (int64, секунды
+    Unix-времени) через словарное кодирование, так что преобразуется только
+    каждое различное значение, размеры ответов (uint64) - целиком.
+    Готовые числовые колонки (например, из ColumnStore) передаются в arrays.
+    """
+
+    def __init__(
+        self,
+        columns: dict[str, Sequence[str]],
+        size: int,
+        arrays: dict[str, np.ndarray] | None = None,
+    ):
+        self.columns: dict[str, Sequence[str]] = columns
+        self.size: int = size
+        self.arrays: dict[str, np.ndarray] = {} if arrays is None else arrays
+
+    @classmethod
+    def from_rows(
+        cls, rows: Sequence[tuple[str, ...]], fields: Sequence[str]
+    ) -> "ColumnBatch":
+        """Колонки из кортежей значений в порядке fields (см. LineParser)"""
+        columns = {
+            field: list(map(itemgetter(position), rows))
+            for position, field in enumerate(fields)
+        }
+        return cls(columns, len(rows))
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __getitem__(self, field: str) -> Sequence[str]:
+        return self.columns[field]
+
+    def statuses(self) -> np.ndarray:
+        if "status" in self.arrays:
+            return self.arrays["status"]
+        codes, ids = encode(self["status"])
+        return np.array(list(map(int, codes)), dtype=np.uint16)[ids]
+
+    def sizes(self) -> np.ndarray:
+        if "body_bytes_sent" in self.arrays:
+            return self.arrays["body_bytes_sent"]
+        return np.fromiter(map(int, self["body_bytes_sent"]), np.uint64, self.size)
+
+    def timestamps(self, decode: Callable[[str], int]) -> np.ndarray:
+        times, ids = encode(self["time_local"])
+        return np.array(list(map(decode, times)), dtype=np.int64)[ids]
+
+    def counts(self, field: str) -> Iterable[tuple[str, int]]:
+        """Количество строк по значениям поля в порядке первого появления"""
+        return Counter(self[field]).items()
+
+    def values_where(self, field: str, mask: np.ndarray) -> list[str]:
+        """Значения поля в строках mask (могут повторяться)"""
+        return list(compress(self[field], mask.tolist()))
+
+    def select(self, mask: np.ndarray) -> "ColumnBatch":
+        """Строки, для которых mask истинна"""
+        selectors = mask.tolist()
+        columns = {
+            field: list(compress(column, selectors))
+            for field, column in self.columns.items()
+        }
+        return ColumnBatch(columns, int(np.count_nonzero(mask)))
+
+
+def iter_batches(
+    lines: Iterable, parse_batch: Callable, batch_size: int = BATCH_SIZE
+) -> Iterator[list[tuple[str, ...]]]:
+    """Строки пачками по batch_size, разобранные parse_batch (см. LineParser)"""
+    lines = iter(lines)
+    while chunk := list(islice(lines, batch_size)):
+        yield parse_batch(chunk)
+
+
+def add_batch(log_data: LogData, batch) -> None:
+    """
+    Добавляет пачку в статистику: счетчики по колонкам, ресурсы с ошибками
+    по маске статусов, размеры ответов массивом. Новые ключи добавляются
+    в порядке первого появления, как при построчном подсчете. batch -
+    ColumnBatch или часть колоночного хранилища (ColumnPart)
+    """
+    if not len(batch):
+        return
+    log_data.total_requests_cnt += len(batch)
+    for counter, field in (
+        (log_data.sources_statistics, "source"),
+        (log_data.response_codes_statistics, "status"),
+        (log_data.request_types, "method"),
+        (log_data.ip_statistics, "remote_addr"),
+    ):
+        for key, count in batch.counts(field):
+            counter[key] += count
+
+    statuses = batch.statuses()
+    errors = (statuses >= 400) & (statuses < 600)
+    if errors.any():
+        log_data.error_urls.update(batch.values_where("source", errors))
+
+    log_data.size_quantiles.add_many(batch.sizes())
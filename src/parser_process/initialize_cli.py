@@ -1,4 +1,8 @@
-from argparse import ArgumentParser
+import os
+from argparse import ArgumentParser, ArgumentTypeError
+
+from src.iterators.file_discovery import FILE_ORDERS
+from src.parser_process.pipeline import PIPELINE_BATCH_SIZE, PIPELINE_QUEUE_SIZE
 
 
 def initialize_cli() -> ArgumentParser:
@@ -10,9 +14,32 @@ def initialize_cli() -> ArgumentParser:
         "--path",
         type=str,
         metavar="DIRECTORY/URL",
-        help="Путь к директории/url с файлами логов",
+        help="Путь к директории/url с файлами логов, @файл со списком url, "
+        "каталог колоночного хранилища (--export-columns) или база "
+        "почасовых агрегатов (--export-rollups). Локальный путь - шаблон "
+        "(** - любые подкаталоги), каталог - все файлы в нем и в его "
+        "подкаталогах, несколько шаблонов через "
+        f"{os.pathsep!r}",
         required=True,
     )
+    cli_parser.add_argument(
+        "--exclude",
+        type=str,
+        action="append",
+        default=[],
+        metavar="PATTERN",
+        help="Не читать файлы и каталоги по шаблону: без / - по имени, "
+        "с / - по всему пути. Можно указать несколько раз",
+    )
+    cli_parser.add_argument(
+        "--order",
+        choices=FILE_ORDERS,
+        type=str.lower,
+        metavar="ORDER",
+        default="name",
+        help="Порядок локальных файлов: name (по путям, по умолчанию) или "
+        "mtime (по времени изменения)",
+    )
     cli_parser.add_argument(
         "--from",
         type=str,
@@ -29,18 +56,26 @@ def initialize_cli() -> ArgumentParser:
     )
     cli_parser.add_argument(
         "--format",
-        choices=["markdown", "adoc"],
+        choices=["markdown", "adoc", "json", "ndjson", "csv"],
         type=str.lower,
         metavar="FORMAT",
         default="markdown",
-        help="Формат отображения статистики (markdown или adoc)",
+        help="Формат отображения статистики: markdown, adoc или машиночитаемые "
+        "json (один документ), ndjson (запись на строку статистики) и csv",
+    )
+
+    cli_parser.add_argument(
+        "--top",
+        type=positive_int,
+        metavar="N",
+        help="Выводить не больше N самых частых строк в каждой секции отчета",
     )
 
     cli_parser.add_argument(
         "--filter-field",
         type=str,
         metavar="FIELD",
-        help="Поле для фильтрации (например, agent, method)",
+        help="Поле для фильтрации (например, method, status, http_user_agent)",
     )
     cli_parser.add_argument(
         "--filter-value",
@@ -48,5 +83,261 @@ def initialize_cli() -> ArgumentParser:
         metavar="VALUE",
         help="Значение для фильтрации (например, Mozilla*, GET)",
     )
+    cli_parser.add_argument(
+        "--filter",
+        type=str,
+        metavar="EXPR",
+        dest="filter_expression",
+        help='Выражение фильтра, например: status >= 500 AND NOT source like "/static/*"',
+    )
+    cli_parser.add_argument(
+        "--workers",
+        type=positive_int,
+        metavar="N",
+        default=1,
+        help="Количество процессов для обработки локальных файлов (по умолчанию 1)",
+    )
+    cli_parser.add_argument(
+        "--fetch-workers",
+        type=positive_int,
+        metavar="N",
+        default=4,
+        help="Количество одновременных загрузок для списка url (по умолчанию 4)",
+    )
+    cli_parser.add_argument(
+        "--reader",
+        choices=["text", "mmap"],
+        type=str.lower,
+        metavar="MODE",
+        default="text",
+        help="Чтение локальных файлов: text (по умолчанию) или mmap "
+        "(отображение в память, строки разбираются как байты)",
+    )
+    cli_parser.add_argument(
+        "--engine",
+        choices=["rows", "columnar"],
+        type=str.lower,
+        metavar="MODE",
+        default="rows",
+        help="Подсчет статистики: rows (построчно, по умолчанию) или columnar "
+        "(пачками строк по колонкам с векторными операциями NumPy)",
+    )
+    cli_parser.add_argument(
+        "--pipeline",
+        action="store_true",
+        help="Читать и распаковывать логи в фоновом потоке, пока считаются "
+        "прочитанные строки; с --workers пачки строк считаются в процессах",
+    )
+    cli_parser.add_argument(
+        "--batch-size",
+        type=positive_int,
+        metavar="N",
+        default=PIPELINE_BATCH_SIZE,
+        help=f"Строк в пачке для --pipeline (по умолчанию {PIPELINE_BATCH_SIZE})",
+    )
+    cli_parser.add_argument(
+        "--queue-size",
+        type=positive_int,
+        metavar="N",
+        default=PIPELINE_QUEUE_SIZE,
+        help="Сколько прочитанных пачек может ждать подсчета в режиме --pipeline "
+        f"(по умолчанию {PIPELINE_QUEUE_SIZE})",
+    )
+    cli_parser.add_argument(
+        "--sample",
+        type=sample_fraction,
+        metavar="FRACTION",
+        help="Приближенный отчет по доле логов FRACTION (например 0.01): "
+        "читаются блоки, равномерно выбранные по файлам и времени, счетчики "
+        "пересчитываются на все логи, для общего количества, долей кодов "
+        "ответа, среднего и перцентилей выводятся 95%% доверительные интервалы",
+    )
+    cli_parser.add_argument(
+        "--sample-seed",
+        type=int,
+        metavar="SEED",
+        default=0,
+        help="Зерно выбора блоков для --sample: с тем же зерном выбираются "
+        "те же блоки (по умолчанию 0)",
+    )
+    cli_parser.add_argument(
+        "--time-index",
+        action="store_true",
+        help="С --from/--to читать только нужные части файлов: по индексу "
+        "времени (--build-time-index) или двоичным поиском по времени строк "
+        "(для логов, упорядоченных по времени с точностью до 5 минут)",
+    )
+    cli_parser.add_argument(
+        "--build-time-index",
+        action="store_true",
+        help="Построить индексы времени (файл .tidx рядом с каждым логом) "
+        "вместо вывода статистики",
+    )
+    cli_parser.add_argument(
+        "--export-rollups",
+        metavar="DB",
+        help="Добавить почасовую статистику в базу SQLite вместо вывода "
+        "статистики; отчет по базе - --path DB",
+    )
+    cli_parser.add_argument(
+        "--export-columns",
+        type=str,
+        metavar="DIRECTORY",
+        help="Дописать разобранные строки в колоночное хранилище (разделы по "
+        "дням) вместо вывода статистики; затем каталог можно указать в --path",
+    )
+    cli_parser.add_argument(
+        "--state",
+        type=str,
+        metavar="PATH",
+        help="Файл состояния для инкрементального анализа: при повторном запуске "
+        "разбираются только новые файлы и дописанные строки",
+    )
+    cli_parser.add_argument(
+        "--quantiles",
+        choices=["exact", "sketch"],
+        type=str.lower,
+        metavar="MODE",
+        default="exact",
+        help="Расчет перцентилей размера ответа: exact (точно, хранит все размеры) "
+        "или sketch (приближенно, ограниченная память)",
+    )
+    cli_parser.add_argument(
+        "--sketch-accuracy",
+        type=sketch_accuracy,
+        metavar="ACCURACY",
+        default=0.01,
+        help="Относительная точность перцентилей в режиме sketch (по умолчанию 0.01)",
+    )
+    cli_parser.add_argument(
+        "--percentiles",
+        type=percentile_list,
+        metavar="P1,P2,...",
+        default=(95,),
+        help="Перцентили размера ответа через запятую (по умолчанию 95)",
+    )
+    cli_parser.add_argument(
+        "--top-k",
+        type=positive_int,
+        metavar="K",
+        help="Считать только K самых частых ресурсов и IP-адресов "
+        "(ограниченная память, оценка количества уникальных)",
+    )
+    cli_parser.add_argument(
+        "--top-k-capacity",
+        type=positive_int,
+        metavar="N",
+        help="Сколько ключей хранить в режиме --top-k (по умолчанию 10*K); "
+        "чем больше, тем меньше погрешность счетчиков",
+    )
+    cli_parser.add_argument(
+        "--follow",
+        action="store_true",
+        help="Следить за дописываемыми файлами (как tail -F) и периодически "
+        "выводить статистику по скользящим окнам времени",
+    )
+    cli_parser.add_argument(
+        "--windows",
+        type=duration_list,
+        metavar="D1,D2,...",
+        default=(60, 300, 3600),
+        help="Окна для --follow через запятую, например 1m,5m,1h (по умолчанию)",
+    )
+    cli_parser.add_argument(
+        "--refresh",
+        type=positive_float,
+        metavar="SECONDS",
+        default=5.0,
+        help="Интервал обновления отчета в режиме --follow (по умолчанию 5 секунд)",
+    )
+    cli_parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Вывести в stderr время этапов обработки, счетчики строк и память",
+    )
+    cli_parser.add_argument(
+        "--profile-json",
+        metavar="FILE",
+        help="Сохранить профиль (--profile) в JSON",
+    )
+    cli_parser.add_argument(
+        "--profile-dump",
+        metavar="FILE",
+        help="Сохранить статистику cProfile за время обработки (формат pstats)",
+    )
 
     return cli_parser
+
+
+def positive_int(value: str) -> int:
+    """Тип аргумента: целое число больше нуля"""
+    try:
+        number = int(value)
+    except ValueError:
+        number = 0
+    if number < 1:
+        raise ArgumentTypeError(f"ожидается целое число больше нуля: {value!r}")
+    return number
+
+
+def positive_float(value: str) -> float:
+    """Тип аргумента: число больше нуля"""
+    try:
+        number = float(value)
+    except ValueError:
+        number = 0.0
+    if not number > 0 or number == float("inf"):
+        raise ArgumentTypeError(f"ожидается число больше нуля: {value!r}")
+    return number
+
+
+def sample_fraction(value: str) -> float:
+    """Тип аргумента: доля логов больше 0 и не больше 1"""
+    try:
+        fraction = float(value)
+    except ValueError:
+        fraction = 0.0
+    if not 0 < fraction <= 1:
+        raise ArgumentTypeError(f"ожидается число больше 0 и не больше 1: {value!r}")
+    return fraction
+
+
+def sketch_accuracy(value: str) -> float:
+    """Тип аргумента: относительная точность скетча больше 0 и меньше 1"""
+    try:
+        accuracy = float(value)
+    except ValueError:
+        accuracy = 0.0
+    if not 0 < accuracy < 1:
+        raise ArgumentTypeError(f"ожидается число больше 0 и меньше 1: {value!r}")
+    return accuracy
+
+
+# Множители единиц длительности: 30s, 5m, 1h, 1d
+_DURATION_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+
+def duration_list(value: str) -> tuple[int, ...]:
+    """Тип аргумента: длительности через запятую, например 1m,5m,1h (в секундах)"""
+    durations = []
+    for item in value.split(","):
+        item = item.strip().lower()
+        unit = _DURATION_UNITS.get(item[-1:], None)
+        number = item[:-1] if unit else item
+        if not number.isdigit() or int(number) == 0:
+            raise ArgumentTypeError(
+                f"ожидаются длительности через запятую, например 1m,5m,1h: {value!r}"
+            )
+        durations.append(int(number) * (unit or 1))
+    return tuple(durations)
+
+
+def percentile_list(value: str) -> tuple[float, ...]:
+    """Тип аргумента: список перцентилей через запятую, например 50,90,99.9"""
+    try:
+        percentiles = tuple(float(item) for item in value.split(","))
+    except ValueError:
+        percentiles = ()
+    if not percentiles or not all(0 <= p <= 100 for p in percentiles):
+        raise ArgumentTypeError(f"ожидаются числа от 0 до 100 через запятую: {value!r}")
+    return percentiles
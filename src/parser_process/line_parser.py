@@ -0,0 +1,135 @@
+import re
+from collections.abc import Iterable, Sequence
+
+from src.iterators.file_range import TEXT_ENCODING
+
+# Части регулярного выражения строки лога: (поле, шаблон поля, разделитель после поля)
+_LOG_PATTERN_PARTS: tuple[tuple[str, str, str], ...] = (
+    ("remote_addr", r"\S+", r" - "),  # IP адрес
+    ("remote_user", r"\S*", r" \["),  # Пользователь (или "-")
+    ("time_local", r"[^\]]+", r'\] "'),  # Время
+    ("method", r"\S+", r" "),  # Запрос: метод
+    ("source", r"\S+", r" "),  # Запрос: источник
+    ("protocol", r"\S+", r'" '),  # Запрос: протокол
+    ("status", r"\d{3}", r" "),  # Статус ответа
+    ("body_bytes_sent", r"\d+", r' "'),  # Количество байт
+    ("http_referer", r'[^"]*', r'" "'),  # Реферер
+    ("http_user_agent", r'[^"]*', r'"'),  # User-Agent
+)
+
+# Все поля строки лога в порядке их следования
+LOG_FIELDS: tuple[str, ...] = tuple(name for name, _, _ in _LOG_PATTERN_PARTS)
+
+# Текст строки вокруг значения поля: (перед полем, после поля), None - начало
+# строки. Разделители в _LOG_PATTERN_PARTS экранированы только обратной чертой
+FIELD_DELIMITERS: dict[str, tuple[str | None, str]] = {
+    name: (
+        previous[2].replace("\\", "") if previous else None,
+        separator.replace("\\", ""),
+    )
+    for previous, (name, _, separator) in zip(
+        (None, *_LOG_PATTERN_PARTS), _LOG_PATTERN_PARTS
+    )
+}
+
+
+def build_log_pattern(fields: Iterable[str] = LOG_FIELDS) -> re.Pattern[str]:
+    """
+    Собирает регулярное выражение строки лога, в котором именованные группы
+    есть только у перечисленных полей. Остальные поля проверяются тем же
+    шаблоном, но не захватываются.
+    """
+    captured = set(fields)
+    return re.compile(
+        "".join(
+            (
+                f"(?P<{name}>{pattern}){separator}"
+                if name in captured
+                else f"{pattern}{separator}"
+            )
+            for name, pattern, separator in _LOG_PATTERN_PARTS
+        )
+    )
+
+
+def build_prefix_pattern(last_field: str) -> re.Pattern[str]:
+    """
+    Начало шаблона строки лога до поля last_field и разделителя после
+    него; захватывается только last_field
+    """
+    parts = []
+    for name, pattern, separator in _LOG_PATTERN_PARTS:
+        if name == last_field:
+            parts.append(f"(?P<{name}>{pattern}){separator}")
+            break
+        parts.append(f"{pattern}{separator}")
+    return re.compile("".join(parts))
+
+
+# Регулярное выражение для разбора строк логов со всеми полями
+LOG_PATTERN: re.Pattern[str] = build_log_pattern()
+
+
+class LineParser:
+    """
+    Разбирает строки лога NGINX в формате combined
+
+    Регулярное выражение компилируется один раз при создании парсера и
+    захватывает только запрошенные поля. Значения возвращаются кортежем
+    в порядке self.fields (порядок следования полей в строке лога).
+    """
+
+    def __init__(self, fields: Iterable[str] = LOG_FIELDS):
+        requested = set(fields)
+        unknown = requested.difference(LOG_FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown log fields: {', '.join(sorted(unknown))}")
+        if not requested:
+            raise ValueError("At least one log field is required")
+
+        self.fields: tuple[str, ...] = tuple(f for f in LOG_FIELDS if f in requested)
+        self._match = build_log_pattern(self.fields).match
+
+    def index(self, field_name: str) -> int:
+        """Позиция поля в кортеже, который возвращает parse_values"""
+        return self.fields.index(field_name)
+
+    def parse_values(self, line: str) -> tuple[str, ...] | None:
+        match = self._match(line)
+        if match is not None:
+            return match.groups()
+        return None
+
+    def parse_values_bytes(self, line: bytes) -> tuple[str, ...] | None:
+        """
+        parse_values для строки в байтах (см. iter_mmap_lines). Строка из
+        ASCII декодируется целиком одним вызовом, это быстрее, чем
+        декодировать каждое поле отдельно; остальные строки декодируются
+        как при текстовом чтении и очищаются от пробелов Unicode
+        """
+        if line.isascii():
+            match = self._match(line.decode("ascii"))
+        else:
+            match = self._match(line.decode(TEXT_ENCODING).strip())
+        if match is not None:
+            return match.groups()
+        return None
+
+    def parse_batch(self, lines: Sequence[str]) -> list[tuple[str, ...]]:
+        """
+        parse_values для пачки строк без вызова Python-функции на строку:
+        сопоставление, отбор и извлечение групп идут в map и filter.
+        Неразобранные строки пропускаются
+        """
+        return list(map(re.Match.groups, filter(None, map(self._match, lines))))
+
+    def parse_batch_bytes(self, lines: Sequence[bytes]) -> list[tuple[str, ...]]:
+        """parse_batch для строк в байтах: пачка декодируется одним вызовом"""
+        text = b"\n".join(lines).decode(TEXT_ENCODING)
+        return self.parse_batch(list(map(str.strip, text.split("\n"))))
+
+    def parse(self, line: str) -> dict[str, str] | None:
+        match = self._match(line)
+        if match is not None:
+            return match.groupdict()
+        return None
@@ -0,0 +1,189 @@
+"""
+Проверки сырой строки лога до разбора регулярным выражением
+
+Проверка - необходимое условие: она отклоняет только строки, которые
+после разбора все равно не прошли бы фильтр или --from/--to (или не
+разобрались бы вовсе), поэтому статистика не меняется. Если по сырой
+строке ничего нельзя сказать, строка пропускается к полному разбору.
+Проверки строятся для текстовых строк или для байтовых (binary=True,
+строки iter_mmap_lines).
+"""
+
+import re
+from collections.abc import Callable, Iterable, Iterator, Sequence
+from itertools import chain, islice
+
+from src.iterators.file_range import TEXT_ENCODING
+from src.parser_process.line_parser import FIELD_DELIMITERS, build_prefix_pattern
+
+# Проверка сырой строки: False - строка точно не пройдет фильтр
+LineCheck = Callable[[str | bytes], bool]
+
+# Байтовые строки проверяются по ASCII-подстрокам, это верно только для
+# кодировок, совместимых с ASCII
+_ASCII_COMPATIBLE: bool = ' -[]"'.encode(TEXT_ENCODING) == b' -[]"'
+
+# Строк в пачке prefilter_lines и строк, на которых пробуется проверка
+PREFILTER_CHUNK_SIZE = 1 << 16
+PREFILTER_PROBE_SIZE = 1024
+# Проверка применяется к пачке, если отклоняет хотя бы такую долю строк пробы
+MIN_REJECTED_SHARE = 0.25
+# Сколько значений времени помнит проверка time_between
+KNOWN_TIMES_LIMIT = 100_000
+
+
+def _literal(text: str, binary: bool) -> str | bytes | None:
+    """text для сравнения со строками нужного типа, None - сравнить нельзя"""
+    if not binary:
+        return text
+    if not _ASCII_COMPATIBLE or not text.isascii():
+        return None
+    return text.encode("ascii")
+
+
+def field_needles(
+    field: str, fragments: Sequence[str], anchored_start: bool, anchored_end: bool
+) -> list[str]:
+    """
+    Подстроки строки лога, если значение поля содержит fragments по порядку:
+    anchored_start - значение начинается с первого фрагмента, anchored_end -
+    заканчивается последним, тогда к ним добавляется текст вокруг поля
+    """
+    before, after = FIELD_DELIMITERS[field]
+    needles = list(fragments)
+    if anchored_start and before is not None:
+        needles[0] = before + needles[0]
+    if anchored_end:
+        needles[-1] += after
+    return [needle for needle in needles if needle]
+
+
+def contains_all(needles: Iterable[str], binary: bool) -> LineCheck | None:
+    """Строка содержит все подстроки needles"""
+    literals = [_literal(needle, binary) for needle in needles]
+    if not literals or None in literals:
+        return None
+    if len(literals) == 1:
+        needle = literals[0]
+        return lambda line: needle in line
+    return lambda line: all(needle in line for needle in literals)
+
+
+def status_in(codes: Iterable[str], binary: bool) -> LineCheck | None:
+    """
+    Статус ответа из codes. Статус идет после '" ' (конца запроса), но
+    '" ' может встретиться и раньше, поэтому проверяются все вхождения
+    """
+    quote, space = _literal('" ', binary), _literal(" ", binary)
+    allowed = {_literal(code, binary) for code in codes}
+    if quote is None or None in allowed:
+        return None
+
+    def check(line: str | bytes) -> bool:
+        position = line.find(quote)
+        while position != -1:
+            if (
+                line[position + 2 : position + 5] in allowed
+                and line[position + 5 : position + 6] == space
+            ):
+                return True
+            position = line.find(quote, position + 2)
+        return False
+
+    return check
+
+
+def time_between(
+    start_ts: float, end_ts: float, decode: Callable[[str], int], binary: bool
+) -> LineCheck | None:
+    """
+    Время запроса в [start_ts, end_ts]. time_local берется шаблоном начала
+    строки (адрес, пользователь, время): если он не совпал, не совпадет и
+    полный шаблон. Результат запоминается для каждого значения времени
+    """
+    pattern = build_prefix_pattern("time_local")
+    if binary:
+        if not _ASCII_COMPATIBLE:
+            return None
+        # Для строк из ASCII \S в байтовом шаблоне означает то же самое
+        pattern = re.compile(pattern.pattern.encode("ascii"))
+    match = pattern.match
+    known: dict[str | bytes, bool] = {}
+
+    def check(line: str | bytes) -> bool:
+        if binary and not line.isascii():
+            return True
+        found = match(line)
+        if found is None:
+            return False
+        time_local = found[1]
+        inside = known.get(time_local)
+        if inside is None:
+            try:
+                timestamp = decode(time_local.decode("ascii") if binary else time_local)
+            except ValueError:
+                # Строку с непонятным временем оценит полный разбор
+                return True
+            if len(known) >= KNOWN_TIMES_LIMIT:
+                known.clear()
+            inside = known[time_local] = start_ts <= timestamp <= end_ts
+        return inside
+
+    return check
+
+
+def prefilter_lines(
+    lines: Iterable[str | bytes],
+    check: LineCheck,
+    chunk_size: int = PREFILTER_CHUNK_SIZE,
+) -> Iterator[str | bytes]:
+    """
+    Строки lines, прошедшие check. Проверка окупается, только если
+    отклоняет заметную долю строк: она пробуется на начале каждой пачки и
+    для пачки, где отклоняет меньше MIN_REJECTED_SHARE, не применяется
+    (строки проверит полный разбор, результат тот же)
+    """
+    return chain.from_iterable(_prefiltered_chunks(iter(lines), check, chunk_size))
+
+
+def _prefiltered_chunks(
+    lines: Iterator[str | bytes], check: LineCheck, chunk_size: int
+) -> Iterator[Iterable[str | bytes]]:
+    while chunk := list(islice(lines, chunk_size)):
+        probe_size = min(len(chunk), PREFILTER_PROBE_SIZE)
+        probe = list(filter(check, chunk[:probe_size]))
+        if probe_size - len(probe) < MIN_REJECTED_SHARE * probe_size:
+            yield chunk
+        else:
+            yield probe
+            yield filter(check, islice(chunk, probe_size, None))
+
+
+def all_of(checks: Iterable[LineCheck | None]) -> LineCheck | None:
+    """Все проверки (отсутствующие не учитываются)"""
+    present = [check for check in checks if check is not None]
+    if len(present) > 1:
+        first, *rest = present
+        for following in rest:
+            first = _and(first, following)
+        return first
+    return present[0] if present else None
+
+
+def any_of(checks: Iterable[LineCheck | None]) -> LineCheck | None:
+    """Хотя бы одна проверка; если для одной из веток проверки нет - None"""
+    checks = list(checks)
+    if not checks or None in checks:
+        return None
+    first, *rest = checks
+    for following in rest:
+        first = _or(first, following)
+    return first
+
+
+def _and(first: LineCheck, second: LineCheck) -> LineCheck:
+    return lambda line: first(line) and second(line)
+
+
+def _or(first: LineCheck, second: LineCheck) -> LineCheck:
+    return lambda line: first(line) or second(line)
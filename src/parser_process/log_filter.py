@@ -0,0 +1,512 @@
+import ipaddress
+import math
+import re
+from abc import ABC, abstractmethod
+from collections.abc import Callable, Sequence
+from fnmatch import translate
+from functools import cache
+
+from src.parser_process.line_prefilter import (
+    LineCheck,
+    all_of,
+    any_of,
+    contains_all,
+    field_needles,
+    status_in,
+)
+
+# Поля, для которых доступны числовые сравнения и диапазоны
+NUMERIC_FIELDS: tuple[str, ...] = ("status", "body_bytes_sent")
+# Поля, которые сравниваются с подсетью: remote_addr in 10.0.0.0/8
+ADDRESS_FIELDS: tuple[str, ...] = ("remote_addr",)
+
+# Скомпилированное условие: принимает значения полей строки, возвращает bool
+Predicate = Callable[[Sequence[str | None]], bool]
+
+
+class FilterNode(ABC):
+    """
+    Узел дерева фильтра
+
+    Дерево строится один раз, compile собирает из него функцию-условие для
+    кортежа значений полей. Поле ищется в кортеже по позиции из index.
+    cost - примерная стоимость проверки: в AND/OR дешевые условия
+    проверяются первыми, поэтому дорогие часто не вычисляются.
+    """
+
+    cost: int = 1
+
+    @abstractmethod
+    def fields(self) -> set[str]:
+        """Поля строки лога, которые нужны условию"""
+
+    @abstractmethod
+    def compile(self, index: Callable[[str], int]) -> Predicate:
+        pass
+
+    @abstractmethod
+    def __str__(self) -> str:
+        """Выражение фильтра в каноническом виде"""
+
+    def line_check(self, binary: bool = False) -> LineCheck | None:
+        """
+        Необходимое условие на сырую строку (см. line_prefilter), которое
+        проверяется до разбора; None - по сырой строке ничего не сказать
+        """
+        return None
+
+
+class _FieldNode(FilterNode):
+    """Условие на одно поле"""
+
+    op: str = ""
+
+    def __init__(self, field: str, value: str):
+        self.field: str = field
+        self.value: str = value
+
+    def fields(self) -> set[str]:
+        return {self.field}
+
+    def __str__(self) -> str:
+        return f"{self.field} {self.op} {_quote(self.value)}"
+
+
+class Equals(_FieldNode):
+    op = "="
+    cost = 1
+
+    def compile(self, index: Callable[[str], int]) -> Predicate:
+        position, value = index(self.field), self.value
+        return lambda values: values[position] == value
+
+    def line_check(self, binary: bool = False) -> LineCheck | None:
+        return contains_all(field_needles(self.field, [self.value], True, True), binary)
+
+
+class Glob(_FieldNode):
+    """Шаблон fnmatch: *, ?, [abc], с учетом регистра"""
+
+    op = "like"
+    cost = 3
+
+    def compile(self, index: Callable[[str], int]) -> Predicate:
+        position, match = index(self.field), _compile_glob(self.value)
+        return lambda values: (
+            (value := values[position]) is not None and match(value) is not None
+        )
+
+    def line_check(self, binary: bool = False) -> LineCheck | None:
+        # Буквальные части шаблона; класс символов [...] и все после него
+        # не разбираются и считаются произвольным текстом
+        literal_part, bracket, _ = self.value.partition("[")
+        fragments = re.split(r"[*?]+", literal_part)
+        needles = field_needles(
+            self.field,
+            fragments,
+            anchored_start=bool(fragments[0]),
+            anchored_end=not bracket and bool(fragments[-1]),
+        )
+        return contains_all(needles, binary)
+
+
+class Regex(_FieldNode):
+    """Регулярное выражение, ищется в любом месте значения"""
+
+    op = "~"
+    cost = 4
+
+    def __init__(self, field: str, value: str):
+        super().__init__(field, value)
+        # Ошибка в выражении обнаруживается при разборе фильтра
+        _compile_regex(value)
+
+    def compile(self, index: Callable[[str], int]) -> Predicate:
+        position, search = index(self.field), _compile_regex(self.value)
+        return lambda values: (
+            (value := values[position]) is not None and search(value) is not None
+        )
+
+
+class NumberRange(FilterNode):
+    """low <= поле <= high для числовых полей, границы включаются"""
+
+    cost = 2
+
+    def __init__(self, field: str, low: float = -math.inf, high: float = math.inf):
+        self.field: str = field
+        self.low: float = low
+        self.high: float = high
+
+    def fields(self) -> set[str]:
+        return {self.field}
+
+    def compile(self, index: Callable[[str], int]) -> Predicate:
+        position, low, high = index(self.field), self.low, self.high
+        return lambda values: (
+            (value := values[position]) is not None and low <= int(value) <= high
+        )
+
+    def line_check(self, binary: bool = False) -> LineCheck | None:
+        if self.field != "status" or (self.low <= 0 and self.high >= 999):
+            return None
+        # Статус - ровно три цифры, диапазон перечисляется строками
+        first = max(self.low, 0)
+        last = min(self.high, 999)
+        return status_in(
+            (f"{code:03}" for code in range(int(first), int(last) + 1)), binary
+        )
+
+    def __str__(self) -> str:
+        if self.low == -math.inf:
+            return f"{self.field} <= {self.high}"
+        if self.high == math.inf:
+            return f"{self.field} >= {self.low}"
+        return f"{self.field} in {self.low}..{self.high}"
+
+
+class Network(FilterNode):
+    """Адрес из подсети: remote_addr in 10.0.0.0/8 (IPv4 и IPv6)"""
+
+    cost = 3
+
+    def __init__(self, field: str, network: str):
+        self.field: str = field
+        self.network: ipaddress.IPv4Network | ipaddress.IPv6Network = (
+            ipaddress.ip_network(network, strict=False)
+        )
+
+    def fields(self) -> set[str]:
+        return {self.field}
+
+    def compile(self, index: Callable[[str], int]) -> Predicate:
+        position, network = index(self.field), self.network
+        if network.version == 6:
+
+            def matches_ipv6(values: Sequence[str | None]) -> bool:
+                # Имя хоста, "-" и IPv4-адрес в IPv6-подсеть не входят
+                address = _parse_address(values[position])
+                return (
+                    address is not None and address.version == 6 and address in network
+                )
+
+            return matches_ipv6
+
+        # IPv4 проверяется маской по числу адреса. IPv4Address принимает
+        # только четыре десятичных октета, в отличие от socket.inet_aton
+        prefix, mask = int(network.network_address), int(network.netmask)
+        to_address = ipaddress.IPv4Address
+
+        def matches(values: Sequence[str | None]) -> bool:
+            value = values[position]
+            if value is None:
+                return False
+            try:
+                address = int(to_address(value))
+            except ValueError:
+                return False
+            return address & mask == prefix
+
+        return matches
+
+    def __str__(self) -> str:
+        return f"{self.field} in {self.network}"
+
+
+class Not(FilterNode):
+    def __init__(self, child: FilterNode):
+        self.child: FilterNode = child
+        self.cost = child.cost
+
+    def fields(self) -> set[str]:
+        return self.child.fields()
+
+    def compile(self, index: Callable[[str], int]) -> Predicate:
+        predicate = self.child.compile(index)
+        return lambda values: not predicate(values)
+
+    def __str__(self) -> str:
+        return f"NOT {_group(self.child)}"
+
+
+class _Junction(FilterNode):
+    """AND/OR: дочерние условия упорядочены по стоимости"""
+
+    keyword: str = ""
+
+    def __init__(self, children: list[FilterNode]):
+        self.children: list[FilterNode] = sorted(children, key=lambda c: c.cost)
+        self.cost = sum(child.cost for child in self.children)
+
+    def fields(self) -> set[str]:
+        return set().union(*(child.fields() for child in self.children))
+
+    def __str__(self) -> str:
+        return f" {self.keyword} ".join(_group(child) for child in self.children)
+
+
+class And(_Junction):
+    keyword = "AND"
+
+    def compile(self, index: Callable[[str], int]) -> Predicate:
+        predicate, *rest = [child.compile(index) for child in self.children]
+        for following in rest:
+            predicate = _and(predicate, following)
+        return predicate
+
+    def line_check(self, binary: bool = False) -> LineCheck | None:
+        return all_of(child.line_check(binary) for child in self.children)
+
+
+class Or(_Junction):
+    keyword = "OR"
+
+    def compile(self, index: Callable[[str], int]) -> Predicate:
+        predicate, *rest = [child.compile(index) for child in self.children]
+        for following in rest:
+            predicate = _or(predicate, following)
+        return predicate
+
+    def line_check(self, binary: bool = False) -> LineCheck | None:
+        return any_of(child.line_check(binary) for child in self.children)
+
+
+def _and(first: Predicate, second: Predicate) -> Predicate:
+    return lambda values: first(values) and second(values)
+
+
+def _or(first: Predicate, second: Predicate) -> Predicate:
+    return lambda values: first(values) or second(values)
+
+
+def _group(node: FilterNode) -> str:
+    return f"({node})" if isinstance(node, _Junction) else str(node)
+
+
+def _quote(value: str) -> str:
+    return '"' + value.replace('"', '\\"') + '"'
+
+
+@cache
+def _compile_glob(pattern: str) -> Callable[[str], re.Match | None]:
+    return re.compile(translate(pattern)).match
+
+
+@cache
+def _compile_regex(pattern: str) -> Callable[[str], re.Match | None]:
+    try:
+        return re.compile(pattern).search
+    except re.error as error:
+        raise ValueError(f"Invalid regular expression {pattern!r}: {error}") from None
+
+
+def _parse_address(
+    value: str | None,
+) -> ipaddress.IPv4Address | ipaddress.IPv6Address | None:
+    try:
+        return ipaddress.ip_address(value)
+    except ValueError:
+        return None
+
+
+def field_filter(field: str, value: str) -> FilterNode:
+    """
+    Условие --filter-field/--filter-value: шаблон fnmatch, значение без
+    спецсимволов сравнивается на равенство
+    """
+    return glob_or_equals(field.lower(), value)
+
+
+def glob_or_equals(field: str, value: str) -> FilterNode:
+    if any(char in value for char in "*?["):
+        return Glob(field, value)
+    return Equals(field, value)
+
+
+def combine_filters(*nodes: FilterNode | None) -> FilterNode | None:
+    """Объединяет заданные условия через AND"""
+    present = [node for node in nodes if node is not None]
+    if len(present) > 1:
+        return And(present)
+    return present[0] if present else None
+
+
+# Лексемы выражения: строка в кавычках, оператор/скобка или слово
+_TOKEN_PATTERN = re.compile(
+    r"""\s*(?:
+        (?P<string>"(?:[^"\\]|\\.)*"|'(?:[^'\\]|\\.)*')
+        |(?P<op>!=|!~|<=|>=|=|~|<|>|\(|\))
+        |(?P<word>[^\s()=!<>~"']+)
+    )""",
+    re.VERBOSE,
+)
+_KEYWORDS = ("and", "or", "not", "in", "like")
+_RANGE_PATTERN = re.compile(r"(\d+)\.\.(\d+)")
+
+
+def parse_filter(expression: str, known_fields: Sequence[str]) -> FilterNode:
+    """
+    Разбирает выражение фильтра, например:
+
+        status >= 500 AND NOT source like "/static/*"
+        method = POST OR (status in 400..499 AND remote_addr in 10.0.0.0/8)
+        http_user_agent ~ "(?i)bot"
+
+    Операторы: = и != (равенство), like (шаблон fnmatch), ~ и !~
+    (регулярное выражение), <, <=, >, >= и in A..B (числа в status и
+    body_bytes_sent), in ПОДСЕТЬ (remote_addr). Условия объединяются
+    через AND, OR, NOT и скобки; AND связывает сильнее OR. Ключевые слова
+    и имена полей не зависят от регистра, значения - зависят.
+    """
+    return _FilterParser(expression, known_fields).parse()
+
+
+class _FilterParser:
+    """Разбор выражения фильтра рекурсивным спуском"""
+
+    def __init__(self, expression: str, known_fields: Sequence[str]):
+        self.expression: str = expression
+        self.known_fields: Sequence[str] = known_fields
+        self.tokens: list[tuple[str, str, int]] = self._tokenize(expression)
+        self.position: int = 0
+
+    def _tokenize(self, expression: str) -> list[tuple[str, str, int]]:
+        tokens = []
+        offset = 0
+        expression = expression.rstrip()
+        while offset < len(expression):
+            match = _TOKEN_PATTERN.match(expression, offset)
+            if match is None:
+                raise self._error("unexpected character", offset)
+            kind = match.lastgroup
+            text = match.group(kind)
+            if kind == "string":
+                text = re.sub(r"\\([\"'])", r"\1", text[1:-1])
+            tokens.append((kind, text, match.start(kind)))
+            offset = match.end()
+        return tokens
+
+    def _error(self, message: str, offset: int | None = None) -> ValueError:
+        if offset is None:
+            offset = (
+                self.tokens[self.position][2]
+                if self.position < len(self.tokens)
+                else len(self.expression)
+            )
+        return ValueError(
+            f"Invalid filter expression {self.expression!r} at {offset}: {message}"
+        )
+
+    def _peek_keyword(self) -> str | None:
+        if self.position < len(self.tokens):
+            kind, text, _ = self.tokens[self.position]
+            if kind == "word" and text.lower() in _KEYWORDS:
+                return text.lower()
+        return None
+
+    def _peek_op(self) -> str | None:
+        if self.position < len(self.tokens):
+            kind, text, _ = self.tokens[self.position]
+            if kind == "op":
+                return text
+        return None
+
+    def _next(self, expected: str) -> tuple[str, str, int]:
+        if self.position >= len(self.tokens):
+            raise self._error(f"expected {expected}")
+        token = self.tokens[self.position]
+        self.position += 1
+        return token
+
+    def parse(self) -> FilterNode:
+        if not self.tokens:
+            raise self._error("empty expression")
+        node = self._parse_or()
+        if self.position < len(self.tokens):
+            raise self._error("expected AND, OR or end of expression")
+        return node
+
+    def _parse_or(self) -> FilterNode:
+        children = [self._parse_and()]
+        while self._peek_keyword() == "or":
+            self.position += 1
+            children.append(self._parse_and())
+        return children[0] if len(children) == 1 else Or(children)
+
+    def _parse_and(self) -> FilterNode:
+        children = [self._parse_not()]
+        while self._peek_keyword() == "and":
+            self.position += 1
+            children.append(self._parse_not())
+        return children[0] if len(children) == 1 else And(children)
+
+    def _parse_not(self) -> FilterNode:
+        if self._peek_keyword() == "not":
+            self.position += 1
+            return Not(self._parse_not())
+        if self._peek_op() == "(":
+            self.position += 1
+            node = self._parse_or()
+            if self._peek_op() != ")":
+                raise self._error("expected ')'")
+            self.position += 1
+            return node
+        return self._parse_condition()
+
+    def _parse_condition(self) -> FilterNode:
+        kind, field, offset = self._next("field name")
+        field = field.lower()
+        if kind != "word" or field not in self.known_fields:
+            raise self._error(f"unknown field {field!r}", offset)
+
+        operator = self._peek_keyword() or self._peek_op()
+        if operator not in ("in", "like", "=", "!=", "~", "!~", "<", "<=", ">", ">="):
+            raise self._error("expected operator")
+        self.position += 1
+        _, value, value_offset = self._next("value")
+
+        if operator == "=":
+            return Equals(field, value)
+        if operator == "!=":
+            return Not(Equals(field, value))
+        if operator == "like":
+            return glob_or_equals(field, value)
+        if operator in ("~", "!~"):
+            node = Regex(field, value)
+            return node if operator == "~" else Not(node)
+        if operator == "in":
+            return self._parse_in(field, value, value_offset)
+        return self._parse_comparison(field, operator, value, value_offset)
+
+    def _parse_in(self, field: str, value: str, offset: int) -> FilterNode:
+        bounds = _RANGE_PATTERN.fullmatch(value)
+        if bounds is not None:
+            self._check_numeric(field, offset)
+            return NumberRange(field, int(bounds.group(1)), int(bounds.group(2)))
+        if field not in ADDRESS_FIELDS:
+            raise self._error(f"expected range A..B for {field!r}", offset)
+        try:
+            return Network(field, value)
+        except ValueError:
+            raise self._error(f"invalid network {value!r}", offset) from None
+
+    def _parse_comparison(
+        self, field: str, operator: str, value: str, offset: int
+    ) -> FilterNode:
+        self._check_numeric(field, offset)
+        if not value.isdigit():
+            raise self._error(f"expected integer, got {value!r}", offset)
+        number = int(value)
+        if operator == "<":
+            return NumberRange(field, high=number - 1)
+        if operator == "<=":
+            return NumberRange(field, high=number)
+        if operator == ">":
+            return NumberRange(field, low=number + 1)
+        return NumberRange(field, low=number)
+
+    def _check_numeric(self, field: str, offset: int) -> None:
+        if field not in NUMERIC_FIELDS:
+            raise self._error(
+                f"numeric comparison is not supported for {field!r}", offset
+            )
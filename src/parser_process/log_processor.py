@@ -1,10 +1,64 @@
-from src.iterators.url_path_iterator import URLPathIterator
+from src.iterators.base_iterator import BaseIterator
 from src.iterators.local_path_iterator import LocalPathIterator
 from src.databases.log_data import LogData
+from src.databases.rollup_store import ROLLUP_SECONDS, RollupStore
+from src.databases.sampling import SampleStats
+from src.databases.sketches import TopKCounter
+from src.databases.state_store import FileState, StateStore
+from src.databases.windowed_log_data import WindowedLogData
+from src.iterators.compression import detect_file_compression
+from src.iterators.file_follower import LocalPathFollower
+from src.iterators.file_range import encoded_size, find_lines_end
+from src.parser_process.line_parser import LOG_FIELDS, LineParser
+from src.parser_process.line_prefilter import (
+    LineCheck,
+    all_of,
+    prefilter_lines,
+    time_between,
+)
+from src.parser_process.log_filter import (
+    FilterNode,
+    combine_filters,
+    field_filter,
+    parse_filter,
+)
+from src.parser_process.sharding import (
+    Shard,
+    iter_shard_bytes,
+    iter_shard_lines,
+    plan_shards,
+    schedule_order,
+    split_shards,
+)
+from src.parser_process.pipeline import (
+    PIPELINE_BATCH_SIZE,
+    PIPELINE_QUEUE_SIZE,
+    iter_batches_in_thread,
+    map_ordered,
+)
+from src.parser_process.profiler import PROFILE_CHUNK_SIZE, Profiler
+from src.parser_process.sampling import iter_sample_runs, plan_sample_blocks
+from src.parser_process.time_decoder import TimeDecoder
+from src.parser_process.time_index import TimeIndex, search_shards
 
-import re
-from datetime import datetime, timezone
-from fnmatch import fnmatch
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import AbstractContextManager, nullcontext
+from dataclasses import dataclass
+from datetime import datetime, UTC
+from itertools import islice
+from typing import TYPE_CHECKING
+from collections.abc import Callable, Iterable, Iterator, Sequence
+
+# NumPy (колоночный режим, хранилище) и requests (URL) загружаются только
+# там, где нужны: запуск по небольшому локальному файлу их не импортирует
+if TYPE_CHECKING:
+    from src.databases.column_store import ColumnStore
+
+_full_line_parser = LineParser()
+_time_line_parser = LineParser(("time_local",))
 
 
 class LogParserProcessor:
@@ -28,90 +82,935 @@ class LogParserProcessor:
         log_data: LogData,
         filter_field: str | None = None,
         filter_value: str | None = None,
+        workers: int = 1,
+        reader: str = "text",
+        state_store: StateStore | None = None,
+        fetch_workers: int = 4,
+        filter_expression: str | None = None,
+        engine: str = "rows",
+        time_index: bool = False,
+        profiler: Profiler | None = None,
+        pipeline: bool = False,
+        batch_size: int = PIPELINE_BATCH_SIZE,
+        queue_size: int = PIPELINE_QUEUE_SIZE,
+        exclude: Sequence[str] = (),
+        order: str = "name",
+        sample: float | None = None,
+        sample_seed: int = 0,
     ):
         self.log_data: LogData = log_data
-        self.filter_field: str | None = filter_field
+        # Имя поля не зависит от регистра, значение сравнивается как есть
+        self.filter_field: str | None = (
+            None if filter_field is None else filter_field.lower()
+        )
         self.filter_value: str | None = filter_value
+        self.filter_expression: str | None = filter_expression
+        # Подсчет: rows - построчно, columnar - пачками строк по колонкам
+        self.engine: str = engine
+        # --from/--to по индексу времени (или двоичным поиском) вместо всех строк
+        self.time_index: bool = time_index
+        # Замеры этапов для --profile, None - без замеров
+        self.profiler: Profiler | None = profiler
+        # Чтение в фоновом потоке, пачки строк по batch_size через очередь
+        # из queue_size пачек (см. pipeline)
+        self.pipeline: bool = pipeline
+        self.batch_size: int = batch_size
+        self.queue_size: int = queue_size
+        self.workers: int = workers
+        # Чтение локальных файлов: text (open) или mmap (байтовые строки)
+        self.reader: str = reader
+        # Состояние прошлых запусков для инкрементального анализа
+        self.state_store: StateStore | None = state_store
+        # Количество одновременных загрузок по URL
+        self.fetch_workers: int = fetch_workers
+        # Поиск локальных файлов: шаблоны исключений и порядок файлов
+        self.exclude: Sequence[str] = exclude
+        self.order: str = order
+        # Доля логов для приближенного отчета (см. _process_sample), None - все
+        self.sample: float | None = sample
+        self.sample_seed: int = sample_seed
+        if sample is not None:
+            self._check_sample()
+
+        # Границы временного окна разбираются один раз, в секундах Unix-времени
+        self._has_time_bounds: bool = bool(log_data.from_date or log_data.to_date)
+        self._start_ts: float = self._bound_timestamp(log_data.from_date, -math.inf)
+        self._end_ts: float = self._bound_timestamp(log_data.to_date, math.inf)
+        self._time_decoder: TimeDecoder = TimeDecoder()
+
+        # Фильтр разбирается один раз, условие собирается при разборе строк
+        self._filter: FilterNode | None = self._build_filter()
+        self._line_parser: LineParser = LineParser(self._required_fields())
+
+    def _check_sample(self) -> None:
+        if not 0 < self.sample <= 1:
+            raise ValueError("Sample fraction must be in (0, 1]")
+        # Интервалы считаются по размерам ответов и счетчикам каждого блока
+        if self.log_data.size_sketch is not None or any(
+            isinstance(counter, TopKCounter)
+            for counter in (
+                self.log_data.sources_statistics,
+                self.log_data.ip_statistics,
+            )
+        ):
+            raise ValueError("Sampling requires exact quantiles and counters")
+
+    def _build_filter(self) -> FilterNode | None:
+        """Дерево фильтра из --filter и пары --filter-field/--filter-value"""
+        field_node = None
+        if self.filter_field is not None and self.filter_value is not None:
+            if self.filter_field not in LOG_FIELDS:
+                raise ValueError(f"Unknown filter field: {self.filter_field}")
+            field_node = field_filter(self.filter_field, self.filter_value)
+        expression_node = None
+        if self.filter_expression is not None:
+            expression_node = parse_filter(self.filter_expression, LOG_FIELDS)
+        return combine_filters(expression_node, field_node)
 
-    def __post_init__(self):
-        if self.filter_field is not None:
-            self.filter_field = self.filter_field.lower()
-        if self.filter_value is not None:
-            self.filter_value = self.filter_value.lower()
+    def _required_fields(self) -> set[str]:
+        """Поля строки лога, которые нужны статистике и фильтрам"""
+        fields = {"remote_addr", "method", "source", "status", "body_bytes_sent"}
+        if self._has_time_bounds:
+            fields.add("time_local")
+        if self._filter is not None:
+            fields.update(self._filter.fields())
+        return fields
 
     @staticmethod
-    # Функция для парсинга строки лога
+    # Функция для парсинга строки лога (возвращает все поля)
     def parse_log_line(line: str) -> dict[str, str] | None:
-        # Регулярное выражение для разбора строк логов
-        log_pattern = re.compile(
-            r"(?P<remote_addr>\S+) "  # IP адрес
-            r"- (?P<remote_user>\S*) "  # Пользователь (или "-")
-            r"\[(?P<time_local>[^\]]+)\] "  # Время
-            r'"(?P<method>\S+) (?P<source>\S+) (?P<protocol>\S+)" '  # Запрос (метод, источник, протокол)
-            r"(?P<status>\d{3}) "  # Статус ответа
-            r"(?P<body_bytes_sent>\d+) "  # Количество байт
-            r'"(?P<http_referer>[^"]*)" '  # Реферер
-            r'"(?P<http_user_agent>[^"]*)"'  # User-Agent
-        )
-        match = log_pattern.match(line)
-        if match:
-            return match.groupdict()
+        return _full_line_parser.parse(line)
 
     @staticmethod
-    def get_iterator(path: str) -> URLPathIterator | LocalPathIterator:
+    def get_iterator(
+        path: str,
+        fetch_workers: int = 4,
+        exclude: Sequence[str] = (),
+        order: str = "name",
+        time_range: tuple[float, float] | None = None,
+    ) -> BaseIterator:
+        if path.startswith(("http", "@")):
+            from src.iterators.url_path_iterator import URLPathIterator
+
         if path.startswith("http"):
             # Для URL возвращаем URLPathIterator
-            return URLPathIterator(path)
+            return URLPathIterator(path, fetch_workers)
+        elif path.startswith("@"):
+            # @файл - список URL, по одному в строке
+            return URLPathIterator.from_url_list(path[1:], fetch_workers)
         else:
             # Для локального пути используем LocalPathIterator
-            return LocalPathIterator(path)
+            return LocalPathIterator(path, exclude, order, time_range)
+
+    def _iterator(self, path: str, time_bounds: bool = True) -> BaseIterator:
+        """
+        get_iterator с настройками поиска файлов; с time_bounds каталоги-даты
+        вне --from/--to не обходятся
+        """
+        time_range = None
+        if time_bounds and self._has_time_bounds:
+            time_range = (self._start_ts, self._end_ts)
+        return self.get_iterator(
+            path, self.fetch_workers, self.exclude, self.order, time_range
+        )
 
     @staticmethod
     # Преобразование строковых дат в объекты datetime (если задано)
     def parse_iso8601(date_str: str | None) -> datetime | None:
         if date_str:
             # Создаем datetime объект без смещения, добавляем UTC смещение
-            return datetime.fromisoformat(date_str).replace(tzinfo=timezone.utc)
+            return datetime.fromisoformat(date_str).replace(tzinfo=UTC)
+
+    def _bound_timestamp(self, date_str: str | None, default: float) -> float:
+        bound = self.parse_iso8601(date_str)
+        return default if bound is None else bound.timestamp()
 
     def _matches_time_filter(self, parsed_log: dict[str, str]) -> bool:
-        start_time = self.parse_iso8601(self.log_data.from_date)
-        end_time = self.parse_iso8601(self.log_data.to_date)
-        log_time = datetime.strptime(parsed_log["time_local"], "%d/%b/%Y:%H:%M:%S %z")
+        return self._matches_time(parsed_log["time_local"])
 
-        if start_time is not None and log_time < start_time:
-            return False
-        if end_time is not None and log_time > end_time:
-            return False
-        return True
+    def _matches_time(self, time_local: str) -> bool:
+        if not self._has_time_bounds:
+            return True
+        log_ts = self._time_decoder.decode(time_local)
+        return self._start_ts <= log_ts <= self._end_ts
 
     def _matches_filter(self, parsed_log: dict[str, str]) -> bool:
-        field_value = parsed_log.get(self.filter_field)
-        if field_value is None:
-            return False
-        return fnmatch(field_value, self.filter_value)
+        # Значения в порядке LOG_FIELDS, отсутствующие поля - None
+        values = tuple(map(parsed_log.get, LOG_FIELDS))
+        return self._filter.compile(LOG_FIELDS.index)(values)
 
     def check_log(self, parsed_log: dict[str, str]) -> bool:
-        if (
-            self.filter_field is not None
-            and self.filter_value is not None
-            and not self._matches_filter(parsed_log)
-        ):
+        if self._filter is not None and not self._matches_filter(parsed_log):
             return False
         return self._matches_time_filter(parsed_log)
 
     def process(self, path: str) -> None:
-        iterator = self.get_iterator(path)
+        if os.path.isdir(path):
+            from src.databases.column_store import ColumnStore
+
+            if ColumnStore.is_store(path):
+                self.log_data.file_names = [path]
+                self._process_store(ColumnStore.open(path))
+                return
+        if RollupStore.is_store(path):
+            self.log_data.file_names = [path]
+            self._process_rollups(RollupStore(path))
+            return
+
+        with self._stage("discover"):
+            iterator = self._iterator(path)
+            if not self._reads_lazily(iterator):
+                self.log_data.file_names = iterator.files
+
+        if self.sample is not None:
+            self._process_sample(iterator)
+        elif self.state_store is not None and isinstance(iterator, LocalPathIterator):
+            self._process_incremental(iterator.files)
+        elif (
+            self.time_index
+            and self._has_time_bounds
+            and isinstance(iterator, LocalPathIterator)
+        ):
+            self._process_time_range(iterator.files)
+        elif self.pipeline:
+            self._process_pipeline(iterator)
+        elif self.workers > 1 and isinstance(iterator, LocalPathIterator):
+            self._process_sharded(iterator.files)
+        elif self.reader == "mmap" and isinstance(iterator, LocalPathIterator):
+            self._consume(iterator.iter_bytes(), binary=True)
+        else:
+            self._consume(iterator)
+        # При чтении по мере обхода список файлов известен только теперь
         self.log_data.file_names = iterator.files
 
-        for line in iterator:
-            parsed = self.parse_log_line(line)
-            if parsed and self.check_log(parsed):
-                self.log_data.total_requests_cnt += 1
-                self.log_data.sources_statistics[parsed["source"]] += 1
-                self.log_data.response_codes_statistics[parsed["status"]] += 1
-                self.log_data.response_sizes.append(int(parsed["body_bytes_sent"]))
-
-                self.log_data.request_types[parsed["method"]] += 1
-                self.log_data.ip_statistics[parsed["remote_addr"]] += 1
-                if parsed["status"].startswith("4") or parsed["status"].startswith("5"):
-                    self.log_data.error_urls.add(parsed["source"])
+    def _reads_lazily(self, iterator: BaseIterator) -> bool:
+        """
+        Файлы читаются по мере обхода каталогов, без списка файлов заранее:
+        последовательное чтение по шаблону в порядке имен. Этап discover
+        профиля тогда включает только подготовку, а обход идет вместе с
+        чтением
+        """
+        return (
+            isinstance(iterator, LocalPathIterator)
+            and iterator.order == "name"
+            and self.sample is None
+            and self.state_store is None
+            and not (self.time_index and self._has_time_bounds)
+            and (self.pipeline or self.workers <= 1)
+        )
+
+    def _process_time_range(self, files: list[str]) -> None:
+        """
+        Обрабатывает только части файлов, где могут быть строки из
+        --from/--to: по индексу времени (build_time_index) или, если индекса
+        нет, двоичным поиском по времени строк. Время каждой строки все равно
+        проверяется, поэтому лишние строки на границах частей не попадают
+        в статистику
+        """
+        shards = []
+        for path in files:
+            index = TimeIndex.load(path)
+            if index is not None:
+                shards.extend(index.shards(path, self._start_ts, self._end_ts))
+            else:
+                shards.extend(
+                    search_shards(
+                        path, self._start_ts, self._end_ts, self._time_decoder.decode
+                    )
+                )
+        if self.workers > 1:
+            pieces = split_shards(shards, self.workers)
+            shards = [shard for piece in pieces for shard in piece]
+        for partial in self._run_shards(shards):
+            self.log_data.merge(partial)
+
+    def build_time_index(self, path: str) -> list[str]:
+        """Строит и сохраняет индексы времени локальных файлов, возвращает файлы"""
+        files = LocalPathIterator(path, self.exclude, self.order).files
+        for file_path in files:
+            TimeIndex.build(file_path, self._time_decoder.decode).save(file_path)
+        return files
+
+    def export_columns(self, path: str, directory: str) -> int:
+        """
+        Разбирает логи и дописывает все поля строк в колоночное хранилище
+        directory. Фильтры и --from/--to не применяются: они задаются
+        при запросе к хранилищу. Возвращает количество записанных строк
+        """
+        from src.databases.column_store import ColumnStore
+        from src.parser_process.columnar import ColumnBatch, iter_batches
+
+        iterator = self._iterator(path, time_bounds=False)
+        line_parser = _full_line_parser
+        if self.reader == "mmap" and isinstance(iterator, LocalPathIterator):
+            lines, parse_batch = iterator.iter_bytes(), line_parser.parse_batch_bytes
+        else:
+            lines, parse_batch = iterator, line_parser.parse_batch
+
+        store = ColumnStore.open(directory)
+        rows_before = store.rows_count
+        for rows in iter_batches(lines, parse_batch):
+            batch = ColumnBatch.from_rows(rows, line_parser.fields)
+            store.append(batch.columns, batch.timestamps(self._time_decoder.decode))
+        store.save()
+        return store.rows_count - rows_before
+
+    def export_rollups(self, path: str, database: str) -> int:
+        """
+        Разбирает логи и добавляет почасовую статистику в базу database.
+        Фильтры применяются при записи (база годится только для них),
+        --from/--to ограничивают записываемые строки. Возвращает количество
+        записанных запросов
+        """
+        import numpy as np
+
+        from src.parser_process.columnar import ColumnBatch, add_batch, iter_batches
+
+        iterator = self._iterator(path)
+        # Строка разбирается один раз: время нужно для часа в любом случае
+        line_parser = LineParser(self._required_fields() | {"time_local"})
+        if self.reader == "mmap" and isinstance(iterator, LocalPathIterator):
+            lines, parse_batch = iterator.iter_bytes(), line_parser.parse_batch_bytes
+        else:
+            lines, parse_batch = iterator, line_parser.parse_batch
+        matches_filter = (
+            None if self._filter is None else self._filter.compile(line_parser.index)
+        )
+
+        hours: dict[int, LogData] = {}
+        for rows in iter_batches(lines, parse_batch):
+            if matches_filter is not None:
+                rows = list(filter(matches_filter, rows))
+            batch = ColumnBatch.from_rows(rows, line_parser.fields)
+            if not len(batch):
+                continue
+            timestamps = batch.timestamps(self._time_decoder.decode)
+            keep = (timestamps >= self._start_ts) & (timestamps <= self._end_ts)
+            hour_keys = timestamps - timestamps % ROLLUP_SECONDS
+            for hour in np.unique(hour_keys[keep]).tolist():
+                if hour not in hours:
+                    hours[hour] = self.log_data.new_partial()
+                add_batch(hours[hour], batch.select(keep & (hour_keys == hour)))
+
+        store = RollupStore(database)
+        try:
+            store.use_config(self._rollup_config())
+            store.add(hours, self.log_data.new_partial())
+        finally:
+            store.close()
+        return sum(log_data.total_requests_cnt for log_data in hours.values())
+
+    def _rollup_config(self) -> dict:
+        """Настройки, от которых зависят почасовые агрегаты"""
+        config = self._state_config()
+        del config["settings"]["from_date"], config["settings"]["to_date"]
+        return config
+
+    def _process_rollups(self, store: RollupStore) -> None:
+        """
+        Статистика из почасовых агрегатов: объединяются часы, которые
+        задевает --from/--to (границы интервала округляются до целых часов)
+        """
+        try:
+            store.use_config(self._rollup_config())
+            template = self.log_data.new_partial()
+            for _, hour_data in store.read_range(
+                self._start_ts, self._end_ts, template
+            ):
+                self.log_data.merge(hour_data)
+        finally:
+            store.close()
+
+    def _process_store(self, store: "ColumnStore") -> None:
+        """
+        Статистика по колоночному хранилищу без разбора строк: части вне
+        --from/--to не открываются, читаются только нужные поля
+        """
+        import numpy as np
+
+        from src.parser_process.columnar import add_batch
+
+        # Время берется из числовой колонки, строка нужна только фильтру
+        filter_fields = set() if self._filter is None else self._filter.fields()
+        fields = [
+            field
+            for field in self._line_parser.fields
+            if field != "time_local" or field in filter_fields
+        ]
+        matches_filter = (
+            None if self._filter is None else self._filter.compile(fields.index)
+        )
+
+        for partition in store.select_partitions(self._start_ts, self._end_ts):
+            part = store.read(partition, fields)
+            if self._has_time_bounds:
+                timestamps = part.timestamps
+                mask = (timestamps >= self._start_ts) & (timestamps <= self._end_ts)
+                part = part.select(mask)
+            if matches_filter is not None:
+                # Фильтр по выражению проверяется для кортежей значений
+                rows = zip(*map(part.strings, fields))
+                part = part.select(
+                    np.fromiter(map(matches_filter, rows), dtype=bool, count=len(part))
+                )
+            add_batch(self.log_data, part)
+
+    def _process_sharded(self, files: list[str]) -> None:
+        """
+        Обрабатывает части файлов в пуле процессов и объединяет частичную
+        статистику в порядке частей, результат совпадает с последовательным
+        """
+        shards = plan_shards(files, self.workers)
+        if len(shards) <= 1:
+            for shard in shards:
+                self._consume_shard(shard)
+            return
+
+        for partial in self._run_shards(shards):
+            self.log_data.merge(partial)
+
+    def _process_sample(self, iterator: BaseIterator) -> None:
+        """
+        Обрабатывает выборку блоков: из несжатых файлов - диапазоны байт
+        (в пуле процессов, если workers > 1), из сжатых файлов и URL - части
+        потока строк (см. sampling). Счетчики переводятся на все логи, а
+        статистика выборки для доверительных интервалов - в log_data.sample
+        """
+        stats = SampleStats(self.sample)
+        if not isinstance(iterator, LocalPathIterator):
+            self._sample_lines(iterator, 0, stats)
+        else:
+            compressed = []
+            blocks = []
+            for stratum, file_path in enumerate(iterator.files):
+                if detect_file_compression(file_path) is not None:
+                    compressed.append((stratum, file_path))
+                    continue
+                stats.total_size += os.path.getsize(file_path)
+                blocks.extend(
+                    plan_sample_blocks(
+                        file_path, self.sample, self.sample_seed, stratum
+                    )
+                )
+            for block, partial in zip(blocks, self._iter_shard_stats(blocks)):
+                stats.add_unit(block.end - block.start, partial)
+                self.log_data.merge(partial)
+            for stratum, file_path in compressed:
+                shard = Shard(file_path)
+                if self.reader == "mmap":
+                    self._sample_lines(iter_shard_bytes(shard), stratum, stats, True)
+                else:
+                    self._sample_lines(iter_shard_lines(shard), stratum, stats)
+
+        self.log_data.sample = stats
+        self.log_data.scale(stats.scale)
+
+    def _sample_lines(
+        self,
+        lines: Iterable[str | bytes],
+        stratum: int,
+        stats: SampleStats,
+        binary: bool = False,
+    ) -> None:
+        """Выборка блоков подряд идущих строк потока (файла) с номером stratum"""
+        for size, run in iter_sample_runs(
+            lines, self.sample, self.sample_seed, stratum
+        ):
+            stats.total_size += size
+            if run is not None:
+                partial = self.log_data.new_partial()
+                self._consume(run, binary, partial)
+                stats.add_unit(size, partial)
+                self.log_data.merge(partial)
+
+    def _iter_shard_stats(self, shards: list[Shard]) -> Iterator[LogData]:
+        """
+        Статистика по каждой части по порядку, как _run_shards, но по мере
+        готовности: в работе не больше 2 * workers частей
+        """
+        if self.workers <= 1 or len(shards) <= 1:
+            for shard in shards:
+                partial, profiler = _process_shard(self._new_partial_processor(), shard)
+                if profiler is not None:
+                    self.profiler.merge(profiler)
+                yield partial
+            return
+
+        template = self._new_partial_processor()
+        with ProcessPoolExecutor(max_workers=self.workers) as pool:
+            for partial, profiler in map_ordered(
+                pool, _process_shard, shards, template, window=2 * self.workers
+            ):
+                if profiler is not None:
+                    self.profiler.merge(profiler)
+                yield partial
+
+    def _process_pipeline(self, iterator: BaseIterator) -> None:
+        """
+        Строки читаются в фоновом потоке и пачками передаются на подсчет:
+        в этом потоке или, если workers > 1, в процессы пула (частичная
+        статистика пачек объединяется по порядку, как у частей файлов)
+        """
+        binary = self.reader == "mmap" and isinstance(iterator, LocalPathIterator)
+        lines = iterator.iter_bytes() if binary else iterator
+        batches = iter_batches_in_thread(lines, self.batch_size, self.queue_size)
+        if self.workers <= 1:
+            for batch in batches:
+                self._consume(batch, binary)
+            return
+
+        template = self._new_partial_processor()
+        with ProcessPoolExecutor(max_workers=self.workers) as pool:
+            # Пачек в работе вдвое больше процессов, чтобы пул не простаивал
+            for partial, profiler in map_ordered(
+                pool, _process_batch, batches, template, binary, window=2 * self.workers
+            ):
+                self.log_data.merge(partial)
+                if profiler is not None:
+                    self.profiler.merge(profiler)
+
+    def _new_partial_processor(self) -> "LogParserProcessor":
+        """Обработчик с теми же настройками и пустой статистикой"""
+        return LogParserProcessor(
+            self.log_data.new_partial(),
+            self.filter_field,
+            self.filter_value,
+            reader=self.reader,
+            filter_expression=self.filter_expression,
+            engine=self.engine,
+            profiler=None if self.profiler is None else Profiler(),
+        )
+
+    def _run_shards(self, shards: list[Shard]) -> list[LogData]:
+        """Статистика по каждой части: в пуле процессов, если workers > 1"""
+        if self.workers <= 1 or len(shards) <= 1:
+            results = [
+                _process_shard(self._new_partial_processor(), shard) for shard in shards
+            ]
+        else:
+            # Части запускаются от больших к меньшим, а объединяются по порядку
+            template = self._new_partial_processor()
+            with ProcessPoolExecutor(
+                max_workers=min(self.workers, len(shards))
+            ) as pool:
+                futures = {
+                    index: pool.submit(_process_shard, template, shards[index])
+                    for index in schedule_order(shards)
+                }
+                results = [futures[index].result() for index in range(len(shards))]
+        for _, profiler in results:
+            if profiler is not None:
+                self.profiler.merge(profiler)
+        return [log_data for log_data, _ in results]
+
+    def _stage(self, name: str) -> AbstractContextManager:
+        """Замер этапа name для --profile"""
+        if self.profiler is None:
+            return nullcontext()
+        return self.profiler.stage(name)
+
+    def _state_config(self) -> dict:
+        """Настройки, от которых зависит сохраненная статистика по файлам"""
+        settings = self.log_data.new_partial().to_dict()
+        # Настройки отображения не влияют на подсчет
+        del settings["repr_format"], settings["percentiles"]
+        return {
+            "filter": None if self._filter is None else str(self._filter),
+            "settings": settings,
+        }
+
+    def _process_incremental(self, files: list[str]) -> None:
+        """
+        Обрабатывает только то, чего нет в состоянии прошлых запусков
+
+        Для неизмененного файла берется сохраненная статистика, у дописанного
+        разбираются только новые байты, остальные файлы (новые, подмененные,
+        укороченные, измененные сжатые) разбираются заново. Последняя строка
+        без перевода строки может еще дописываться: она учитывается в отчете,
+        но не в состоянии. Результат совпадает с обработкой файлов целиком.
+        """
+        store = self.state_store
+        store.use_config(self._state_config())
+
+        plans = [self._plan_file(path) for path in files]
+        ranges = [
+            shard
+            for plan in plans
+            for shard in (plan.new_bytes, plan.tail)
+            if shard is not None
+        ]
+        if self.workers > 1:
+            pieces = split_shards(ranges, self.workers)
+        else:
+            pieces = [[shard] for shard in ranges]
+        results = iter(self._run_shards([shard for piece in pieces for shard in piece]))
+        range_results = iter([[next(results) for _ in piece] for piece in pieces])
+
+        file_states = {}
+        for plan in plans:
+            if plan.new_bytes is not None:
+                for partial in next(range_results):
+                    plan.stats.merge(partial)
+            self.log_data.merge(plan.stats)
+            if plan.tail is not None:
+                for partial in next(range_results):
+                    self.log_data.merge(partial)
+            file_states[os.path.abspath(plan.path)] = FileState.snapshot(
+                plan.path, plan.stat, plan.offset, plan.stats
+            )
+        store.files = file_states
+
+    def _plan_file(self, path: str) -> "_FilePlan":
+        stat = os.stat(path)
+        state = self.state_store.files.get(os.path.abspath(path))
+        compressed = detect_file_compression(path) is not None
+
+        reused = state is not None and (
+            state.is_unchanged(stat)
+            or (not compressed and state.is_appended(path, stat))
+        )
+        if reused:
+            stats, start = state.log_data(), state.offset
+        else:
+            stats, start = self.log_data.new_partial(), 0
+
+        if compressed:
+            # Сжатый файл нельзя продолжить со смещения, он разбирается целиком
+            new_bytes = None if reused else Shard(path)
+            return _FilePlan(path, stat, stats, stat.st_size, new_bytes)
+
+        with open(path, "rb") as file:
+            offset = find_lines_end(file, start, stat.st_size)
+        return _FilePlan(
+            path,
+            stat,
+            stats,
+            offset,
+            new_bytes=Shard(path, start, offset) if start < offset else None,
+            tail=Shard(path, offset, stat.st_size) if offset < stat.st_size else None,
+        )
+
+    def _consume_shard(self, shard: Shard) -> None:
+        if self.reader == "mmap":
+            self._consume(iter_shard_bytes(shard), binary=True)
+        else:
+            self._consume(iter_shard_lines(shard))
+
+    def follow(
+        self,
+        path: str,
+        windowed: WindowedLogData,
+        render: Callable[[list[tuple[int, LogData]]], None],
+        refresh_interval: float = 5.0,
+        poll_interval: float = 1.0,
+        clock: Callable[[], float] = time.time,
+        sleep: Callable[[float], None] = time.sleep,
+        max_polls: int | None = None,
+    ) -> None:
+        """
+        Следит за дописываемыми локальными файлами (с учетом ротации) и
+        каждые refresh_interval секунд передает в render статистику по окнам
+        windowed: список пар (длина окна в секундах, статистика).
+        Работает, пока не прервут, или max_polls опросов файлов.
+        """
+        follower = LocalPathFollower(path, exclude=self.exclude)
+        next_render = clock()
+        polls = 0
+        try:
+            while max_polls is None or polls < max_polls:
+                polls += 1
+                now = clock()
+                windowed.expire(now)
+                self._consume_windowed(follower.read_lines(), windowed)
+                if now >= next_render:
+                    render(self._window_reports(windowed, follower.files, now))
+                    next_render = now + refresh_interval
+                sleep(poll_interval)
+        finally:
+            follower.close()
+
+    def _consume_windowed(self, lines: list[str], windowed: WindowedLogData) -> None:
+        """Добавляет строки в корзины окон по времени запроса"""
+        parse_time = _time_line_parser.parse_values
+        decode_time = self._time_decoder.decode
+        grouped: dict[int, tuple[LogData, list[str]]] = {}
+        for line in lines:
+            values = parse_time(line)
+            if values is None:
+                continue
+            try:
+                bucket = windowed.bucket(decode_time(values[0]))
+            except ValueError:
+                # Строка с непонятным временем не должна останавливать слежение
+                continue
+            if bucket is not None:
+                grouped.setdefault(id(bucket), (bucket, []))[1].append(line)
+        for bucket, bucket_lines in grouped.values():
+            self._consume(bucket_lines, log_data=bucket)
+
+    @staticmethod
+    def _window_reports(
+        windowed: WindowedLogData, files: list[str], now: float
+    ) -> list[tuple[int, LogData]]:
+        reports = []
+        for seconds in windowed.windows:
+            window_data = windowed.window(seconds, now)
+            window_data.file_names = files
+            window_data.from_date = _format_timestamp(now - seconds)
+            window_data.to_date = _format_timestamp(now)
+            reports.append((seconds, window_data))
+        return reports
+
+    def _consume(
+        self,
+        lines: Iterable[str | bytes],
+        binary: bool = False,
+        log_data: LogData | None = None,
+    ) -> None:
+        """
+        Разбирает, фильтрует и добавляет в статистику строки лога.
+        binary=True - строки в байтах от iter_mmap_lines; log_data -
+        статистика, в которую добавляются строки (по умолчанию self.log_data)
+        """
+        log_data = self.log_data if log_data is None else log_data
+        if self.profiler is not None:
+            self._consume_profiled(lines, binary, log_data)
+            return
+        prefilter = self._line_prefilter(binary)
+        if prefilter is not None:
+            lines = prefilter_lines(lines, prefilter)
+        if self.engine == "columnar":
+            self._consume_columnar(lines, binary, log_data)
+            return
+        line_parser = self._line_parser
+        self._add_lines(
+            lines,
+            log_data,
+            line_parser.parse_values_bytes if binary else line_parser.parse_values,
+            self._compile_filter(),
+            self._has_time_bounds,
+        )
+
+    def _line_prefilter(self, binary: bool) -> LineCheck | None:
+        """
+        Проверка сырых строк до разбора: необходимые условия фильтра и
+        --from/--to (см. line_prefilter), строки без шансов не разбираются
+        """
+        checks = [None if self._filter is None else self._filter.line_check(binary)]
+        if self._has_time_bounds:
+            checks.append(
+                time_between(
+                    self._start_ts, self._end_ts, self._time_decoder.decode, binary
+                )
+            )
+        return all_of(checks)
+
+    def _compile_filter(self) -> Callable[[tuple[str, ...]], bool] | None:
+        """Проверка фильтра для кортежа значений парсера, None - фильтра нет"""
+        if self._filter is None:
+            return None
+        return self._filter.compile(self._line_parser.index)
+
+    def _time_range_check(self) -> Callable[[tuple[str, ...]], bool]:
+        """Проверка --from/--to для кортежа значений парсера"""
+        time_idx = self._line_parser.index("time_local")
+        decode_time = self._time_decoder.decode
+        start_ts, end_ts = self._start_ts, self._end_ts
+        return lambda values: start_ts <= decode_time(values[time_idx]) <= end_ts
+
+    def _add_lines(
+        self,
+        lines: Iterable,
+        log_data: LogData,
+        parse_values: Callable[[str | bytes], tuple[str, ...] | None],
+        matches_filter: Callable[[tuple[str, ...]], bool] | None,
+        has_time_bounds: bool,
+    ) -> None:
+        """
+        Построчный цикл подсчета: разбор parse_values, фильтр matches_filter
+        и проверка --from/--to, если has_time_bounds
+        """
+        sources_statistics = log_data.sources_statistics
+        response_codes_statistics = log_data.response_codes_statistics
+        add_size = (
+            log_data.response_sizes.append
+            if log_data.size_sketch is None
+            else log_data.size_sketch.add
+        )
+        request_types = log_data.request_types
+        ip_statistics = log_data.ip_statistics
+        error_urls = log_data.error_urls
+
+        # Позиции полей в кортеже значений, который возвращает парсер
+        line_parser = self._line_parser
+        addr_idx = line_parser.index("remote_addr")
+        method_idx = line_parser.index("method")
+        source_idx = line_parser.index("source")
+        status_idx = line_parser.index("status")
+        size_idx = line_parser.index("body_bytes_sent")
+
+        if has_time_bounds:
+            time_idx = line_parser.index("time_local")
+            decode_time = self._time_decoder.decode
+            start_ts, end_ts = self._start_ts, self._end_ts
+
+        for line in lines:
+            values = parse_values(line)
+            if values is None:
+                continue
+            if matches_filter is not None and not matches_filter(values):
+                continue
+            if has_time_bounds and not (
+                start_ts <= decode_time(values[time_idx]) <= end_ts
+            ):
+                continue
+
+            source = values[source_idx]
+            status = values[status_idx]
+            log_data.total_requests_cnt += 1
+            sources_statistics[source] += 1
+            response_codes_statistics[status] += 1
+            add_size(int(values[size_idx]))
+
+            request_types[values[method_idx]] += 1
+            ip_statistics[values[addr_idx]] += 1
+            if status[0] == "4" or status[0] == "5":
+                error_urls.add(source)
+
+    def _consume_columnar(
+        self, lines: Iterable[str | bytes], binary: bool, log_data: LogData
+    ) -> None:
+        """
+        _consume пачками: строки разбираются в кортежи, фильтр по выражению
+        проверяется для кортежей, фильтр по времени и подсчет - по колонкам
+        """
+        from src.parser_process.columnar import ColumnBatch, add_batch, iter_batches
+
+        line_parser = self._line_parser
+        parse_batch = (
+            line_parser.parse_batch_bytes if binary else line_parser.parse_batch
+        )
+        matches_filter = self._compile_filter()
+        for rows in iter_batches(lines, parse_batch):
+            if matches_filter is not None:
+                rows = list(filter(matches_filter, rows))
+            batch = ColumnBatch.from_rows(rows, line_parser.fields)
+            if self._has_time_bounds and len(batch):
+                timestamps = batch.timestamps(self._time_decoder.decode)
+                batch = batch.select(
+                    (timestamps >= self._start_ts) & (timestamps <= self._end_ts)
+                )
+            add_batch(log_data, batch)
+
+    def _consume_profiled(
+        self, lines: Iterable[str | bytes], binary: bool, log_data: LogData
+    ) -> None:
+        """
+        _consume с замером этапов (--profile): строки читаются пачками, и
+        каждый этап выполняется для всей пачки, поэтому время этапов
+        разделяется без замеров на каждую строку. Результат тот же
+        """
+        profiler = self.profiler
+        line_parser = self._line_parser
+        columnar = self.engine == "columnar"
+        if columnar:
+            from src.parser_process.columnar import ColumnBatch, add_batch
+
+            parse_chunk = (
+                line_parser.parse_batch_bytes if binary else line_parser.parse_batch
+            )
+        else:
+            parse_values = (
+                line_parser.parse_values_bytes if binary else line_parser.parse_values
+            )
+
+            def parse_chunk(chunk: list) -> list[tuple[str, ...]]:
+                return list(filter(None, map(parse_values, chunk)))
+
+        matches_filter = self._compile_filter()
+        prefilter = self._line_prefilter(binary)
+
+        lines = iter(lines)
+        while True:
+            with profiler.stage("read"):
+                chunk = list(islice(lines, PROFILE_CHUNK_SIZE))
+            if not chunk:
+                break
+            profiler.count("lines_read", len(chunk))
+            profiler.count("bytes_read", encoded_size(chunk))
+            if prefilter is not None:
+                read = len(chunk)
+                with profiler.stage("prefilter"):
+                    chunk = list(prefilter_lines(chunk, prefilter))
+                profiler.count("prefiltered", read - len(chunk))
+
+            with profiler.stage("parse"):
+                rows = parse_chunk(chunk)
+            profiler.count("malformed", len(chunk) - len(rows))
+            if matches_filter is not None:
+                parsed = len(rows)
+                with profiler.stage("filter"):
+                    rows = list(filter(matches_filter, rows))
+                profiler.count("filtered", parsed - len(rows))
+
+            if columnar:
+                with profiler.stage("columns"):
+                    batch = ColumnBatch.from_rows(rows, line_parser.fields)
+                if self._has_time_bounds and len(batch):
+                    with profiler.stage("time filter"):
+                        timestamps = batch.timestamps(self._time_decoder.decode)
+                        batch = batch.select(
+                            (timestamps >= self._start_ts)
+                            & (timestamps <= self._end_ts)
+                        )
+                profiler.count("out_of_range", len(rows) - len(batch))
+                with profiler.stage("aggregate"):
+                    add_batch(log_data, batch)
+                profiler.count("counted", len(batch))
+                continue
+
+            if self._has_time_bounds:
+                parsed = len(rows)
+                with profiler.stage("time filter"):
+                    rows = list(filter(self._time_range_check(), rows))
+                profiler.count("out_of_range", parsed - len(rows))
+            with profiler.stage("aggregate"):
+                # Строки уже разобраны и отфильтрованы
+                self._add_lines(rows, log_data, tuple, None, False)
+            profiler.count("counted", len(rows))
+
+
+def _format_timestamp(timestamp: float) -> str:
+    return datetime.fromtimestamp(timestamp, UTC).isoformat(timespec="seconds")
+
+
+@dataclass
+class _FilePlan:
+    """
+    Что осталось разобрать в файле при инкрементальном анализе: new_bytes -
+    байты до offset (конца полных строк), их статистика добавляется к stats
+    и сохраняется; tail - неполная последняя строка, только для отчета
+    """
+
+    path: str
+    stat: os.stat_result
+    stats: LogData
+    offset: int
+    new_bytes: Shard | None = None
+    tail: Shard | None = None
+
+
+def _process_batch(
+    processor: LogParserProcessor, binary: bool, lines: list[str | bytes]
+) -> tuple[LogData, Profiler | None]:
+    """Считает статистику по пачке строк конвейера в процессе пула"""
+    processor._consume(lines, binary)
+    return processor.log_data, processor.profiler
+
+
+def _process_shard(
+    processor: LogParserProcessor, shard: Shard
+) -> tuple[LogData, Profiler | None]:
+    """Считает статистику по одной части входных данных в процессе пула"""
+    processor._consume_shard(shard)
+    return processor.log_data, processor.profiler
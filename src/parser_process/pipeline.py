@@ -0,0 +1,109 @@
+"""
+Конвейер обработки (--pipeline): чтение, распаковка и разбиение на строки
+идут в фоновом потоке и передаются пачками через ограниченную очередь,
+пока основной поток (или процессы пула) разбирает и считает предыдущие
+пачки. Очередь ограничивает память: чтение ждет, пока разбор догонит его.
+"""
+
+import queue
+import threading
+from collections import deque
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import Executor, Future
+from itertools import islice
+from typing import TypeVar
+
+# Строк в пачке и пачек, которые могут ждать разбора
+PIPELINE_BATCH_SIZE = 1 << 14
+PIPELINE_QUEUE_SIZE = 8
+# Как часто чтение, ждущее места в очереди, проверяет остановку, секунды
+_PUT_TIMEOUT = 0.1
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+class _EndOfInput:
+    """Маркер конца строк в очереди"""
+
+
+def iter_batches_in_thread(
+    lines: Iterable[T],
+    batch_size: int = PIPELINE_BATCH_SIZE,
+    queue_size: int = PIPELINE_QUEUE_SIZE,
+) -> Iterator[list[T]]:
+    """
+    Пачки строк lines, прочитанные в фоновом потоке. Ошибка чтения
+    передается через очередь и возникает у потребителя; если потребитель
+    перестал брать пачки (ошибка разбора, прерывание), чтение
+    останавливается и закрывает источник строк
+    """
+    batches: queue.Queue = queue.Queue(queue_size)
+    stop = threading.Event()
+    reader = threading.Thread(
+        target=_read_batches,
+        args=(iter(lines), batch_size, batches, stop),
+        name="log-reader",
+        daemon=True,
+    )
+    reader.start()
+    try:
+        while not isinstance(item := batches.get(), _EndOfInput):
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+    finally:
+        stop.set()
+
+
+def _read_batches(
+    lines: Iterator[T], batch_size: int, batches: queue.Queue, stop: threading.Event
+) -> None:
+    def put(item) -> bool:
+        while not stop.is_set():
+            try:
+                batches.put(item, timeout=_PUT_TIMEOUT)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    try:
+        while batch := list(islice(lines, batch_size)):
+            if not put(batch):
+                return
+        put(_EndOfInput())
+    except Exception as error:  # noqa: BLE001
+        # Ошибка чтения (файл, распаковка, загрузка URL) любого типа
+        # передается потребителю, иначе он ждал бы следующей пачки бесконечно
+        put(error)
+    finally:
+        # Генератор источника закрывается в том же потоке, где читался
+        close = getattr(lines, "close", None)
+        if close is not None:
+            close()
+
+
+def map_ordered(
+    executor: Executor,
+    function: Callable[..., R],
+    items: Iterable,
+    *args,
+    window: int,
+) -> Iterator[R]:
+    """
+    function(*args, item) для items в пуле executor, результаты по порядку
+    items. В работе не больше window задач, поэтому items читаются по мере
+    готовности результатов, а не все сразу, как в Executor.map
+    """
+    pending: deque[Future] = deque()
+    try:
+        for item in items:
+            pending.append(executor.submit(function, *args, item))
+            if len(pending) >= window:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+    finally:
+        for future in pending:
+            future.cancel()
@@ -0,0 +1,181 @@
+"""
+Профилирование обработки логов (--profile): время по этапам (стена и CPU),
+счетчики строк и байт, размер структур статистики и пиковая память
+процесса. Без --profile обработчик не создает Profiler и не платит за замеры
+"""
+
+import cProfile
+import json
+import sys
+import time
+from collections import Counter
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+
+try:
+    import resource
+except ImportError:
+    # На Windows модуля нет, пиковая память не измеряется
+    resource = None
+
+# Строк в пачке при профилировании: этапы замеряются на пачку, а не на строку
+PROFILE_CHUNK_SIZE = 4096
+# Структуры LogData, размер которых показывает профиль
+LOG_DATA_STRUCTURES = (
+    "sources_statistics",
+    "response_codes_statistics",
+    "response_sizes",
+    "request_types",
+    "ip_statistics",
+    "error_urls",
+    "size_sketch",
+)
+
+
+@dataclass
+class StageStats:
+    wall: float = 0.0
+    cpu: float = 0.0
+    calls: int = 0
+
+
+class Profiler:
+    """
+    Накопитель замеров. Этапы складываются по имени, в том числе из
+    процессов пула (merge): тогда время этапов - сумма по процессам и может
+    превышать общее время, которое идет от start до stop в главном процессе.
+    dump_path - файл для статистики cProfile (pstats) за то же время
+    """
+
+    def __init__(self, dump_path: str | None = None):
+        self.stages: dict[str, StageStats] = {}
+        self.counters: Counter = Counter()
+        self.memory: dict[str, int] = {}
+        self.total: StageStats = StageStats()
+        self.peak_rss: int | None = None
+        # Этапы включают замеры процессов пула
+        self.merged: bool = False
+        self.dump_path: str | None = dump_path
+        self._python_profile: cProfile.Profile | None = None
+        self._started: tuple[float, float] | None = None
+
+    def __getstate__(self) -> dict:
+        # В процессы пула передаются только накопленные замеры
+        state = self.__dict__.copy()
+        state["_python_profile"] = None
+        return state
+
+    def start(self) -> None:
+        if self.dump_path is not None:
+            self._python_profile = cProfile.Profile()
+            self._python_profile.enable()
+        self._started = (time.perf_counter(), time.process_time())
+
+    def stop(self) -> None:
+        wall, cpu = self._started
+        self.total = StageStats(
+            time.perf_counter() - wall, time.process_time() - cpu, 1
+        )
+        self.peak_rss = peak_rss()
+        if self._python_profile is not None:
+            self._python_profile.disable()
+            self._python_profile.dump_stats(self.dump_path)
+            self._python_profile = None
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            yield
+        finally:
+            stats = self.stages.setdefault(name, StageStats())
+            stats.wall += time.perf_counter() - wall
+            stats.cpu += time.process_time() - cpu
+            stats.calls += 1
+
+    def count(self, name: str, value: int) -> None:
+        self.counters[name] += value
+
+    def merge(self, other: "Profiler") -> None:
+        for name, other_stats in other.stages.items():
+            stats = self.stages.setdefault(name, StageStats())
+            stats.wall += other_stats.wall
+            stats.cpu += other_stats.cpu
+            stats.calls += other_stats.calls
+        self.counters.update(other.counters)
+        self.merged = True
+
+    def measure_memory(self, log_data) -> None:
+        """Приблизительный размер структур статистики в байтах"""
+        self.memory = {
+            name: deep_size(getattr(log_data, name)) for name in LOG_DATA_STRUCTURES
+        }
+
+    def to_dict(self) -> dict:
+        return {
+            "total": asdict(self.total),
+            "stages": {name: asdict(stats) for name, stats in self.stages.items()},
+            "counters": dict(self.counters),
+            "memory": self.memory,
+            "peak_rss": self.peak_rss,
+            "merged": self.merged,
+        }
+
+    def save(self, path: str) -> None:
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump(self.to_dict(), file, ensure_ascii=False, indent=2)
+
+    def render_table(self) -> str:
+        rows = [f"{'Этап':<16}{'Время, с':>10}{'CPU, с':>10}{'Доля':>8}"]
+        for name, stats in (*self.stages.items(), ("всего", self.total)):
+            share = stats.wall / self.total.wall if self.total.wall else 0.0
+            rows.append(f"{name:<16}{stats.wall:>10.3f}{stats.cpu:>10.3f}{share:>8.1%}")
+        if self.merged:
+            rows.append(
+                "Время этапов - сумма по процессам пула (процессорное время), "
+                "доля может превышать 100%"
+            )
+        rows.append("")
+        rows.extend(f"{name:<24}{value:>16_}" for name, value in self.counters.items())
+        if self.total.wall and self.counters["lines_read"]:
+            lines_per_second = self.counters["lines_read"] / self.total.wall
+            rows.append(f"{'lines/s':<24}{lines_per_second:>16_.0f}")
+        rows.append("")
+        memory = {**self.memory, "peak_rss": self.peak_rss}
+        rows.extend(
+            f"{name:<24}{format_size(size):>16}" for name, size in memory.items()
+        )
+        return "\n".join(rows)
+
+
+def peak_rss() -> int | None:
+    """Пиковая память текущего процесса в байтах"""
+    if resource is None:
+        return None
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux отдает килобайты, macOS - байты
+    return max_rss if sys.platform == "darwin" else max_rss * 1024
+
+
+def format_size(size: int | None) -> str:
+    return "-" if size is None else f"{size / (1 << 20):.1f} MiB"
+
+
+def deep_size(value, seen: set[int] | None = None) -> int:
+    """Размер объекта вместе с содержимым контейнеров и атрибутами"""
+    seen = set() if seen is None else seen
+    if id(value) in seen:
+        return 0
+    seen.add(id(value))
+    size = sys.getsizeof(value)
+    if isinstance(value, (str, bytes, int, float, bool)) or value is None:
+        return size
+    if isinstance(value, dict):
+        items = (item for pair in value.items() for item in pair)
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        items = value
+    else:
+        # Массивы NumPy учитывают данные в getsizeof, у объектов - атрибуты
+        items = vars(value).values() if hasattr(value, "__dict__") else ()
+    return size + sum(deep_size(item, seen) for item in items)
@@ -0,0 +1,96 @@
+import math
+import os
+import random
+from collections.abc import Iterable, Iterator
+from itertools import count, islice, takewhile
+
+from src.iterators.file_range import align_to_line_start, encoded_size
+from src.parser_process.sharding import Shard
+
+# Блок выборки несжатого файла: диапазон байт, выровненный по началам строк
+SAMPLE_BLOCK_SIZE = 256 << 10
+# Блок выборки сжатых файлов и URL: подряд идущие строки (читаются все)
+SAMPLE_BLOCK_LINES = 1000
+
+
+def iter_selected(fraction: float, seed: int, stratum: int) -> Iterator[int]:
+    """
+    Номера выбранных блоков по возрастанию (бесконечно): блоки делятся на
+    группы по 1 / fraction подряд, из каждой выбирается один случайный.
+    Так выборка равномерна по файлу (а значит, и по времени в нем) и, в
+    отличие от выбора каждого n-го блока, не совпадает по фазе с
+    периодичностью в логах. Случайные числа зависят от seed и stratum
+    (номера файла): повторный запуск по тем же файлам выбирает те же блоки
+    """
+    generator = random.Random(f"{seed}:{stratum}")
+    for group in count():
+        yield math.floor((group + generator.random()) / fraction)
+
+
+def plan_sample_blocks(
+    path: str,
+    fraction: float,
+    seed: int,
+    stratum: int,
+    block_size: int = SAMPLE_BLOCK_SIZE,
+) -> list[Shard]:
+    """
+    Выбранные блоки несжатого файла по block_size байт. Границы блоков
+    выравниваются на начала строк, так что все блоки файла делят его без
+    пропусков и повторов; пустые блоки (внутри длинной строки) пропускаются.
+    Если в файле меньше блоков, чем 1 / fraction, и ни один не выбран,
+    берется один случайный: иначе небольшой лог не дал бы оценок вовсе
+    """
+    size = os.path.getsize(path)
+    blocks_count = math.ceil(size / block_size)
+    indexes = list(
+        takewhile(
+            lambda index: index < blocks_count, iter_selected(fraction, seed, stratum)
+        )
+    )
+    if not indexes and blocks_count:
+        indexes = [random.Random(f"{seed}:{stratum}").randrange(blocks_count)]
+    blocks = []
+    with open(path, "rb") as file:
+        for index in indexes:
+            start = align_to_line_start(file, index * block_size)
+            end = align_to_line_start(file, min((index + 1) * block_size, size))
+            if start < end:
+                blocks.append(Shard(path, start, end))
+    return blocks
+
+
+def iter_sample_runs(
+    lines: Iterable[str | bytes],
+    fraction: float,
+    seed: int,
+    stratum: int,
+    run_lines: int = SAMPLE_BLOCK_LINES,
+) -> Iterator[tuple[int, list[str | bytes] | None]]:
+    """
+    Блоки по run_lines строк потока (сжатый файл, URL): размер блока в
+    байтах (с переводами строк) и строки, если блок выбран, иначе None.
+    Пока ни один блок не выбран, последний невыбранный придерживается: если
+    поток закончится раньше первого выбранного, выбранным отдается он
+    """
+    selected = iter_selected(fraction, seed, stratum)
+    next_selected = next(selected)
+    lines = iter(lines)
+    chosen, held = False, None
+    for index in count():
+        run = list(islice(lines, run_lines))
+        if not run:
+            break
+        size = encoded_size(run) + len(run)
+        if held is not None:
+            yield held[0], None
+            held = None
+        if index == next_selected:
+            next_selected, chosen = next(selected), True
+            yield size, run
+        elif not chosen:
+            held = size, run
+        else:
+            yield size, None
+    if held is not None:
+        yield held
@@ -0,0 +1,128 @@
+import os
+from collections.abc import Iterator
+from dataclasses import dataclass
+from itertools import pairwise
+
+from src.iterators.compression import (
+    detect_file_compression,
+    iter_log_bytes,
+    open_log_file,
+)
+from src.iterators.file_range import (
+    align_to_line_start,
+    iter_mmap_lines,
+    open_file_range,
+)
+
+# Файлы меньше этого размера не делятся на части
+MIN_SHARD_SIZE = 32 << 20
+# Частей на процесс: несколько частей сглаживают разницу в скорости их обработки
+SHARDS_PER_WORKER = 4
+# Во сколько раз сжатый файл разбирается дольше несжатого того же размера
+COMPRESSED_WORK_FACTOR = 8
+
+
+@dataclass(frozen=True)
+class Shard:
+    """Часть входных данных: диапазон байт [start, end) файла, end=None - до конца"""
+
+    path: str
+    start: int = 0
+    end: int | None = None
+
+
+def plan_shards(
+    files: list[str], workers: int, min_shard_size: int = MIN_SHARD_SIZE
+) -> list[Shard]:
+    """
+    Делит файлы на части для параллельной обработки
+
+    Границы частей внутри файла выравниваются на начала строк, части
+    идут в порядке файлов и смещений, так что их последовательное
+    объединение дает тот же результат, что и обработка файлов целиком.
+    Сжатые файлы не делятся: каждый распаковывается целиком в своем процессе.
+    """
+    pieces = split_shards([Shard(path) for path in files], workers, min_shard_size)
+    return [shard for shard_pieces in pieces for shard in shard_pieces]
+
+
+def split_shards(
+    shards: list[Shard], workers: int, min_shard_size: int = MIN_SHARD_SIZE
+) -> list[list[Shard]]:
+    """
+    Делит части файлов на более мелкие так же, как plan_shards, и
+    возвращает для каждой части список ее кусков по порядку
+    """
+    sizes = [_shard_size(shard) for shard in shards]
+    target_size = max(min_shard_size, sum(sizes) // (workers * SHARDS_PER_WORKER))
+
+    pieces = []
+    for shard, size in zip(shards, sizes):
+        if size <= target_size or (
+            _is_whole_file(shard) and detect_file_compression(shard.path) is not None
+        ):
+            pieces.append([shard])
+            continue
+        end = shard.start + size
+        with open(shard.path, "rb") as file:
+            boundaries = sorted(
+                {
+                    align_to_line_start(file, offset)
+                    for offset in range(shard.start, end, target_size)
+                }
+            )
+        boundaries.append(end)
+        pieces.append(
+            [
+                Shard(shard.path, start, piece_end)
+                for start, piece_end in pairwise(boundaries)
+                if start < piece_end
+            ]
+        )
+    return pieces
+
+
+def schedule_order(shards: list[Shard]) -> list[int]:
+    """
+    Номера частей в порядке запуска: сначала самые большие (сжатые файлы
+    с весом COMPRESSED_WORK_FACTOR), чтобы в конце обработки процессы не
+    ждали одну долгую часть, запущенную последней
+    """
+
+    def work(index: int) -> int:
+        shard = shards[index]
+        size = _shard_size(shard)
+        if _is_whole_file(shard) and detect_file_compression(shard.path) is not None:
+            return size * COMPRESSED_WORK_FACTOR
+        return size
+
+    return sorted(range(len(shards)), key=work, reverse=True)
+
+
+def _shard_size(shard: Shard) -> int:
+    if shard.end is None:
+        return os.path.getsize(shard.path) - shard.start
+    return shard.end - shard.start
+
+
+def _is_whole_file(shard: Shard) -> bool:
+    return shard.start == 0 and shard.end is None
+
+
+def iter_shard_lines(shard: Shard) -> Iterator[str]:
+    """Непустые строки части файла, как их отдает LocalPathIterator"""
+    if _is_whole_file(shard):
+        file = open_log_file(shard.path)
+    else:
+        file = open_file_range(shard.path, shard.start, shard.end)
+    with file:
+        for line in file:
+            if line.strip():
+                yield line.strip()
+
+
+def iter_shard_bytes(shard: Shard) -> Iterator[bytes]:
+    """Непустые строки части файла в байтах, как LocalPathIterator.iter_bytes"""
+    if _is_whole_file(shard):
+        return iter_log_bytes(shard.path)
+    return iter_mmap_lines(shard.path, shard.start, shard.end)
@@ -0,0 +1,110 @@
+from datetime import date, datetime
+
+# Формат поля time_local в логах NGINX: 09/Nov/2024:10:00:00 +0000
+TIME_LOCAL_FORMAT = "%d/%b/%Y:%H:%M:%S %z"
+
+_MONTHS: dict[str, int] = {
+    name: number
+    for number, name in enumerate(
+        (
+            "Jan",
+            "Feb",
+            "Mar",
+            "Apr",
+            "May",
+            "Jun",
+            "Jul",
+            "Aug",
+            "Sep",
+            "Oct",
+            "Nov",
+            "Dec",
+        ),
+        start=1,
+    )
+}
+_EPOCH_ORDINAL: int = date(1970, 1, 1).toordinal()
+
+
+class TimeDecoder:
+    """
+    Переводит значение time_local в секунды Unix-времени
+
+    Строки канонического вида разбираются вручную по фиксированным позициям,
+    остальные - через datetime.strptime. Запоминается последняя строка
+    (соседние строки лога обычно приходятся на одну секунду) и начало суток
+    с учетом смещения для последней даты.
+    """
+
+    def __init__(self):
+        self._last_time: str | None = None
+        self._last_timestamp: int = 0
+        self._last_day: str | None = None
+        self._last_day_start: int = 0
+
+    def decode(self, time_local: str) -> int:
+        if time_local == self._last_time:
+            return self._last_timestamp
+
+        timestamp = self._decode_fast(time_local)
+        if timestamp is None:
+            timestamp = int(
+                datetime.strptime(time_local, TIME_LOCAL_FORMAT).timestamp()
+            )
+
+        self._last_time = time_local
+        self._last_timestamp = timestamp
+        return timestamp
+
+    def _decode_fast(self, time_local: str) -> int | None:
+        # dd/Mon/yyyy:HH:MM:SS +hhmm
+        if (
+            len(time_local) != 26
+            or time_local[2] != "/"
+            or time_local[6] != "/"
+            or time_local[11] != ":"
+            or time_local[14] != ":"
+            or time_local[17] != ":"
+            or time_local[20] != " "
+        ):
+            return None
+        clock = time_local[12:14] + time_local[15:17] + time_local[18:20]
+        if not clock.isdecimal() or not clock.isascii():
+            return None
+        hours, minutes, seconds = int(clock[:2]), int(clock[2:4]), int(clock[4:])
+        if hours > 23 or minutes > 59 or seconds > 59:
+            return None
+
+        day_key = time_local[:11] + time_local[21:]
+        if day_key != self._last_day:
+            day_start = self._day_start(time_local)
+            if day_start is None:
+                return None
+            self._last_day = day_key
+            self._last_day_start = day_start
+
+        return self._last_day_start + hours * 3600 + minutes * 60 + seconds
+
+    @staticmethod
+    def _day_start(time_local: str) -> int | None:
+        """Начало суток в UTC с учетом смещения или None для нестандартной даты"""
+        month = _MONTHS.get(time_local[3:6])
+        day, year, offset = time_local[0:2], time_local[7:11], time_local[22:26]
+        digits = day + year + offset
+        if month is None or not digits.isdecimal() or not digits.isascii():
+            return None
+        sign = time_local[21]
+        if sign not in "+-":
+            return None
+        offset_hours, offset_minutes = int(offset[:2]), int(offset[2:])
+        if offset_hours > 23 or offset_minutes > 59:
+            return None
+        try:
+            days = date(int(year), month, int(day)).toordinal() - _EPOCH_ORDINAL
+        except ValueError:
+            return None
+
+        offset_seconds = offset_hours * 3600 + offset_minutes * 60
+        if sign == "-":
+            offset_seconds = -offset_seconds
+        return days * 86400 - offset_seconds
@@ -0,0 +1,220 @@
+import json
+import os
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from typing import BinaryIO
+
+from src.databases.state_store import FileState
+from src.iterators.compression import detect_file_compression, iter_log_bytes
+from src.iterators.file_range import ASCII_WHITESPACE, align_to_line_start
+from src.iterators.local_path_iterator import TIME_INDEX_SUFFIX
+from src.parser_process.line_parser import LineParser
+from src.parser_process.sharding import Shard
+
+# Версия формата индекса; индекс другой версии строится заново
+INDEX_VERSION = 1
+# Шаг индекса: смещение начала каждой новой минуты
+BUCKET_SECONDS = 60
+# Насколько строка лога без индекса может быть старше предыдущих строк:
+# NGINX пишет запросы по завершении, поэтому время почти монотонно
+SEARCH_SLACK = 300
+# Двоичный поиск останавливается, когда диапазон меньше этого размера
+SEARCH_BLOCK_SIZE = 64 << 10
+
+_time_parser = LineParser(("time_local",))
+
+
+@dataclass
+class TimeIndex:
+    """
+    Индекс времени файла лога
+
+    buckets - пары [начало минуты, смещение строки], по одной на каждую
+    минуту, в которой время впервые превысило все предыдущие строки; все
+    строки до смещения записаны раньше этой минуты. disorder - на сколько
+    секунд строка бывает старше самой поздней из предыдущих строк (0 для
+    монотонного лога). Вместе они дают диапазон байт для любого интервала
+    --from/--to без предположений о порядке строк. size - конец последней
+    полной строки на момент построения. Для сжатых файлов полезны только
+    min_time и max_time: файл вне интервала пропускается целиком.
+    """
+
+    device: int
+    inode: int
+    size: int
+    head: str
+    compressed: bool = False
+    min_time: int | None = None
+    max_time: int | None = None
+    disorder: int = 0
+    buckets: list[list[int]] = field(default_factory=list)
+
+    @classmethod
+    def build(cls, path: str, decode_time: Callable[[str], int]) -> "TimeIndex":
+        """Индекс по всему файлу: один проход, из строк разбирается только время"""
+        stat = os.stat(path)
+        index = cls(
+            stat.st_dev,
+            stat.st_ino,
+            stat.st_size,
+            FileState.read_head(path, stat.st_size),
+        )
+        if detect_file_compression(path) is not None:
+            index.compressed = True
+            for line in iter_log_bytes(path):
+                index._add(_line_time(line, decode_time), None)
+            return index
+
+        with open(path, "rb") as file:
+            offset = 0
+            for line in file:
+                if not line.endswith(b"\n"):
+                    # Недописанная строка войдет в конец файла после индекса
+                    break
+                index._add(_line_time(line, decode_time), offset)
+                offset += len(line)
+        index.size = offset
+        return index
+
+    def _add(self, timestamp: int | None, offset: int | None) -> None:
+        if timestamp is None:
+            return
+        if self.max_time is None:
+            self.min_time = self.max_time = timestamp
+        elif timestamp < self.max_time:
+            self.disorder = max(self.disorder, self.max_time - timestamp)
+            self.min_time = min(self.min_time, timestamp)
+        else:
+            self.max_time = timestamp
+        bucket = timestamp - timestamp % BUCKET_SECONDS
+        if offset is not None and (not self.buckets or bucket > self.buckets[-1][0]):
+            self.buckets.append([bucket, offset])
+
+    @staticmethod
+    def index_path(path: str) -> str:
+        return path + TIME_INDEX_SUFFIX
+
+    @classmethod
+    def load(cls, path: str) -> "TimeIndex | None":
+        """
+        Индекс файла, если он есть и относится к этому файлу: тот же inode и
+        начало файла, файл не стал короче (дописанный конец не индексирован)
+        """
+        try:
+            with open(cls.index_path(path), encoding="utf-8") as file:
+                data = json.load(file)
+            stat = os.stat(path)
+        except (OSError, ValueError):
+            return None
+        if data.pop("version", None) != INDEX_VERSION:
+            return None
+        index = cls(**data)
+        if (
+            (index.device, index.inode) != (stat.st_dev, stat.st_ino)
+            or stat.st_size < index.size
+            or (index.compressed and stat.st_size != index.size)
+            or FileState.read_head(path, index.size) != index.head
+        ):
+            return None
+        return index
+
+    def save(self, path: str) -> None:
+        """Атомарно записывает индекс рядом с файлом"""
+        index_path = self.index_path(path)
+        with open(f"{index_path}.tmp", "w", encoding="utf-8") as file:
+            file.write(json.dumps({"version": INDEX_VERSION, **vars(self)}))
+        os.replace(f"{index_path}.tmp", index_path)
+
+    def shards(self, path: str, start_ts: float, end_ts: float) -> list[Shard]:
+        """
+        Части файла, в которых могут быть строки из [start_ts, end_ts].
+        Конец файла, дописанный после построения индекса, читается всегда
+        """
+        tail = [] if os.path.getsize(path) == self.size else [Shard(path, self.size)]
+        if self.max_time is None or self.max_time < start_ts or self.min_time > end_ts:
+            return tail
+        if self.compressed:
+            return [Shard(path)]
+
+        # До смещения минуты все строки раньше нее: берем последнюю минуту <= start
+        start = 0
+        for bucket, offset in self.buckets:
+            if bucket > start_ts:
+                break
+            start = offset
+        # После смещения минуты строки не раньше bucket - disorder
+        end = self.size
+        for bucket, offset in self.buckets:
+            if bucket - self.disorder > end_ts:
+                end = offset
+                break
+
+        if tail and end == self.size:
+            return [Shard(path, start)]
+        return [Shard(path, start, end), *tail] if start < end else tail
+
+
+def search_shards(
+    path: str, start_ts: float, end_ts: float, decode_time: Callable[[str], int]
+) -> list[Shard]:
+    """
+    Части файла без индекса: двоичный поиск по времени строк в предположении,
+    что строка не старше предыдущих больше чем на SEARCH_SLACK секунд.
+    Сжатый файл читается целиком
+    """
+    if detect_file_compression(path) is not None:
+        return [Shard(path)]
+    size = os.path.getsize(path)
+    with open(path, "rb") as file:
+        start = _search_offset(file, size, start_ts - SEARCH_SLACK, decode_time)
+        end = _search_offset(file, size, end_ts + SEARCH_SLACK, decode_time, after=True)
+    return [Shard(path, start, end)] if start < end else []
+
+
+def _search_offset(
+    file: BinaryIO,
+    size: int,
+    timestamp: float,
+    decode_time: Callable[[str], int],
+    after: bool = False,
+) -> int:
+    """
+    Начало строки, до которого все строки раньше timestamp (after=True - не
+    позже timestamp). Результат выровнен на начало строки
+    """
+    low, high = 0, size
+    while high - low > SEARCH_BLOCK_SIZE:
+        middle = align_to_line_start(file, (low + high) // 2)
+        line_time = _next_line_time(file, middle, high, decode_time)
+        if line_time is None:
+            high = (low + high) // 2
+        elif line_time < timestamp or (after and line_time == timestamp):
+            low = middle
+        else:
+            high = middle
+    return align_to_line_start(file, high if after else low)
+
+
+def _next_line_time(
+    file: BinaryIO, offset: int, end: int, decode_time: Callable[[str], int]
+) -> int | None:
+    """Время первой разобранной строки, начинающейся в [offset, end)"""
+    file.seek(offset)
+    while file.tell() < end:
+        line = file.readline()
+        if not line:
+            break
+        timestamp = _line_time(line, decode_time)
+        if timestamp is not None:
+            return timestamp
+    return None
+
+
+def _line_time(line: bytes, decode_time: Callable[[str], int]) -> int | None:
+    values = _time_parser.parse_values_bytes(line.strip(ASCII_WHITESPACE))
+    if values is None:
+        return None
+    try:
+        return decode_time(values[0])
+    except ValueError:
+        return None
@@ -1,12 +1,43 @@
-import numpy as np
+import csv
+import heapq
+import io
+from collections.abc import Iterable, Iterator
+from functools import cache
 from http import HTTPStatus
+from itertools import islice, repeat, starmap
+from operator import itemgetter
+from typing import Protocol
+
+from src.databases.sampling import CONFIDENCE_LEVEL
+from src.databases.sketches import TopKCounter
+from src.renderer.serialization import dumps
+
+# Сколько строк таблицы собирается в одну запись в поток
+ROWS_PER_WRITE = 1024
+
+# Машиночитаемые форматы: строки статистики записями
+MACHINE_FORMATS = ("json", "ndjson", "csv")
+# Колонки CSV: секция, ключ строки, имя статуса, количество или значение
+CSV_COLUMNS = ("section", "key", "name", "value")
+
+
+class TextWriter(Protocol):
+    def write(self, text: str, /) -> int | None: ...
 
 
 class LogDataRepr:
-    """Класс для репрезентации данных о логах в различных форматах"""
+    """
+    Класс для репрезентации данных о логах в различных форматах
+
+    Отчет строится по частям и пишется в поток (write), строки больших
+    таблиц - пачками по ROWS_PER_WRITE, так что отчет целиком в памяти не
+    собирается. top - не больше top самых частых строк в каждой секции.
+    Статистика при построении отчета не изменяется.
+    """
 
-    def __init__(self, log_data):
+    def __init__(self, log_data, top: int | None = None):
         self.log_data = log_data
+        self.top = top
         self.from_date_str = log_data.from_date if log_data.from_date else "-"
         self.to_date_str = log_data.to_date if log_data.to_date else "-"
 
@@ -16,40 +47,182 @@ class LogDataRepr:
 
     @property
     def _total_req_amount(self) -> str:
-        return f"{self.log_data.total_requests_cnt:_}"
+        total = f"{self.log_data.total_requests_cnt:_}"
+        sample = self.log_data.sample
+        if sample is not None and (error := sample.total_error()) is not None:
+            return f"{total} ± {error:_.0f}"
+        return total
 
     @property
     def _aver_response(self) -> str:
         if self.log_data.total_requests_cnt > 0:
-            return f"{np.mean(self.log_data.response_sizes):_.2f}"
+            mean = f"{self.log_data.size_quantiles.mean():_.2f}"
+            sample = self.log_data.sample
+            if (
+                sample is not None
+                and (error := sample.mean_error(self.log_data.size_quantiles))
+                is not None
+            ):
+                return f"{mean} ± {error:_.2f}"
+            return mean
         return "-"
 
     @property
-    def _percent_95(self) -> str:
-        if self.log_data.response_sizes:
-            return f"{np.percentile(sorted(self.log_data.response_sizes), 95):_.2f}"
-        return "-"
+    def _percentiles(self) -> list[tuple[str, str]]:
+        """
+        Пары (перцентиль, значение) размера ответа, например ("95", "6_566.80"),
+        по выборке - с доверительным интервалом: "6_566.80 [6_400.00; 6_700.00]"
+        """
+        quantiles = self.log_data.size_quantiles
+        sample = self.log_data.sample
+        percentiles = []
+        for percent in self.log_data.percentiles:
+            value = f"{quantiles.percentile(percent):_.2f}" if len(quantiles) else "-"
+            if (
+                sample is not None
+                and (interval := sample.percentile_interval(quantiles, percent))
+                is not None
+            ):
+                value += f" [{interval[0]:_.2f}; {interval[1]:_.2f}]"
+            percentiles.append((f"{percent:g}", value))
+        return percentiles
 
-    def _prepare(self) -> None:
-        self.log_data.response_codes_statistics = dict(
-            sorted(self.log_data.response_codes_statistics.items())
+    @property
+    def _sample_str(self) -> str:
+        """Описание выборки (--sample), пустая строка - отчет по всем логам"""
+        sample = self.log_data.sample
+        if sample is None:
+            return ""
+        return (
+            f"{sample.fraction * 100:g}% логов, блоков: {sample.units:_}, "
+            f"интервалы {CONFIDENCE_LEVEL:.0%}"
         )
 
+    def _share_str(self, code: str) -> str:
+        """Доля запросов с кодом ответа по выборке и ее доверительный интервал"""
+        share, error = self.log_data.sample.share(code)
+        if error is None:
+            return f"{share:.2%}"
+        return f"{share:.2%} ± {error:.2%}"
+
+    @property
+    def _distinct_estimates(self) -> list[tuple[str, str]]:
+        """Оценки количества различных ключей для счетчиков в режиме топ-K"""
+        return [
+            (name, f"≈{counter.distinct.count():_}")
+            for name, counter in (
+                ("Уникальных ресурсов", self.log_data.sources_statistics),
+                ("Уникальных IP-адресов", self.log_data.ip_statistics),
+            )
+            if isinstance(counter, TopKCounter)
+        ]
+
+    def _counter_rows(self, counter: dict[str, int]) -> list[tuple[str, int]]:
+        """
+        Строки таблицы счетчика: для топ-K только самые частые ключи, с top -
+        не больше top самых частых ключей по убыванию
+        """
+        if isinstance(counter, TopKCounter):
+            return counter.top(self.top)
+        if self.top is not None:
+            return heapq.nlargest(self.top, counter.items(), key=itemgetter(1))
+        return list(counter.items())
+
+    def _ranked_rows(self, counter: dict[str, int]) -> list[tuple[str, int]]:
+        """Строки счетчика по убыванию количества"""
+        rows = self._counter_rows(counter)
+        if isinstance(counter, TopKCounter) or self.top is not None:
+            # heapq.nlargest уже вернул строки по убыванию
+            return rows
+        return sorted(rows, key=itemgetter(1), reverse=True)
+
+    def _code_rows(self) -> list[tuple[str, int]]:
+        """Строки кодов ответа (с top - самые частые) по порядку кодов"""
+        return sorted(self._counter_rows(self.log_data.response_codes_statistics))
+
+    @staticmethod
+    def _column_widths(
+        rows: list[tuple[str, int]], key_title: str, count_title: str
+    ) -> tuple[int, int]:
+        """
+        Ширины колонок ключа и количества без отступов. Длины ключей и
+        наибольшее количество считаются map по строкам, без str() для
+        каждого значения: самое длинное число - наибольшее
+        """
+        if not rows:
+            return len(key_title), len(count_title)
+        return (
+            max(len(key_title), max(map(len, map(itemgetter(0), rows)))),
+            max(len(count_title), len(str(max(map(itemgetter(1), rows))))),
+        )
+
+    def _top_k_note(self, counter: dict[str, int]) -> str:
+        """Пометка к заголовку секции счетчика в режиме топ-K или с top"""
+        if isinstance(counter, TopKCounter):
+            k = counter.k if self.top is None else min(counter.k, self.top)
+            return f" (топ-{k}, погрешность ±{counter.floor:_})"
+        if self.top is not None and len(counter) > self.top:
+            return f" (топ-{self.top} из {len(counter):_})"
+        return ""
+
+    def _error_urls(self) -> tuple[list[str], str]:
+        """Ресурсы с ошибками по алфавиту (с top - первые top) и пометка о пропущенных"""
+        error_urls = self.log_data.error_urls
+        if self.top is None or len(error_urls) <= self.top:
+            return sorted(error_urls), ""
+        return heapq.nsmallest(self.top, error_urls), f", … (всего {len(error_urls):_})"
+
     def get_repr(self, format_type: str) -> str:
-        self._prepare()
+        output = io.StringIO()
+        self.write(output, format_type)
+        return output.getvalue()
+
+    def write(self, stream: TextWriter, format_type: str) -> None:
+        """Пишет отчет в поток по частям"""
         match format_type:
             case "markdown":
-                return self._generate_markdown_repr()
+                parts = self._iter_markdown_repr
             case "adoc":
-                return self._generate_adoc_repr()
+                parts = self._iter_adoc_repr
+            case "json":
+                parts = self._iter_json_repr
+            case "ndjson":
+                parts = self._iter_ndjson_repr
+            case "csv":
+                parts = self._iter_csv_repr
             case _:
                 raise ValueError("Unknown format type")
+        for part in parts():
+            stream.write(part)
 
     @staticmethod
-    def _calculate_column_width(column_data, min_width: int = 2) -> int:
-        return max(len(str(data)) for data in column_data) + min_width
+    def _join_rows(rows: Iterable[str]) -> Iterator[str]:
+        """Строки таблицы, склеенные пачками по ROWS_PER_WRITE"""
+        rows = iter(rows)
+        while chunk := "".join(islice(rows, ROWS_PER_WRITE)):
+            yield chunk
+
+    @classmethod
+    def _format_rows(cls, template: str, rows: Iterable[tuple]) -> Iterator[str]:
+        """
+        Строки таблицы по шаблону str.format с уже известными ширинами:
+        форматирование идет в starmap, без Python-функции на строку
+        """
+        return cls._join_rows(starmap(template.format, rows))
+
+    @staticmethod
+    def _join_list(items: Iterable[str], template: str = "{}") -> Iterator[str]:
+        """Элементы через запятую, пачками по ROWS_PER_WRITE"""
+        items = iter(items)
+        separator = ""
+        while batch := list(islice(items, ROWS_PER_WRITE)):
+            yield separator + ", ".join(map(template.format, batch))
+            separator = ", "
+
+    def _iter_markdown_repr(self) -> Iterator[str]:
+        percentiles = self._percentiles
+        distinct_estimates = self._distinct_estimates
 
-    def _generate_markdown_repr(self) -> str:
         # ширина 2ой колонки основной информации
         general_inform_second_col_width = (
             max(
@@ -58,173 +231,433 @@ class LogDataRepr:
                 len(self.to_date_str),
                 len(self._total_req_amount),
                 len(self._aver_response),
-                len(self._percent_95),
+                len(self._sample_str),
+                *(len(value) for _, value in percentiles),
+                *(len(value) for _, value in distinct_estimates),
                 len("Значение"),
             )
             + 1
         )
 
-        # ширина 1ой колонки таблицы с ресурсами
-        req_res_first_col_width = self._calculate_column_width(
-            [*self.log_data.sources_statistics.keys(), "Ресурс"], 2
+        yield (
+            f"#### Общая информация\n\n"
+            f"|{'Метрика':^23}|{'Значение':>{general_inform_second_col_width}}|\n"
+            f"|:{'-' * 21}:|{'-' * (general_inform_second_col_width - 1)}:|\n"
+            f"|{'Файл(-ы)':^23}|{self._name_str:>{general_inform_second_col_width}}|\n"
+            f"|{'Начальная дата':^23}|{self.from_date_str:>{general_inform_second_col_width}}|\n"
+            f"|{'Конечная дата':^23}|{self.to_date_str:>{general_inform_second_col_width}}|\n"
+        )
+        if self.log_data.sample is not None:
+            yield f"|{'Выборка':^23}|{self._sample_str:>{general_inform_second_col_width}}|\n"
+        yield (
+            f"|{'Количество запросов':^23}|{self._total_req_amount:>{general_inform_second_col_width}}|\n"
+            f"|{'Средний размер ответа':^23}|{self._aver_response:>{general_inform_second_col_width}}|\n"
         )
+        # строки перцентилей размера ответа
+        for percent, value in percentiles:
+            yield f"|{f'{percent}p размера ответа':^23}|{value:>{general_inform_second_col_width}}|\n"
+        # строки оценок количества различных ключей (режим топ-K)
+        for name, value in distinct_estimates:
+            yield f"|{name:^23}|{value:>{general_inform_second_col_width}}|\n"
+
+        source_rows = self._counter_rows(self.log_data.sources_statistics)
 
-        # ширина 2ой колонки таблицы с ресурсами
-        req_res_second_col_width = self._calculate_column_width(
-            [*self.log_data.sources_statistics.values(), "Количество"]
+        # ширины колонок таблицы с ресурсами
+        req_res_first_col_width, req_res_second_col_width = (
+            width + 2
+            for width in self._column_widths(source_rows, "Ресурс", "Количество")
         )
 
-        # сама таблица с ресурсами
-        sources_table = "".join(
-            f"|{f'`{source}`':^{req_res_first_col_width}}|{amount:>{req_res_second_col_width}_}|\n"
-            for source, amount in self.log_data.sources_statistics.items()
+        # таблица с ресурсами
+        yield (
+            f"\n#### Запрашиваемые ресурсы{self._top_k_note(self.log_data.sources_statistics)}\n\n"
+            f"|{'Ресурс':^{req_res_first_col_width}}|{'Количество':>{req_res_second_col_width}}|\n"
+            f"|:{'-' * (req_res_first_col_width - 2)}:|{'-' * (req_res_second_col_width - 1)}:|\n"
+        )
+        yield from self._format_rows(
+            f"|{{:^{req_res_first_col_width}}}|{{:>{req_res_second_col_width}_}}|\n",
+            zip(
+                map("`{}`".format, map(itemgetter(0), source_rows)),
+                map(itemgetter(1), source_rows),
+            ),
         )
 
+        code_rows = [
+            (code, status_phrase(code), cnt) for code, cnt in self._code_rows()
+        ]
+
         # ширина 1ой колонки таблицы с кодами ответа
         code_first_col_width = 5
-        # ширина 2ой колонки таблицы с кодами ответа
-        code_second_col_width = self._calculate_column_width(
-            [
-                self._get_status_name(code)
-                for code in self.log_data.response_codes_statistics.keys()
-            ]
-            + ["Имя"],
-            2,
-        )
-        # ширина 3ей колонки таблицы с кодами ответа
-        code_third_col_width = self._calculate_column_width(
-            [*self.log_data.response_codes_statistics.values(), "Количество"], 2
+        # ширины 2ой и 3ей колонок таблицы с кодами ответа
+        code_second_col_width, code_third_col_width = (
+            width + 2
+            for width in self._column_widths(
+                [(name, cnt) for _, name, cnt in code_rows], "Имя", "Количество"
+            )
         )
-        # сама таблица с кодами ответа
-        codes_table = "".join(
-            f"|{code:^5}|{self._get_status_name(code):^{code_second_col_width}}|{cnt:>{code_third_col_width}_}|\n"
-            for code, cnt in self.log_data.response_codes_statistics.items()
+        # таблица с кодами ответа
+        yield (
+            f"\n#### Коды ответа{self._top_k_note(self.log_data.response_codes_statistics)}\n\n"
+            f"|{'Код':^{code_first_col_width}}|{'Имя':^{code_second_col_width}}|{'Количество':>{code_third_col_width}}|"
         )
+        if self.log_data.sample is None:
+            yield (
+                f"\n|:{'-' * (code_first_col_width - 2)}:|:{'-' * (code_second_col_width - 2)}:|{'-' * (code_third_col_width - 1)}:|\n"
+            )
+            yield from self._format_rows(
+                f"|{{:^5}}|{{:^{code_second_col_width}}}|{{:>{code_third_col_width}_}}|\n",
+                code_rows,
+            )
+        else:
+            # по выборке - колонка с долями кодов и их интервалами
+            code_rows = [(*row, self._share_str(row[0])) for row in code_rows]
+            code_fourth_col_width = (
+                max([len("Доля"), *(len(share) for *_, share in code_rows)]) + 2
+            )
+            yield (
+                f"{'Доля':>{code_fourth_col_width}}|\n"
+                f"|:{'-' * (code_first_col_width - 2)}:|:{'-' * (code_second_col_width - 2)}:|{'-' * (code_third_col_width - 1)}:|{'-' * (code_fourth_col_width - 1)}:|\n"
+            )
+            yield from self._format_rows(
+                f"|{{:^5}}|{{:^{code_second_col_width}}}|{{:>{code_third_col_width}_}}|{{:>{code_fourth_col_width}}}|\n",
+                code_rows,
+            )
 
-        # ширина 1ой колонки таблицы с типами запросов
-        source_first_col_width = self._calculate_column_width(
-            [*self.log_data.request_types.keys(), "Тип запроса"], 2
+        request_rows = self._counter_rows(self.log_data.request_types)
+
+        # ширины колонок таблицы с типами запросов
+        source_first_col_width, source_second_col_width = (
+            width + 2
+            for width in self._column_widths(request_rows, "Тип запроса", "Количество")
         )
 
-        # ширина 2ой колонки таблицы с типами запросов
-        source_second_col_width = self._calculate_column_width(
-            [*self.log_data.request_types.values(), "Количество"], 2
+        # таблица с типами запросов
+        yield (
+            f"\n#### Статистика по запросам{self._top_k_note(self.log_data.request_types)}\n\n"
+            f"|{'Тип запроса':^{source_first_col_width}}|{'Количество':^{source_second_col_width}}|\n"
+            f"|:{'-' * (source_first_col_width - 2)}:|:{'-' * (source_second_col_width - 2)}:|\n"
         )
+        yield from self._format_rows(
+            f"|{{:^{source_first_col_width}}}| {{:{source_second_col_width - 1}_}}|\n",
+            request_rows,
+        )
+        if not request_rows:
+            yield "\n"
+
+        # IP-адреса по убыванию количества запросов
+        ip_rows = self._ranked_rows(self.log_data.ip_statistics)
 
-        # сама таблица с типами запросов
-        source_table = "\n".join(
-            f"|{request:^{source_first_col_width}}| {cnt:{source_second_col_width - 1}_}|"
-            for request, cnt in self.log_data.request_types.items()
+        # ширины колонок таблицы с IP-адресами
+        ip_stat_first_col_width, ip_stat_second_col_width = (
+            width + 2
+            for width in self._column_widths(ip_rows, "IP-адрес", "Кол-во запросов")
         )
 
-        # ширина 1ой колонки таблицы с IP-адресами
-        ip_stat_first_col_width = self._calculate_column_width(
-            [*self.log_data.ip_statistics.keys(), "IP-адрес"], 2
+        # таблица с IP-адресами
+        yield (
+            f"\n#### Статистика по IP-адресам{self._top_k_note(self.log_data.ip_statistics)}\n\n"
+            f"|{'IP-адрес':^{ip_stat_first_col_width}}|{'Кол-во запросов':>{ip_stat_second_col_width}}|\n"
+            f"|:{'-' * (ip_stat_first_col_width - 2)}:|:{'-' * (ip_stat_second_col_width - 2)}:|\n"
         )
-        # ширина 2ой колонки таблицы с IP-адресами
-        ip_stat_second_col_width = self._calculate_column_width(
-            [*self.log_data.ip_statistics.values(), "Кол-во запросов"], 2
+        yield from self._format_rows(
+            f"|{{:^{ip_stat_first_col_width}}}|{{:>{ip_stat_second_col_width}_}}|\n",
+            ip_rows,
         )
+        if not ip_rows:
+            yield "\n"
 
-        # сортировка по количеству запросов
-        self.log_data.ip_statistics = dict(
-            sorted(
-                self.log_data.ip_statistics.items(),
-                key=lambda item: item[1],
-                reverse=True,
-            )
-        )
+        # URL, вызвавшие ошибки
+        error_urls, omitted = self._error_urls()
+        yield "\n#### Ресурсы с ошибками\n\n"
+        yield from self._join_list(error_urls)
+        yield omitted
 
-        # сама таблица с IP-адресами
-        ip_statistics_table = "\n".join(
-            f"|{ip:^{ip_stat_first_col_width}}|{cnt:>{ip_stat_second_col_width}_}|"
-            for ip, cnt in self.log_data.ip_statistics.items()
-        )
+    def _summary(self) -> dict:
+        """Общая информация для машиночитаемых форматов: числа без форматирования"""
+        log_data = self.log_data
+        quantiles = log_data.size_quantiles
+        has_sizes = len(quantiles) > 0
+        summary = {
+            "files": list(log_data.file_names),
+            "from_date": log_data.from_date,
+            "to_date": log_data.to_date,
+            "total_requests": log_data.total_requests_cnt,
+            "average_response_size": (
+                float(quantiles.mean())
+                if has_sizes and log_data.total_requests_cnt
+                else None
+            ),
+            "percentiles": {
+                f"{percent:g}": (
+                    float(quantiles.percentile(percent)) if has_sizes else None
+                )
+                for percent in log_data.percentiles
+            },
+            "error_urls_total": len(log_data.error_urls),
+        }
+        if log_data.sample is not None:
+            summary["sample"] = self._sample_summary()
+        for name, counter in (
+            ("sources", log_data.sources_statistics),
+            ("ips", log_data.ip_statistics),
+        ):
+            if isinstance(counter, TopKCounter):
+                # Приближенный счетчик: оценки различных ключей и погрешность
+                summary.setdefault("top_k", {})[name] = {
+                    "k": counter.k,
+                    "error": counter.floor,
+                    "distinct": counter.distinct.count(),
+                }
+        return summary
 
-        # ширина 1ой колонки таблицы с URL, вызвавшими ошибки
-        error_url = ", ".join(self.log_data.error_urls)
+    def _sample_summary(self) -> dict:
+        """
+        Выборка (--sample) для машиночитаемых форматов: доля логов, блоки и
+        доверительные интервалы оценок, null - интервал не оценить
+        """
+        log_data = self.log_data
+        sample = log_data.sample
+        quantiles = log_data.size_quantiles
+        total_error = sample.total_error()
+        mean_error = sample.mean_error(quantiles) if len(quantiles) else None
+        mean = quantiles.mean() if len(quantiles) else None
+        shares = {}
+        for code, _ in self._code_rows():
+            share, error = sample.share(code)
+            shares[code] = {
+                "share": share,
+                "interval": None if error is None else [share - error, share + error],
+            }
+        return {
+            "fraction": sample.fraction,
+            "units": sample.units,
+            "confidence": CONFIDENCE_LEVEL,
+            "total_requests": (
+                None
+                if total_error is None
+                else [
+                    log_data.total_requests_cnt - total_error,
+                    log_data.total_requests_cnt + total_error,
+                ]
+            ),
+            "average_response_size": (
+                None if mean_error is None else [mean - mean_error, mean + mean_error]
+            ),
+            "percentiles": {
+                f"{percent:g}": (
+                    None
+                    if (interval := sample.percentile_interval(quantiles, percent))
+                    is None
+                    else list(interval)
+                )
+                for percent in log_data.percentiles
+            },
+            "status_shares": shares,
+        }
 
-        return (
-            f"#### Общая информация\n\n"
-            f"|{'Метрика':^23}|{'Значение':>{general_inform_second_col_width}}|\n"
-            f"|:{'-' * 21}:|{'-' * (general_inform_second_col_width - 1)}:|\n"
-            f"|{'Файл(-ы)':^23}|{self._name_str:>{general_inform_second_col_width}}|\n"
-            f"|{'Начальная дата':^23}|{self.from_date_str:>{general_inform_second_col_width}}|\n"
-            f"|{'Конечная дата':^23}|{self.to_date_str:>{general_inform_second_col_width}}|\n"
-            f"|{'Количество запросов':^23}|{self._total_req_amount:>{general_inform_second_col_width}}|\n"
-            f"|{'Средний размер ответа':^23}|{self._aver_response:>{general_inform_second_col_width}}|\n"
-            f"|{'95p размера ответа':^23}|{self._percent_95:>{general_inform_second_col_width}}|\n"
-            f"\n#### Запрашиваемые ресурсы\n\n"
-            f"|{'Ресурс':^{req_res_first_col_width}}|{'Количество':>{req_res_second_col_width}}|\n"
-            f"|:{'-' * (req_res_first_col_width - 2)}:|{'-' * (req_res_second_col_width - 1)}:|\n"
-            f"{sources_table}"
-            f"\n#### Коды ответа\n\n"
-            f"|{'Код':^{code_first_col_width}}|{'Имя':^{code_second_col_width}}|{'Количество':>{code_third_col_width}}|\n"
-            f"|:{'-' * (code_first_col_width - 2)}:|:{'-' * (code_second_col_width - 2)}:|{'-' * (code_third_col_width - 1)}:|\n"
-            f"{codes_table}"
-            f"\n#### Статистика по запросам\n\n"
-            f"|{'Тип запроса':^{source_first_col_width}}|{'Количество':^{source_second_col_width}}|\n"
-            f"|:{'-' * (source_first_col_width - 2)}:|:{'-' * (source_second_col_width - 2)}:|\n"
-            f"{source_table}\n"
-            f"\n#### Статистика по IP-адресам\n\n"
-            f"|{'IP-адрес':^{ip_stat_first_col_width}}|{'Кол-во запросов':>{ip_stat_second_col_width}}|\n"
-            f"|:{'-' * (ip_stat_first_col_width - 2)}:|:{'-' * (ip_stat_second_col_width - 2)}:|\n"
-            f"{ip_statistics_table}\n"
-            f"\n#### Ресурсы с ошибками\n\n"
-            f"{error_url}"
+    def _row_sections(self) -> list[tuple[str, tuple[str, ...], Iterable[tuple]]]:
+        """
+        Секции строк статистики для машиночитаемых форматов: имя секции,
+        имена полей и строки кортежами, в порядке и с ограничением top отчета
+        """
+        log_data = self.log_data
+        return [
+            (
+                "sources",
+                ("source", "count"),
+                self._counter_rows(log_data.sources_statistics),
+            ),
+            (
+                "status_codes",
+                ("code", "name", "count"),
+                [
+                    (code, status_phrase(code), count)
+                    for code, count in self._code_rows()
+                ],
+            ),
+            (
+                "request_types",
+                ("method", "count"),
+                self._counter_rows(log_data.request_types),
+            ),
+            ("ips", ("ip", "count"), self._ranked_rows(log_data.ip_statistics)),
+            ("error_urls", ("url",), zip(self._error_urls()[0])),
+        ]
+
+    @staticmethod
+    def _batches(rows: Iterable[tuple]) -> Iterator[list[tuple]]:
+        rows = iter(rows)
+        while batch := list(islice(rows, ROWS_PER_WRITE)):
+            yield batch
+
+    def _iter_json_repr(self) -> Iterator[str]:
+        """Один документ JSON; массивы секций пишутся пачками записей"""
+        yield dumps(self._summary())[:-1]
+        for section, fields, rows in self._row_sections():
+            yield f',"{section}":['
+            separator = ""
+            for batch in self._batches(rows):
+                # Записи пачки собираются и кодируются без Python-функции на
+                # строку, скобки массива отбрасываются
+                records = list(map(dict, map(zip, repeat(fields), batch)))
+                yield separator + dumps(records)[1:-1]
+                separator = ","
+            yield "]"
+        yield "}"
+
+    def _iter_ndjson_repr(self) -> Iterator[str]:
+        """По записи JSON в строке: общая информация, затем строки секций"""
+        yield dumps({"section": "summary", **self._summary()})
+        for section, fields, rows in self._row_sections():
+            fields = ("section", *fields)
+            for batch in self._batches(rows):
+                records = map(
+                    dict, map(zip, repeat(fields), map((section,).__add__, batch))
+                )
+                yield "\n" + "\n".join(map(dumps, records))
+
+    def _iter_csv_repr(self) -> Iterator[str]:
+        """CSV с колонками CSV_COLUMNS: общая информация и строки секций"""
+        summary = self._summary()
+        rows = [
+            ("summary", key, "", "" if summary[key] is None else summary[key])
+            for key in ("from_date", "to_date", "total_requests")
+        ]
+        rows.append(
+            ("summary", "average_response_size", "", summary["average_response_size"])
         )
+        rows.extend(
+            ("summary", f"p{percent}", "", value)
+            for percent, value in summary["percentiles"].items()
+        )
+        rows.append(("summary", "error_urls_total", "", summary["error_urls_total"]))
+        rows.extend(("files", file_name, "", "") for file_name in summary["files"])
+        if "sample" in summary:
+            rows.extend(self._sample_csv_rows(summary["sample"]))
+
+        output = io.StringIO()
+        writer = csv.writer(output, lineterminator="\n")
+        writer.writerow(CSV_COLUMNS)
+        writer.writerows(rows)
+        yield output.getvalue()
+        for section, fields, rows in self._row_sections():
+            for batch in self._batches(rows):
+                # Новый буфер на пачку: очистка StringIO через truncate медленнее
+                output = io.StringIO()
+                writer = csv.writer(output, lineterminator="\n")
+                # Первое поле - ключ строки (ресурс, код, метод, IP, URL)
+                columns = dict(zip(fields, zip(*batch)))
+                writer.writerows(
+                    zip(
+                        repeat(section),
+                        columns[fields[0]],
+                        columns.get("name", repeat("")),
+                        columns.get("count", repeat("")),
+                    )
+                )
+                yield output.getvalue()
+
+    @staticmethod
+    def _sample_csv_rows(sample: dict) -> list[tuple]:
+        """Строки CSV выборки: границы интервалов в колонке name (low, high)"""
+        rows = [
+            ("sample", key, "", sample[key])
+            for key in ("fraction", "units", "confidence")
+        ]
+        intervals = [
+            ("total_requests", sample["total_requests"]),
+            ("average_response_size", sample["average_response_size"]),
+            *(
+                (f"p{percent}", interval)
+                for percent, interval in sample["percentiles"].items()
+            ),
+        ]
+        for code, share in sample["status_shares"].items():
+            rows.append(("sample", f"share_{code}", "", share["share"]))
+            intervals.append((f"share_{code}", share["interval"]))
+        for key, interval in intervals:
+            if interval is not None:
+                rows.append(("sample", key, "low", interval[0]))
+                rows.append(("sample", key, "high", interval[1]))
+        return rows
 
-    def _generate_adoc_repr(self) -> str:
+    def _iter_adoc_repr(self) -> Iterator[str]:
         # Секция общей информации
-        adoc_output = (
+        yield (
             f"=== Общая информация\n\n"
             f"* **Файлы:** {', '.join(self.log_data.file_names)}\n"
             f"* **Начальная дата:** {self.from_date_str}\n"
             f"* **Конечная дата:** {self.to_date_str}\n"
-            f"* **Количество запросов:** {self.log_data.total_requests_cnt:_}\n"
+        )
+        if self.log_data.sample is not None:
+            yield f"* **Выборка:** {self._sample_str}\n"
+        yield (
+            f"* **Количество запросов:** {self._total_req_amount}\n"
             f"* **Средний размер ответа:** {self._aver_response}\n"
-            f"* **95-й перцентиль размера ответа:** {self._percent_95}\n\n"
         )
+        for percent, value in self._percentiles:
+            yield f"* **{percent}-й перцентиль размера ответа:** {value}\n"
+        for name, value in self._distinct_estimates:
+            yield f"* **{name}:** {value}\n"
+        yield "\n"
 
         # Секция с запрашиваемыми ресурсами
-        adoc_output += "=== Запрашиваемые ресурсы\n\n"
-        adoc_output += '[options="header"]\n|===\n|Ресурс |Количество\n'
-        for source, amount in self.log_data.sources_statistics.items():
-            adoc_output += f"|`{source}` |{amount:_}\n"
-        adoc_output += "|===\n\n"
+        yield f"=== Запрашиваемые ресурсы{self._top_k_note(self.log_data.sources_statistics)}\n\n"
+        yield '[options="header"]\n|===\n|Ресурс |Количество\n'
+        yield from self._format_rows(
+            "|`{}` |{:_}\n", self._counter_rows(self.log_data.sources_statistics)
+        )
+        yield "|===\n\n"
 
         # Секция с кодами ответа
-        adoc_output += "=== Коды ответа\n\n"
-        adoc_output += '[options="header"]\n|===\n|Код |Имя |Количество\n'
-        for code, count in self.log_data.response_codes_statistics.items():
-            adoc_output += f"|{code} |{self._get_status_name(code)} |{count:_}\n"
-        adoc_output += "|===\n\n"
+        yield f"=== Коды ответа{self._top_k_note(self.log_data.response_codes_statistics)}\n\n"
+        if self.log_data.sample is None:
+            yield '[options="header"]\n|===\n|Код |Имя |Количество\n'
+            yield from self._format_rows(
+                "|{} |{} |{:_}\n",
+                (
+                    (code, status_phrase(code), count)
+                    for code, count in self._code_rows()
+                ),
+            )
+        else:
+            yield '[options="header"]\n|===\n|Код |Имя |Количество |Доля\n'
+            yield from self._format_rows(
+                "|{} |{} |{:_} |{}\n",
+                (
+                    (code, status_phrase(code), count, self._share_str(code))
+                    for code, count in self._code_rows()
+                ),
+            )
+        yield "|===\n\n"
 
         # Секция со статистикой запросов
-        adoc_output += "=== Статистика по запросам\n\n"
-        adoc_output += '[options="header"]\n|===\n|Тип запроса |Количество\n'
-        for request, count in self.log_data.request_types.items():
-            adoc_output += f"|{request} |{count:_}\n"
-        adoc_output += "|===\n\n"
+        yield f"=== Статистика по запросам{self._top_k_note(self.log_data.request_types)}\n\n"
+        yield '[options="header"]\n|===\n|Тип запроса |Количество\n'
+        yield from self._format_rows(
+            "|{} |{:_}\n", self._counter_rows(self.log_data.request_types)
+        )
+        yield "|===\n\n"
 
         # Секция со статистикой по IP-адресам
-        adoc_output += "=== Статистика по IP-адресам\n\n"
-        adoc_output += '[options="header"]\n|===\n|IP-адрес |Количество запросов\n'
-        for ip, count in self.log_data.ip_statistics.items():
-            adoc_output += f"|{ip} |{count:_}\n"
-        adoc_output += "|===\n\n"
+        yield f"=== Статистика по IP-адресам{self._top_k_note(self.log_data.ip_statistics)}\n\n"
+        yield '[options="header"]\n|===\n|IP-адрес |Количество запросов\n'
+        yield from self._format_rows(
+            "|{} |{:_}\n", self._counter_rows(self.log_data.ip_statistics)
+        )
+        yield "|===\n\n"
 
         # Секция с URL, вызвавшими ошибки
-        adoc_output += "=== Ресурсы с ошибками\n\n"
-        adoc_output += ", ".join(f"`{url}`" for url in self.log_data.error_urls)
+        error_urls, omitted = self._error_urls()
+        yield "=== Ресурсы с ошибками\n\n"
+        yield from self._join_list(error_urls, "`{}`")
+        yield omitted
 
-        return adoc_output
 
-    @staticmethod
-    # Функция для получения имени статуса с использованием HTTPStatus
-    def _get_status_name(code: str) -> str:
-        try:
-            status = HTTPStatus(int(code))
-            return status.phrase
-        except ValueError:
-            return "Unknown"
+@cache
+def status_phrase(code: str) -> str:
+    """Имя статуса HTTP по коду (HTTPStatus), для неизвестных кодов - Unknown"""
+    try:
+        return HTTPStatus(int(code)).phrase
+    except ValueError:
+        return "Unknown"
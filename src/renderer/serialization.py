@@ -0,0 +1,19 @@
+import json
+
+try:
+    import orjson
+except ImportError:  # без orjson используется стандартный json
+    orjson = None
+
+# json.dumps с нестандартными параметрами создает кодировщик на каждый вызов
+_encode = json.JSONEncoder(ensure_ascii=False, separators=(",", ":")).encode
+
+
+def dumps(value) -> str:
+    """
+    JSON без пробелов между элементами. Если установлен orjson, значение
+    кодируется им (в несколько раз быстрее json), результат тот же
+    """
+    if orjson is not None:
+        return orjson.dumps(value).decode()
+    return _encode(value)
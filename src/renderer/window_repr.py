@@ -0,0 +1,18 @@
+from src.databases.log_data import LogData
+
+
+def format_duration(seconds: int) -> str:
+    """Длительность в самых крупных целых единицах: 60 -> 1m, 5400 -> 90m"""
+    for unit, size in (("d", 86400), ("h", 3600), ("m", 60)):
+        if seconds % size == 0:
+            return f"{seconds // size}{unit}"
+    return f"{seconds}s"
+
+
+def render_windows(reports: list[tuple[int, LogData]], format_type: str) -> str:
+    """Отчеты по скользящим окнам (режим --follow) один за другим"""
+    header = "##" if format_type == "markdown" else "=="
+    return "\n\n".join(
+        f"{header} Последние {format_duration(seconds)}\n\n{log_data!r}"
+        for seconds, log_data in reports
+    )
@@ -1,14 +1,61 @@
+from typing import TextIO
+
 from src.databases.log_data import LogData
+from src.renderer.log_data_repr import LogDataRepr
+
+
+class TeeWriter:
+    """
+    Поток, который пишет текст в основной поток и копии в echo. Ошибка
+    записи в копию (например, BrokenPipeError при `| head`) не прерывает
+    запись: копия отключается, основной поток дописывается целиком
+    """
+
+    def __init__(self, stream: TextIO, *echo: TextIO):
+        self.stream: TextIO = stream
+        self.echo: list[TextIO] = list(echo)
+
+    def write(self, text: str) -> int:
+        self.stream.write(text)
+        self.write_echo(text)
+        return len(text)
+
+    def write_echo(self, text: str) -> None:
+        """Пишет текст только в копии, которые еще не отключены"""
+        for echo in list(self.echo):
+            try:
+                echo.write(text)
+            except OSError:
+                self.echo.remove(echo)
+
+
+# Расширение файла отчета для каждого формата
+EXTENSIONS = {
+    "markdown": ".md",
+    "adoc": ".adoc",
+    "json": ".json",
+    "ndjson": ".ndjson",
+    "csv": ".csv",
+}
 
 
 class Saver:
-    def __init__(self, log_data: LogData):
+    def __init__(self, log_data: LogData, top: int | None = None):
         self.log_data = log_data
+        self.top = top
 
-    def save(self, path: str) -> None:
-        if self.log_data.repr_format == "markdown":
-            with open(path + ".md", "w", encoding="utf-8") as f:
-                f.writelines(self.log_data.__repr__())
-        else:
-            with open(path + ".adoc", "w", encoding="utf-8") as f:
-                f.writelines(self.log_data.__repr__())
+    def save(self, path: str, echo: TextIO | None = None) -> None:
+        """
+        Записывает отчет в файл path с расширением формата; если задан echo,
+        отчет одновременно пишется и в него (например, в sys.stdout) и
+        строится только один раз. Если echo закрыт (BrokenPipeError),
+        файл все равно записывается целиком
+        """
+        extension = EXTENSIONS[self.log_data.repr_format]
+        with open(path + extension, "w", encoding="utf-8") as f:
+            stream = TeeWriter(f) if echo is None else TeeWriter(f, echo)
+            LogDataRepr(self.log_data, self.top).write(
+                stream, self.log_data.repr_format
+            )
+        # Как print: после отчета перевод строки
+        stream.write_echo("\n")
@@ -0,0 +1,24 @@
+# Методы и статусы строк make_line: i-я строка берет i % len значение
+METHODS = ("GET", "POST", "DELETE")
+STATUSES = ("200", "404", "500", "301")
+
+
+def make_line(i: int, **fields: str) -> str:
+    """
+    Строка лога NGINX номер i: значения полей зависят от i, так что строки
+    различаются, но повторяются. fields заменяют значения по умолчанию
+    (remote_addr, time_local, method, source, status, body_bytes_sent)
+    """
+    values = {
+        "remote_addr": f"127.0.0.{i % 7}",
+        "time_local": f"09/Nov/2024:10:{i % 60:02}:00 +0000",
+        "method": METHODS[i % len(METHODS)],
+        "source": f"/page/{i % 11}",
+        "status": STATUSES[i % len(STATUSES)],
+        "body_bytes_sent": str(i * 31 % 9000),
+        **fields,
+    }
+    return (
+        "{remote_addr} - - [{time_local}] "
+        '"{method} {source} HTTP/1.1" {status} {body_bytes_sent} "-" "Mozilla/5.0"'
+    ).format(**values)
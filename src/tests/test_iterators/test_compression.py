@@ -0,0 +1,132 @@
+import bz2
+import gzip
+import lzma
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from src.databases.log_data import LogData
+from src.iterators.compression import (
+    DecompressingStream,
+    detect_compression,
+    open_decompressed,
+    zstandard,
+)
+from src.iterators.local_path_iterator import LocalPathIterator
+from src.parser_process.log_processor import LogParserProcessor
+from src.parser_process.sharding import plan_shards
+from src.tests.conftest import make_line
+
+
+class TestCompression(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.TemporaryDirectory()
+        self.data = ("\r\n".join(make_line(i) for i in range(200)) + "\n\n").encode()
+
+        # Один и тот же лог без сжатия и в разных форматах
+        self.plain = self.write("access.log", self.data)
+        self.compressed = {
+            "gzip": self.write("access.log.1.gz", gzip.compress(self.data)),
+            "bz2": self.write("access.log.2.bz2", bz2.compress(self.data)),
+            "xz": self.write("access.log.3.xz", lzma.compress(self.data)),
+        }
+
+    def tearDown(self):
+        self.test_dir.cleanup()
+
+    def write(self, name: str, data: bytes) -> str:
+        path = os.path.join(self.test_dir.name, name)
+        with open(path, "wb") as f:
+            f.write(data)
+        return path
+
+    def test_detect_compression(self):
+        self.assertEqual(detect_compression(gzip.compress(b"x")), "gzip")
+        self.assertEqual(detect_compression(bz2.compress(b"x")), "bz2")
+        self.assertEqual(detect_compression(lzma.compress(b"x")), "xz")
+        self.assertEqual(detect_compression(b"\x28\xb5\x2f\xfd\x00"), "zstd")
+        self.assertIsNone(detect_compression(self.data))
+        self.assertIsNone(detect_compression(b""))
+
+    def test_local_iterator_reads_compressed(self):
+        expected = list(LocalPathIterator(self.plain))
+        for compression, path in self.compressed.items():
+            with self.subTest(compression=compression):
+                iterator = LocalPathIterator(path)
+                self.assertEqual(list(iterator), expected)
+                lines = [line.decode() for line in iterator.iter_bytes()]
+                self.assertEqual(lines, expected)
+
+    def test_stream_in_small_chunks(self):
+        # Склеенные gzip-потоки, куски по 7 байт
+        data = gzip.compress(self.data[:3000]) + gzip.compress(self.data[3000:])
+        chunks = [data[i : i + 7] for i in range(0, len(data), 7)]
+        stream = DecompressingStream(chunks)
+        self.assertEqual(stream.readall(), self.data)
+        self.assertEqual(stream.compression, "gzip")
+
+        # Несжатые данные передаются как есть
+        with open_decompressed([b"ab", b"cdefgh"]) as file:
+            self.assertEqual(file.read(), b"abcdefgh")
+        # Пустые куски пропускаются, а не заканчивают данные
+        with open_decompressed([b"", b"a line\n", b"", b"second\n"]) as file:
+            self.assertEqual(file.readlines(), [b"a line\n", b"second\n"])
+
+    def test_gzip_zero_padding(self):
+        # Нули после потока и между потоками, в том числе в отдельных кусках
+        first, second = gzip.compress(self.data[:3000]), gzip.compress(self.data[3000:])
+        padding = b"\x00" * 20
+        data = first + padding + second + padding
+        chunks = [data[i : i + 7] for i in range(0, len(data), 7)]
+        self.assertEqual(DecompressingStream(chunks).readall(), self.data)
+
+        path = self.write("access.log.5.gz", gzip.compress(self.data) + b"\x00" * 512)
+        self.assertEqual(
+            list(LocalPathIterator(path)), list(LocalPathIterator(self.plain))
+        )
+        # После нулей обрыв следующего потока по-прежнему заметен
+        with self.assertRaises(EOFError):
+            DecompressingStream([first + padding + second[:-8]]).readall()
+
+    def test_truncated_input(self):
+        data = gzip.compress(self.data)
+        with self.assertRaises(EOFError):
+            DecompressingStream([data[: len(data) // 2]]).readall()
+
+    @unittest.skipIf(zstandard is None, "zstandard is not installed")
+    def test_zstd(self):
+        path = self.write(
+            "access.log.4.zst", zstandard.ZstdCompressor().compress(self.data)
+        )
+        self.assertEqual(
+            list(LocalPathIterator(path)), list(LocalPathIterator(self.plain))
+        )
+
+    @patch("src.iterators.compression.zstandard", None)
+    def test_zstd_without_package(self):
+        with self.assertRaises(ValueError):
+            DecompressingStream([b"\x28\xb5\x2f\xfd\x00\x00"]).readall()
+
+    def test_compressed_files_are_not_split(self):
+        files = [self.plain, *self.compressed.values()]
+        shards = plan_shards(files, workers=4, min_shard_size=1000)
+
+        # Несжатый файл делится на части, сжатые - нет
+        self.assertGreater(len([s for s in shards if s.path == self.plain]), 1)
+        for path in self.compressed.values():
+            self.assertEqual([s.end for s in shards if s.path == path], [None])
+
+    @patch("src.parser_process.sharding.MIN_SHARD_SIZE", 1000)
+    def test_parallel_matches_serial(self):
+        pattern = os.path.join(self.test_dir.name, "access.log*")
+
+        serial = LogData()
+        LogParserProcessor(serial).process(pattern)
+
+        for reader in ("text", "mmap"):
+            with self.subTest(reader=reader):
+                parallel = LogData()
+                LogParserProcessor(parallel, workers=3, reader=reader).process(pattern)
+                self.assertEqual(serial.total_requests_cnt, 800)
+                self.assertEqual(parallel, serial)
@@ -0,0 +1,204 @@
+import os
+import tempfile
+import unittest
+from datetime import UTC, datetime
+from unittest.mock import patch
+
+from src.databases.log_data import LogData
+from src.iterators.file_discovery import (
+    directory_period,
+    discover_files,
+    period_bounds,
+)
+from src.iterators.local_path_iterator import LocalPathIterator
+from src.parser_process.log_processor import LogParserProcessor
+
+
+def timestamp(*args: int) -> float:
+    return datetime(*args, tzinfo=UTC).timestamp()
+
+
+class TestFileDiscovery(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.TemporaryDirectory()
+        self.root = self.test_dir.name
+        for path in (
+            "web-b/2024-11-09/access.log",
+            "web-b/2024-11-09/access.log.tidx",
+            "web-a/2024-11-10/access.log.1.gz",
+            "web-a/2024-11-10/error.log",
+            "web-a/2024/11/08/access.log",
+            "web-a/dt=2024-12-01/access.log",
+            "web-a/.cache/access.log",
+            "access.log",
+        ):
+            self.write(path, "")
+
+    def tearDown(self):
+        self.test_dir.cleanup()
+
+    def write(self, path: str, text: str) -> str:
+        path = os.path.join(self.root, path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(text)
+        return path
+
+    def relative(self, files: list[str]) -> list[str]:
+        return [os.path.relpath(path, self.root).replace(os.sep, "/") for path in files]
+
+    def test_recursive_pattern_in_name_order(self):
+        files = discover_files(os.path.join(self.root, "**", "access.log*"))
+        self.assertEqual(
+            self.relative(files),
+            [
+                "access.log",
+                "web-a/2024/11/08/access.log",
+                "web-a/2024-11-10/access.log.1.gz",
+                "web-a/dt=2024-12-01/access.log",
+                "web-b/2024-11-09/access.log",
+                "web-b/2024-11-09/access.log.tidx",
+            ],
+        )
+        # Каталог - все файлы в нем и в подкаталогах, служебные файлы не читаются как логи
+        self.assertEqual(
+            self.relative(LocalPathIterator(os.path.join(self.root, "web-b")).files),
+            ["web-b/2024-11-09/access.log"],
+        )
+
+    def test_patterns_and_exclude(self):
+        patterns = os.pathsep.join(
+            [
+                os.path.join(self.root, "web-b", "*", "*.log"),
+                os.path.join(self.root, "*", "**", "*.log"),
+            ]
+        )
+        files = discover_files(patterns, exclude=["error.*", "dt=*", "*/2024/11/*"])
+        # Порядок шаблонов, без повторов; исключенный каталог не обходится
+        self.assertEqual(
+            self.relative(files),
+            ["web-b/2024-11-09/access.log"],
+        )
+        # Явно указанная часть пути не исключается
+        files = discover_files(patterns, exclude=["web-b"])
+        self.assertEqual(
+            self.relative(files),
+            [
+                "web-b/2024-11-09/access.log",
+                "web-a/2024/11/08/access.log",
+                "web-a/2024-11-10/error.log",
+                "web-a/dt=2024-12-01/access.log",
+            ],
+        )
+
+    def test_mtime_order(self):
+        files = discover_files(os.path.join(self.root, "web-a", "**", "*.log"))
+        for age, path in enumerate(files):
+            os.utime(path, (1_000_000 - age, 1_000_000 - age))
+        self.assertEqual(
+            discover_files(
+                os.path.join(self.root, "web-a", "**", "*.log"), order="mtime"
+            ),
+            files[::-1],
+        )
+        with self.assertRaises(ValueError):
+            discover_files(self.root, order="size")
+
+    def test_directory_period(self):
+        day = datetime(2024, 11, 9, tzinfo=UTC)
+        self.assertEqual(directory_period("2024-11-09"), (day, "day"))
+        self.assertEqual(directory_period("dt=20241109"), (day, "day"))
+        self.assertEqual(directory_period("dt=2024-11-09"), (day, "day"))
+        self.assertEqual(directory_period("2024_11"), (day.replace(day=1), "month"))
+        year = directory_period("2024")
+        month = directory_period("11", year)
+        self.assertEqual(directory_period("09", month), (day, "day"))
+        self.assertEqual(directory_period("year=2024"), year)
+        for name in (
+            "web-a",
+            "11",
+            "2024-13-01",
+            "1234",
+            "2024-11-09-old",
+            "202411",
+            "20241109",
+        ):
+            self.assertIsNone(directory_period(name))
+        self.assertIsNone(directory_period("31", month))
+
+        self.assertEqual(
+            period_bounds(directory_period("2024-12")),
+            (timestamp(2024, 12, 1), timestamp(2025, 1, 1)),
+        )
+
+    def test_date_directories_pruned(self):
+        self.write("web-c/1999/access.log", "")
+        pattern = os.path.join(self.root, "**", "*.log*")
+        time_range = (timestamp(2024, 11, 10, 12), timestamp(2024, 11, 10, 18))
+        # Соседние дни остаются: дата каталога может быть не в UTC. Один год
+        # без ключа (1999) может быть не датой и не отсекается
+        self.assertEqual(
+            self.relative(discover_files(pattern, time_range=time_range)),
+            [
+                "access.log",
+                "web-a/2024-11-10/access.log.1.gz",
+                "web-a/2024-11-10/error.log",
+                "web-b/2024-11-09/access.log",
+                "web-b/2024-11-09/access.log.tidx",
+                "web-c/1999/access.log",
+            ],
+        )
+        time_range = (timestamp(2024, 11, 30), timestamp(2025, 1, 1))
+        self.assertEqual(
+            self.relative(discover_files(pattern, time_range=time_range)),
+            [
+                "access.log",
+                "web-a/dt=2024-12-01/access.log",
+                "web-c/1999/access.log",
+            ],
+        )
+        self.write("web-c/year=1999/access.log", "")
+        self.assertNotIn(
+            "web-c/year=1999/access.log",
+            self.relative(discover_files(pattern, time_range=time_range)),
+        )
+
+    def test_processor_reads_while_discovering(self):
+        line = '127.0.0.1 - - [09/Nov/2024:10:00:00 +0000] "GET /a HTTP/1.1" 200 10 "-" "-"\n'
+        self.write("web-b/2024-11-09/access.log", line)
+        self.write("web-b/2024-11-10/access.log", line)
+        pattern = os.path.join(self.root, "web-b")
+
+        # Список файлов заранее не строится, file_names - найденные при чтении
+        log_data = LogData()
+        with patch(
+            "src.iterators.local_path_iterator.discover_files",
+            side_effect=AssertionError("files listed before reading"),
+        ):
+            LogParserProcessor(log_data).process(pattern)
+        self.assertEqual(log_data.total_requests_cnt, 2)
+        self.assertEqual(
+            self.relative(log_data.file_names),
+            ["web-b/2024-11-09/access.log", "web-b/2024-11-10/access.log"],
+        )
+
+    def test_processor_prunes_by_time_bounds(self):
+        line = '127.0.0.1 - - [{} +0000] "GET /a HTTP/1.1" 200 10 "-" "Mozilla/5.0"\n'
+        self.write("web-b/2024-11-09/access.log", line.format("09/Nov/2024:10:00:00"))
+        self.write(
+            "web-a/dt=2024-12-01/access.log", line.format("01/Dec/2024:10:00:00")
+        )
+
+        log_data = LogData(from_date="2024-11-09", to_date="2024-11-10")
+        LogParserProcessor(log_data, exclude=["error.log"]).process(
+            os.path.join(self.root, "web-*")
+        )
+        self.assertEqual(log_data.total_requests_cnt, 1)
+        self.assertEqual(
+            self.relative(log_data.file_names),
+            [
+                "web-a/2024/11/08/access.log",
+                "web-a/2024-11-10/access.log.1.gz",
+                "web-b/2024-11-09/access.log",
+            ],
+        )
@@ -0,0 +1,97 @@
+import os
+import tempfile
+import unittest
+
+from src.iterators.file_follower import FileFollower, LocalPathFollower
+
+
+class TestFileFollower(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.test_dir.name, "access.log")
+        with open(self.path, "w") as f:
+            f.write("old1\nold2\n")
+
+    def tearDown(self):
+        self.test_dir.cleanup()
+
+    def append(self, text: str, path: str | None = None) -> None:
+        with open(path or self.path, "a", newline="") as f:
+            f.write(text)
+
+    def test_reads_appended_lines(self):
+        follower = FileFollower(self.path)
+        # Существовавшие строки пропускаются, как в tail -f
+        self.assertEqual(follower.read_lines(), [])
+
+        self.append("line1\r\n\nline2\nlin")
+        self.assertEqual(follower.read_lines(), ["line1", "line2"])
+        self.append("e3\n")
+        self.assertEqual(follower.read_lines(), ["line3"])
+        follower.close()
+
+    def test_from_start(self):
+        follower = FileFollower(self.path, from_start=True)
+        self.assertEqual(follower.read_lines(), ["old1", "old2"])
+        follower.close()
+
+    def test_truncation(self):
+        follower = FileFollower(self.path)
+        with open(self.path, "w") as f:
+            f.write("new\n")
+        self.assertEqual(follower.read_lines(), ["new"])
+        follower.close()
+
+    def test_rotation(self):
+        follower = FileFollower(self.path)
+        self.append("before\nlast")
+
+        # Пока нового файла нет, читается переименованный
+        os.rename(self.path, self.path + ".1")
+        self.append(" after rename\n", self.path + ".1")
+        self.assertEqual(follower.read_lines(), ["before", "last after rename"])
+
+        # Старый файл дочитывается, новый читается с начала
+        self.append("tail", self.path + ".1")
+        self.append("first\n")
+        self.assertEqual(follower.read_lines(), ["tail", "first"])
+        self.append("second\n")
+        self.assertEqual(follower.read_lines(), ["second"])
+        follower.close()
+
+    def test_new_files_by_pattern(self):
+        follower = LocalPathFollower(os.path.join(self.test_dir.name, "*.log"))
+        other = os.path.join(self.test_dir.name, "other.log")
+        self.append("a\n")
+        self.append("b\n", other)
+        self.assertEqual(sorted(follower.read_lines()), ["a", "b"])
+        self.assertEqual(sorted(follower.files), sorted([self.path, other]))
+        follower.close()
+
+    def test_time_indexes_are_not_followed(self):
+        follower = LocalPathFollower(os.path.join(self.test_dir.name, "*"))
+        self.append("index\n", self.path + ".tidx")
+        self.append("a\n")
+        self.assertEqual(follower.read_lines(), ["a"])
+        self.assertEqual(follower.files, [self.path])
+        follower.close()
+
+    def test_deleted_files_are_closed(self):
+        follower = LocalPathFollower(os.path.join(self.test_dir.name, "*.log"))
+        other = os.path.join(self.test_dir.name, "other.log")
+        self.append("a\n")
+        self.append("b\nunfinished", other)
+        self.assertEqual(sorted(follower.read_lines()), ["a", "b"])
+        file = follower._followers[other]._file
+
+        # Дописанное до удаления дочитывается, дескриптор закрывается
+        self.append(" line\n", other)
+        os.remove(other)
+        self.assertEqual(follower.read_lines(), ["unfinished line"])
+        self.assertTrue(file.closed)
+        self.assertEqual(follower.files, [self.path])
+
+        # Новый файл с тем же именем читается с начала
+        self.append("c\n", other)
+        self.assertEqual(follower.read_lines(), ["c"])
+        follower.close()
@@ -0,0 +1,93 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from src.databases.log_data import LogData
+from src.iterators.file_range import iter_mmap_lines
+from src.iterators.local_path_iterator import LocalPathIterator
+from src.parser_process.line_parser import LineParser
+from src.parser_process.log_processor import LogParserProcessor
+from src.tests.conftest import make_line
+
+
+class TestMmapReader(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.test_dir.name, "access.log")
+        self.empty = os.path.join(self.test_dir.name, "empty.log")
+
+        # Разные переводы строк, пробелы по краям, пустые строки и не-ASCII
+        text = (
+            "\r\n".join(make_line(i) for i in range(40))
+            + "\r\n  \t\r\n"
+            + "\r".join(make_line(i) for i in range(40, 60))
+            + "\n\x1c"
+            + make_line(60)
+            + "\x1f\n\n"
+            + make_line(61).replace("/page/", "/страница/")
+            + " \n"
+            + "\n".join(make_line(i) for i in range(62, 100))
+        )
+        with open(self.path, "w", newline="") as f:
+            f.write(text)
+        with open(self.empty, "w") as f:
+            f.write("")
+
+    def tearDown(self):
+        self.test_dir.cleanup()
+
+    def test_lines_match_text_reading(self):
+        # После декодирования строки совпадают с чтением через open()
+        iterator = LocalPathIterator(self.path)
+        lines = [line.decode().strip() for line in iterator.iter_bytes()]
+        self.assertEqual(lines, list(iterator))
+
+    @patch("src.iterators.file_range.MMAP_CHUNK_SIZE", 100)
+    def test_small_chunks_and_ranges(self):
+        # Куски меньше строки и диапазон байт из середины файла
+        expected = list(LocalPathIterator(self.path))
+        lines = [line.decode().strip() for line in iter_mmap_lines(self.path)]
+        self.assertEqual(lines, expected)
+
+        with open(self.path, "rb") as f:
+            data = f.read()
+        start = data.index(b"\n", 1000) + 1
+        end = data.index(b"\n", 3000) + 1
+        lines = [
+            line.decode().strip() for line in iter_mmap_lines(self.path, start, end)
+        ]
+        text = data[start:end].decode().replace("\r\n", "\n").replace("\r", "\n")
+        self.assertEqual(
+            lines, [line.strip() for line in text.split("\n") if line.strip()]
+        )
+
+    def test_empty_file(self):
+        self.assertEqual(list(iter_mmap_lines(self.empty)), [])
+
+    def test_parse_values_bytes(self):
+        parser = LineParser(("method", "source", "status"))
+        line = make_line(3)
+        self.assertEqual(
+            parser.parse_values_bytes(line.encode()), parser.parse_values(line)
+        )
+
+        # Строка не из ASCII декодируется и очищается от пробелов Unicode
+        line = make_line(4).replace("/page/", "/страница/")
+        self.assertEqual(
+            parser.parse_values_bytes((line + " ").encode()),
+            ("POST", "/страница/4", "200"),
+        )
+        self.assertIsNone(parser.parse_values_bytes(b"invalid log line"))
+
+    def test_mmap_reader_matches_text(self):
+        pattern = os.path.join(self.test_dir.name, "*.log")
+
+        text = LogData(from_date="2024-11-09T10:10:00")
+        LogParserProcessor(text, "method", "GET").process(pattern)
+
+        mapped = LogData(from_date="2024-11-09T10:10:00")
+        LogParserProcessor(mapped, "method", "GET", reader="mmap").process(pattern)
+
+        self.assertGreater(text.total_requests_cnt, 0)
+        self.assertEqual(mapped, text)
@@ -1,18 +1,158 @@
+import gzip
+import os
+import tempfile
+import threading
 import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from unittest.mock import patch
 from src.iterators.url_path_iterator import URLPathIterator
+from src.parser_process.log_processor import LogParserProcessor
+
+LOG = b"line1\nline2\n\nline3\r\n" + b"".join(b"line%d\n" % i for i in range(4, 2000))
+LINES = [line.decode() for line in LOG.split()]
+
+
+class _LogHandler(BaseHTTPRequestHandler):
+    """Локальный HTTP-сервер вместо удаленного: пути задают поведение ответа"""
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        self.server.requests.append((self.path, dict(self.headers)))
+        if self.path == "/plain.log":
+            self._send(LOG)
+        elif self.path == "/access.log.gz":
+            self._send(gzip.compress(LOG))
+        elif self.path == "/encoded.log":
+            # Сжатие на уровне HTTP (Content-Encoding), если клиент его принимает
+            self._send(gzip.compress(LOG), {"Content-Encoding": "gzip"})
+        elif self.path == "/flaky.log":
+            self._send_flaky()
+        else:
+            self._send(b"not found", status=404)
+
+    def _send(self, body, headers=None, status=200):
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_flaky(self):
+        # Первый ответ обрывается на середине, продолжение - по заголовку Range
+        validator = {"ETag": '"v1"'}
+        requested = self.headers.get("Range")
+        if requested is None:
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(LOG)))
+            self.send_header("ETag", validator["ETag"])
+            self.end_headers()
+            self.wfile.write(LOG[: len(LOG) // 2])
+            self.wfile.flush()
+            self.close_connection = True
+            return
+        start = int(requested.removeprefix("bytes=").rstrip("-"))
+        self._send(
+            LOG[start:],
+            {**validator, "Content-Range": f"bytes {start}-{len(LOG) - 1}/{len(LOG)}"},
+            status=206,
+        )
 
 
 class TestURLPathIterator(unittest.TestCase):
-    @patch("requests.get")
-    def test_url_path_iterator(self, mock_get):
-        # Мокируем response для URL
-        mock_response = mock_get.return_value
-        mock_response.iter_lines.return_value = ["line1", "line2"]
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), _LogHandler)
+        cls.server.daemon_threads = True
+        cls.server.requests = []
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.base_url = f"http://127.0.0.1:{cls.server.server_address[1]}"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
 
-        iterator = URLPathIterator("http://example.com/logfile")
-        lines = list(iterator)
+    def setUp(self):
+        self.server.requests.clear()
+
+    def test_url_path_iterator(self):
+        iterator = URLPathIterator(f"{self.base_url}/plain.log")
 
         # Проверка правильности работы итератора
-        self.assertEqual(lines, ["line1", "line2"])
-        mock_get.assert_called_once_with("http://example.com/logfile", stream=True)
+        self.assertEqual(list(iterator), LINES)
+        self.assertEqual(iterator.files, [f"{self.base_url}/plain.log"])
+
+    def test_url_path_iterator_gzip(self):
+        # Сжатый лог распаковывается по мере загрузки
+        lines = list(URLPathIterator(f"{self.base_url}/access.log.gz"))
+
+        self.assertEqual(lines, LINES)
+
+    def test_content_encoding_gzip(self):
+        lines = list(URLPathIterator(f"{self.base_url}/encoded.log"))
+
+        self.assertEqual(lines, LINES)
+        ((_, headers),) = self.server.requests
+        self.assertIn("gzip", headers["Accept-Encoding"])
+
+    @patch("src.iterators.url_path_iterator.DOWNLOAD_CHUNK_SIZE", 1)
+    def test_content_encoding_small_chunks(self):
+        # Часть кусков распаковывается в пустые байты
+        lines = list(URLPathIterator(f"{self.base_url}/encoded.log"))
+
+        self.assertEqual(lines, LINES)
+
+    @patch("src.iterators.url_path_iterator.RETRY_BACKOFF", 0)
+    def test_resume_after_broken_connection(self):
+        # После обрыва загрузка продолжается с полученного байта
+        lines = list(URLPathIterator(f"{self.base_url}/flaky.log"))
+
+        self.assertEqual(lines, LINES)
+        (_, first), (_, second) = self.server.requests
+        self.assertNotIn("Range", first)
+        self.assertEqual(second["Range"], f"bytes={len(LOG) // 2}-")
+        self.assertEqual(second["If-Range"], '"v1"')
+
+    def test_many_urls_keep_order(self):
+        # Загрузки идут параллельно, но строки отдаются в порядке URL
+        urls = [
+            f"{self.base_url}/{name}"
+            for name in ("plain.log", "access.log.gz", "encoded.log", "plain.log")
+        ]
+
+        lines = list(URLPathIterator(urls, workers=3))
+
+        self.assertEqual(lines, LINES * 4)
+        self.assertEqual(len(self.server.requests), 4)
+
+    def test_http_error(self):
+        with self.assertRaises(Exception) as context:
+            list(URLPathIterator(f"{self.base_url}/missing.log"))
+
+        self.assertIn("404", str(context.exception))
+
+    def test_early_close(self):
+        # Разбор можно прервать, не дожидаясь загрузки всех URL
+        iterator = iter(URLPathIterator([f"{self.base_url}/plain.log"] * 3))
+
+        self.assertEqual(next(iterator), "line1")
+        iterator.close()
+
+    def test_url_list_file(self):
+        # @файл: по одному URL в строке, пустые строки и комментарии пропускаются
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "urls.txt")
+            with open(path, "w") as file:
+                file.write(f"# логи\n{self.base_url}/plain.log\n\n")
+                file.write(f"{self.base_url}/access.log.gz\n")
+
+            iterator = LogParserProcessor.get_iterator(f"@{path}", fetch_workers=2)
+
+            self.assertIsInstance(iterator, URLPathIterator)
+            self.assertEqual(len(iterator.files), 2)
+            self.assertEqual(list(iterator), LINES * 2)
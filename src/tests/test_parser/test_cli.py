@@ -0,0 +1,86 @@
+import contextlib
+import io
+import unittest
+from unittest.mock import patch
+
+from src.main import main
+
+
+class CLITestCase(unittest.TestCase):
+    def assert_rejected(self, *args: str, message: str) -> None:
+        # Ошибка argparse до чтения логов: файла access.log нет
+        stderr = io.StringIO()
+        with (
+            patch("sys.argv", ["main.py", "--path", "access.log", *args]),
+            contextlib.redirect_stderr(stderr),
+            self.assertRaises(SystemExit),
+        ):
+            main()
+        self.assertIn(message, stderr.getvalue())
+
+
+class TestConflictingModes(CLITestCase):
+    def test_state_and_time_index(self):
+        self.assert_rejected(
+            "--state",
+            "state.json",
+            "--time-index",
+            "--from",
+            "2024-11-09T10:00:00",
+            message="--state cannot be combined with --time-index",
+        )
+
+    def test_pipeline(self):
+        for args in (
+            ("--state", "state.json"),
+            ("--time-index", "--from", "2024-11-09T10:00:00"),
+        ):
+            with self.subTest(args=args):
+                self.assert_rejected(
+                    "--pipeline",
+                    *args,
+                    message="--pipeline cannot be combined with --state or --time-index",
+                )
+
+    def test_sample(self):
+        self.assert_rejected(
+            "--sample",
+            "0.1",
+            "--state",
+            "state.json",
+            message="--sample is supported only when building a report",
+        )
+        for args in (
+            ("--time-index", "--from", "2024-11-09T10:00:00"),
+            ("--pipeline",),
+        ):
+            with self.subTest(args=args):
+                self.assert_rejected(
+                    "--sample",
+                    "0.1",
+                    *args,
+                    message="--sample cannot be combined with --time-index or --pipeline",
+                )
+
+
+class TestInvalidValues(CLITestCase):
+    def test_sketch_accuracy(self):
+        for accuracy in ("0", "1", "-0.5", "x"):
+            with self.subTest(accuracy=accuracy):
+                self.assert_rejected(
+                    "--quantiles",
+                    "sketch",
+                    "--sketch-accuracy",
+                    accuracy,
+                    message="ожидается число больше 0 и меньше 1",
+                )
+
+    def test_refresh(self):
+        for refresh in ("0", "-1", "nan", "x"):
+            with self.subTest(refresh=refresh):
+                self.assert_rejected(
+                    "--follow",
+                    "--refresh",
+                    refresh,
+                    message="ожидается число больше нуля",
+                )
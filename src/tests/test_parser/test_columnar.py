@@ -0,0 +1,117 @@
+import unittest
+
+import numpy as np
+
+from src.bench.parser_bench import make_lines
+from src.databases.log_data import LogData
+from src.databases.quantiles import DDSketchQuantiles
+from src.databases.sketches import TopKCounter
+from src.parser_process.columnar import ColumnBatch, encode, iter_batches
+from src.parser_process.line_parser import LineParser
+from src.parser_process.log_processor import LogParserProcessor
+
+
+class TestColumnar(unittest.TestCase):
+    def setUp(self):
+        # Несколько пачек, неразобранные строки и строка с Unicode
+        self.lines = make_lines(3000)
+        self.lines[10] = "broken line"
+        self.lines[20] = self.lines[20].replace("Mozilla", "Мозилла")
+
+    def run_engine(self, engine: str, lines=None, binary=False, **settings):
+        processor = LogParserProcessor(
+            LogData(**settings.pop("log_data", {})), engine=engine, **settings
+        )
+        processor._consume(self.lines if lines is None else lines, binary=binary)
+        return processor.log_data
+
+    def assert_same_stats(self, expected: LogData, actual: LogData):
+        self.assertEqual(actual.total_requests_cnt, expected.total_requests_cnt)
+        for name in (
+            "sources_statistics",
+            "response_codes_statistics",
+            "request_types",
+            "ip_statistics",
+        ):
+            # Совпадает и порядок ключей (порядок первого появления)
+            self.assertEqual(
+                list(getattr(actual, name).items()),
+                list(getattr(expected, name).items()),
+            )
+        self.assertEqual(actual.response_sizes, expected.response_sizes)
+        self.assertEqual(actual.error_urls, expected.error_urls)
+
+    def test_same_as_rows(self):
+        for settings in (
+            {},
+            {"filter_expression": "status >= 400 OR method = POST"},
+            {"filter_field": "method", "filter_value": "P*"},
+            {
+                "log_data": {
+                    "from_date": "2024-11-09T10:10:00",
+                    "to_date": "2024-11-09T10:20:00",
+                }
+            },
+        ):
+            with self.subTest(settings=settings):
+                self.assert_same_stats(
+                    self.run_engine("rows", **dict(settings)),
+                    self.run_engine("columnar", **dict(settings)),
+                )
+
+    def test_binary_lines(self):
+        lines = [line.encode() for line in self.lines]
+
+        self.assert_same_stats(
+            self.run_engine("rows"), self.run_engine("columnar", lines, binary=True)
+        )
+
+    def test_sketch(self):
+        rows = self.run_engine("rows", log_data={"size_sketch": DDSketchQuantiles()})
+        columnar = self.run_engine(
+            "columnar", log_data={"size_sketch": DDSketchQuantiles()}
+        )
+
+        self.assertEqual(len(columnar.size_sketch), len(rows.size_sketch))
+        self.assertEqual(columnar.size_sketch.mean(), rows.size_sketch.mean())
+        for percent in (50, 95, 99):
+            self.assertAlmostEqual(
+                columnar.size_sketch.percentile(percent),
+                rows.size_sketch.percentile(percent),
+            )
+
+    def test_top_k(self):
+        # Счетчики top-k получают количество ключа за пачку целиком
+        log_data = self.run_engine(
+            "columnar", log_data={"ip_statistics": TopKCounter(5, 50)}
+        )
+
+        self.assertIsInstance(log_data.ip_statistics, TopKCounter)
+        self.assertLessEqual(len(log_data.ip_statistics), 50)
+
+    def test_columns(self):
+        parser = LineParser(("time_local", "status", "body_bytes_sent", "source"))
+        rows = [parser.parse_values(line) for line in self.lines[:4]]
+        batch = ColumnBatch.from_rows(rows, parser.fields)
+
+        self.assertEqual(batch.statuses().dtype, np.uint16)
+        self.assertEqual(batch.statuses().tolist(), [200, 200, 200, 301])
+        self.assertEqual(batch.sizes().tolist(), [0, 37, 74, 111])
+        timestamps = batch.timestamps(lambda value: len(value))
+        self.assertEqual(timestamps.dtype, np.int64)
+
+        selected = batch.select(np.array([True, False, False, True]))
+        self.assertEqual(len(selected), 2)
+        self.assertEqual(selected["source"], ["/page/0.html", "/page/3.html"])
+
+    def test_encode(self):
+        values, ids = encode(["b", "a", "b", "c", "a"])
+
+        self.assertEqual(values, ["b", "a", "c"])
+        self.assertEqual(ids.tolist(), [0, 1, 0, 2, 1])
+
+    def test_iter_batches(self):
+        parser = LineParser()
+        batches = list(iter_batches(iter(self.lines), parser.parse_batch, 1000))
+
+        self.assertEqual([len(batch) for batch in batches], [999, 1000, 1000])
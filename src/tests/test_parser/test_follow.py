@@ -0,0 +1,77 @@
+import os
+import tempfile
+import unittest
+from datetime import UTC, datetime
+
+from src.databases.log_data import LogData
+from src.databases.windowed_log_data import WindowedLogData
+from src.parser_process.log_processor import LogParserProcessor
+from src.renderer.window_repr import format_duration, render_windows
+
+START = datetime(2024, 11, 9, 10, 0, tzinfo=UTC).timestamp()
+
+
+def make_line(timestamp: float, source: str) -> str:
+    time_local = datetime.fromtimestamp(timestamp, UTC).strftime(
+        "%d/%b/%Y:%H:%M:%S +0000"
+    )
+    return f'127.0.0.1 - - [{time_local}] "GET {source} HTTP/1.1" 200 100 "-" "Mozilla/5.0"\n'
+
+
+class TestFollow(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.test_dir.name, "access.log")
+        with open(self.path, "w") as f:
+            f.write(make_line(START - 3600, "/old"))
+        self.now = START
+        self.reports = []
+
+    def tearDown(self):
+        self.test_dir.cleanup()
+
+    def sleep(self, seconds: float) -> None:
+        # Между опросами время сдвигается, а в файл дописываются строки
+        with open(self.path, "a") as f:
+            f.writelines(
+                make_line(self.now + second, f"/page/{second % 2}")
+                for second in range(int(seconds))
+            )
+            f.write("garbage line\n")
+        self.now += seconds
+
+    def test_follow_renders_windows(self):
+        processor = LogParserProcessor(LogData(), "source", "/page/1")
+        windowed = WindowedLogData(processor.log_data.new_partial(), (60, 300))
+        processor.follow(
+            self.path,
+            windowed,
+            render=self.reports.append,
+            refresh_interval=100,
+            poll_interval=50,
+            clock=lambda: self.now,
+            sleep=self.sleep,
+            max_polls=9,
+        )
+
+        # Отчет при первом опросе и затем каждые 100 секунд
+        self.assertEqual(len(self.reports), 5)
+        seconds, window = self.reports[-1][0]
+        self.assertEqual(seconds, 60)
+        self.assertEqual(window.file_names, [self.path])
+        # Строки, которые были в файле до запуска, не учитываются
+        self.assertEqual(self.reports[0][0][1].total_requests_cnt, 0)
+        # За 60 секунд - около 30 запросов /page/1 (с точностью до корзины)
+        self.assertAlmostEqual(window.total_requests_cnt, 30, delta=3)
+        self.assertEqual(set(window.sources_statistics), {"/page/1"})
+        self.assertAlmostEqual(self.reports[-1][1][1].total_requests_cnt, 150, delta=3)
+
+        text = render_windows(self.reports[-1], "markdown")
+        self.assertIn("## Последние 1m", text)
+        self.assertIn("## Последние 5m", text)
+
+    def test_format_duration(self):
+        self.assertEqual(format_duration(60), "1m")
+        self.assertEqual(format_duration(3600), "1h")
+        self.assertEqual(format_duration(5400), "90m")
+        self.assertEqual(format_duration(45), "45s")
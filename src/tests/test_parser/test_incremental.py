@@ -0,0 +1,105 @@
+import gzip
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from src.databases.log_data import LogData
+from src.databases.state_store import StateStore
+from src.parser_process.log_processor import LogParserProcessor
+from src.parser_process.sharding import Shard, iter_shard_lines
+from src.tests.conftest import make_line
+
+
+def make_lines(start: int, stop: int) -> str:
+    return "".join(make_line(i) + "\n" for i in range(start, stop))
+
+
+class TestIncrementalProcessing(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.TemporaryDirectory()
+        self.log = os.path.join(self.test_dir.name, "access.log")
+        self.rotated = os.path.join(self.test_dir.name, "access.log.1.gz")
+        self.state = os.path.join(self.test_dir.name, "state.json")
+        self.pattern = os.path.join(self.test_dir.name, "access.log*")
+
+        with open(self.log, "w") as f:
+            f.write(make_lines(0, 100))
+        with gzip.open(self.rotated, "wt") as f:
+            f.write(make_lines(100, 150))
+
+    def tearDown(self):
+        self.test_dir.cleanup()
+
+    def append(self, text: str) -> None:
+        with open(self.log, "a") as f:
+            f.write(text)
+
+    def run_full(self, **kwargs) -> LogData:
+        log_data = LogData(from_date="2024-11-09T10:05:00")
+        LogParserProcessor(log_data, **kwargs).process(self.pattern)
+        return log_data
+
+    def run_incremental(self, **kwargs) -> LogData:
+        store = StateStore.load(self.state)
+        log_data = LogData(from_date="2024-11-09T10:05:00")
+        LogParserProcessor(log_data, state_store=store, **kwargs).process(self.pattern)
+        store.save()
+        return log_data
+
+    def test_unchanged_files_are_not_parsed(self):
+        self.assertEqual(self.run_incremental(), self.run_full())
+        with patch.object(LogParserProcessor, "_consume") as mock_consume:
+            log_data = self.run_incremental()
+        mock_consume.assert_not_called()
+        self.assertEqual(log_data, self.run_full())
+
+    def test_appended_lines(self):
+        self.run_incremental()
+
+        # Дописанная строка без перевода строки учитывается, но не сохраняется
+        self.append(make_lines(200, 230) + make_line(230)[:50])
+        self.assertEqual(self.run_incremental(), self.run_full())
+
+        offset = os.path.getsize(self.log) - 50
+        self.append(make_line(230)[50:] + "\n" + make_lines(231, 240))
+        with patch(
+            "src.parser_process.log_processor.iter_shard_lines",
+            side_effect=iter_shard_lines,
+        ) as mock_lines:
+            log_data = self.run_incremental()
+        self.assertEqual(log_data, self.run_full())
+
+        # Разобраны только новые строки файла, начиная с недописанной
+        shards = [call.args[0] for call in mock_lines.call_args_list]
+        self.assertEqual(shards, [Shard(self.log, offset, os.path.getsize(self.log))])
+
+    def test_replaced_and_truncated_files(self):
+        self.run_incremental()
+
+        # Файл той же длины с другим содержимым
+        with open(self.log, "w") as f:
+            f.write(make_lines(1, 101))
+        self.assertEqual(self.run_incremental(), self.run_full())
+
+        with open(self.log, "w") as f:
+            f.write(make_lines(0, 10))
+        self.assertEqual(self.run_incremental(), self.run_full())
+
+        # Новый сжатый файл с тем же именем
+        with gzip.open(self.rotated, "wt") as f:
+            f.write(make_lines(300, 320))
+        self.assertEqual(self.run_incremental(), self.run_full())
+
+    def test_config_change(self):
+        self.run_incremental()
+        self.assertEqual(
+            self.run_incremental(filter_field="method", filter_value="GET"),
+            self.run_full(filter_field="method", filter_value="GET"),
+        )
+
+    @patch("src.parser_process.sharding.MIN_SHARD_SIZE", 1000)
+    def test_parallel_incremental(self):
+        self.run_incremental(workers=3)
+        self.append(make_lines(200, 260))
+        self.assertEqual(self.run_incremental(workers=3), self.run_full())
@@ -0,0 +1,43 @@
+import unittest
+
+from src.parser_process.line_parser import LOG_FIELDS, LOG_PATTERN, LineParser
+
+
+class TestLineParser(unittest.TestCase):
+    line = '127.0.0.1 - - [09/Nov/2024:10:00:00 +0000] "GET /index.html HTTP/1.1" 200 1234 "-" "Mozilla/5.0"'
+
+    def test_parse_all_fields(self):
+        # Полный разбор совпадает с исходным регулярным выражением
+        parser = LineParser()
+        self.assertEqual(
+            parser.parse(self.line), LOG_PATTERN.match(self.line).groupdict()
+        )
+        self.assertEqual(parser.fields, LOG_FIELDS)
+
+    def test_parse_selected_fields(self):
+        # Захватываются только запрошенные поля, в порядке следования в строке
+        parser = LineParser(["status", "remote_addr", "source"])
+
+        self.assertEqual(parser.fields, ("remote_addr", "source", "status"))
+        self.assertEqual(
+            parser.parse_values(self.line), ("127.0.0.1", "/index.html", "200")
+        )
+        self.assertEqual(
+            parser.parse(self.line),
+            {"remote_addr": "127.0.0.1", "source": "/index.html", "status": "200"},
+        )
+        self.assertEqual(parser.index("status"), 2)
+
+    def test_invalid_line(self):
+        # Строка без обязательных полей не разбирается
+        parser = LineParser(["status"])
+        self.assertIsNone(
+            parser.parse_values("127.0.0.1 - - [09/Nov/2024:10:00:00 +0000]")
+        )
+        self.assertIsNone(
+            parser.parse('127.0.0.1 - - [x] "GET / HTTP/1.1" 2000 1 "-" "-"')
+        )
+
+    def test_unknown_field(self):
+        with self.assertRaises(ValueError):
+            LineParser(["agent"])
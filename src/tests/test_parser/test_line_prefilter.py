@@ -0,0 +1,145 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from src.databases.log_data import LogData
+from src.parser_process.line_parser import LOG_FIELDS, LineParser
+from src.parser_process.line_prefilter import prefilter_lines, time_between
+from src.parser_process.log_filter import parse_filter
+from src.parser_process.log_processor import LogParserProcessor
+from src.parser_process.time_decoder import TimeDecoder
+from src.tests.conftest import STATUSES
+from src.tests.conftest import make_line as make_log_line
+
+
+def make_line(i: int) -> str:
+    # Несколько подсетей, статус 503 и "500" в пути запроса
+    return make_log_line(
+        i,
+        remote_addr=f"10.0.{i % 3}.{i % 7}",
+        source=f"/page/{i % 11}/500",
+        status=(*STATUSES, "503")[i % 5],
+    )
+
+
+# Строки, на которых простые проверки подстрок ошиблись бы
+TRICKY_LINES = [
+    # Пользователь с '[', '" ' и статусом внутри запроса
+    '10.0.0.1 - [x [09/Nov/2024:10:30:00 +0000] "GET /a"_500_ HTTP/1.1" 200 1 "-" "-"',
+    '10.0.0.1 - - [09/Nov/2024:10:30:00 +0000] "GET /a"_x" HTTP/1.1" 404 1 "-" "-"',
+    '10.0.0.1 - - [09/Nov/2024:10:30:00 +0000] "GE" 123 HTTP/1.1" 500 1 "-" "-"',
+    # Нестандартное время, испорченные и не ASCII строки
+    '10.0.0.1 - - [2024-11-09 10:30:00] "GET /a HTTP/1.1" 500 1 "-" "-"',
+    '10.0.0.1 - - [09/Nov/2024:10:30:00 +0000] "GET /a HTTP/1.1" 5000 1 "-" "-"',
+    '10.0.0.1 - - [09/Nov/2024:10:30:00 +0000] "GET /страница HTTP/1.1" 500 1 "-" "-"',
+    "garbage",
+]
+
+EXPRESSIONS = [
+    "status = 500",
+    "status like '5*'",
+    "status >= 500",
+    "status in 400..404",
+    "status < 300 OR method = DELETE",
+    "method = GET AND source like '/page/*/500'",
+    "source like '*[0-9]'",
+    "remote_addr = 10.0.0.1",
+    "NOT status = 500",
+    "http_user_agent ~ Mozilla",
+]
+
+
+class TestLinePrefilter(unittest.TestCase):
+    def test_checks_never_reject_matching_lines(self):
+        parser = LineParser()
+        lines = [make_line(i) for i in range(300)] + TRICKY_LINES
+        for expression in EXPRESSIONS:
+            node = parse_filter(expression, LOG_FIELDS)
+            matches = node.compile(parser.index)
+            for binary in (False, True):
+                check = node.line_check(binary)
+                if check is None:
+                    continue
+                for line in lines:
+                    values = parser.parse_values(line)
+                    if values is None or not matches(values):
+                        continue
+                    with self.subTest(expression=expression, line=line):
+                        self.assertTrue(check(line.encode("utf-8") if binary else line))
+
+    def test_checks_reject_lines(self):
+        line = make_line(1)  # POST ... 404
+        for expression in ("status = 500", "status >= 500", "method like 'G*'"):
+            check = parse_filter(expression, LOG_FIELDS).line_check()
+            self.assertFalse(check(line), expression)
+        # Отрицание и регулярное выражение по сырой строке не проверяются
+        for expression in (
+            "NOT status = 500",
+            "source ~ page",
+            "status = 1 OR source ~ a",
+        ):
+            self.assertIsNone(parse_filter(expression, LOG_FIELDS).line_check())
+
+    def test_time_check(self):
+        decoder = TimeDecoder()
+        start = decoder.decode("09/Nov/2024:10:20:00 +0000")
+        end = decoder.decode("09/Nov/2024:10:40:00 +0000")
+        for binary in (False, True):
+            check = time_between(start, end, decoder.decode, binary)
+            encode = (lambda line: line.encode("utf-8")) if binary else str
+            self.assertTrue(check(encode(make_line(30))))
+            self.assertFalse(check(encode(make_line(10))))
+            self.assertFalse(check(encode("garbage")))
+            # Время внутри поля пользователя не путается со временем запроса
+            self.assertTrue(check(encode(TRICKY_LINES[0])))
+            # Нестандартное время и не ASCII строки оценивает полный разбор
+            self.assertTrue(check(encode(TRICKY_LINES[3])))
+            self.assertTrue(check(encode(TRICKY_LINES[5])))
+
+    @patch("src.parser_process.line_prefilter.PREFILTER_PROBE_SIZE", 10)
+    def test_adaptive_chunks(self):
+        lines = list(range(100))
+        # Отклоняется мало строк: пачка не проверяется
+        self.assertEqual(list(prefilter_lines(lines, lambda n: n % 10, 50)), lines)
+        self.assertEqual(
+            list(prefilter_lines(lines, lambda n: n >= 70, 50)),
+            list(range(70, 100)),
+        )
+
+
+class TestPrefilterProcessing(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.TemporaryDirectory()
+        self.log = os.path.join(self.test_dir.name, "access.log")
+        with open(self.log, "w", encoding="utf-8") as f:
+            lines = [make_line(i) for i in range(1000)]
+            # Строка с нестандартным временем остановила бы подсчет с --from/--to
+            for position, line in enumerate(TRICKY_LINES[:3] + TRICKY_LINES[4:]):
+                lines.insert(position * 97, line)
+            f.write("\n".join(lines) + "\n")
+
+    def tearDown(self):
+        self.test_dir.cleanup()
+
+    def run_processor(self, expression: str | None, **kwargs) -> LogData:
+        log_data = LogData(
+            from_date="2024-11-09T10:10:00", to_date="2024-11-09T10:35:00"
+        )
+        LogParserProcessor(log_data, filter_expression=expression, **kwargs).process(
+            self.log
+        )
+        return log_data
+
+    @patch("src.parser_process.line_prefilter.PREFILTER_PROBE_SIZE", 16)
+    @patch("src.parser_process.line_prefilter.PREFILTER_CHUNK_SIZE", 64)
+    def test_same_statistics(self):
+        for expression in (None, *EXPRESSIONS):
+            for kwargs in ({}, {"engine": "columnar"}, {"reader": "mmap"}):
+                with self.subTest(expression=expression, **kwargs):
+                    log_data = self.run_processor(expression, **kwargs)
+                    with patch.object(
+                        LogParserProcessor, "_line_prefilter", return_value=None
+                    ):
+                        expected = self.run_processor(expression, **kwargs)
+                    self.assertEqual(log_data, expected)
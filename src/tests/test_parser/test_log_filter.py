@@ -0,0 +1,105 @@
+import unittest
+
+from src.databases.log_data import LogData
+from src.parser_process.line_parser import LOG_FIELDS, LineParser
+from src.parser_process.log_filter import And, parse_filter
+from src.parser_process.log_processor import LogParserProcessor
+
+LINE = (
+    '10.1.2.3 - - [09/Nov/2024:10:00:00 +0000] "GET /static/app.js HTTP/1.1" '
+    '404 512 "-" "Googlebot/2.1"'
+)
+
+
+def matches(expression: str, line: str = LINE) -> bool:
+    parser = LineParser()
+    node = parse_filter(expression, LOG_FIELDS)
+    return node.compile(parser.index)(parser.parse_values(line))
+
+
+class TestLogFilter(unittest.TestCase):
+    def test_conditions(self):
+        cases = {
+            "method = GET": True,
+            "method != GET": False,
+            "METHOD = get": False,  # значения зависят от регистра
+            "source like '/static/*'": True,
+            "source like /static": False,
+            'http_user_agent ~ "(?i)googlebot"': True,
+            "http_user_agent !~ bot": False,
+            "status >= 400": True,
+            "status < 404": False,
+            "status in 400..499": True,
+            "body_bytes_sent > 512": False,
+            "remote_addr in 10.0.0.0/8": True,
+            "remote_addr in 10.1.2.4/32": False,
+            "remote_addr in ::1/128": False,
+        }
+        for expression, expected in cases.items():
+            with self.subTest(expression=expression):
+                self.assertEqual(matches(expression), expected)
+
+    def test_network_non_ip_addresses(self):
+        # Имя хоста, "-", сокращенная и смешанная запись адреса не входят в подсети
+        for address, network, expected in (
+            ("example.com", "::/96", False),
+            ("example.com", "0.0.0.0/0", False),
+            ("-", "::/0", False),
+            ("10.1", "10.0.0.0/8", False),
+            ("1", "0.0.0.0/0", False),
+            ("10.1.2.3", "::/0", False),
+            ("::ffff:10.1.2.3", "10.0.0.0/8", False),
+            ("2001:db8::1", "2001:db8::/32", True),
+        ):
+            with self.subTest(address=address, network=network):
+                line = LINE.replace("10.1.2.3", address, 1)
+                self.assertEqual(matches(f"remote_addr in {network}", line), expected)
+
+    def test_boolean_operators(self):
+        # AND связывает сильнее OR, NOT относится к ближайшему условию
+        self.assertTrue(matches("method = POST AND status = 200 OR status = 404"))
+        self.assertFalse(matches("method = POST AND (status = 200 OR status = 404)"))
+        self.assertTrue(matches("NOT method = POST and not (status < 400)"))
+
+    def test_cheap_conditions_first(self):
+        # Регулярное выражение проверяется после равенства
+        node = parse_filter("http_user_agent ~ bot AND method = GET", LOG_FIELDS)
+
+        self.assertIsInstance(node, And)
+        self.assertEqual(str(node), 'method = "GET" AND http_user_agent ~ "bot"')
+        self.assertEqual(node.fields(), {"method", "http_user_agent"})
+
+    def test_invalid_expressions(self):
+        for expression in (
+            "",
+            "agent = x",
+            "method > 3",
+            "status in 10.0.0.0/8",
+            "remote_addr in 300.0.0.0/8",
+            "status = 200 AND",
+            "(status = 200",
+            "source ~ '('",
+        ):
+            with self.subTest(expression=expression), self.assertRaises(ValueError):
+                parse_filter(expression, LOG_FIELDS)
+
+    def test_processor_combines_filters(self):
+        # --filter и --filter-field/--filter-value объединяются через AND
+        processor = LogParserProcessor(
+            LogData(),
+            filter_field="STATUS",
+            filter_value="4*",
+            filter_expression="remote_addr in 10.0.0.0/8",
+        )
+        other_line = LINE.replace("10.1.2.3", "192.168.0.1")
+
+        processor._consume([LINE, other_line, LINE.replace(" 404 ", " 200 ")])
+
+        self.assertEqual(processor.filter_field, "status")
+        self.assertEqual(processor.log_data.total_requests_cnt, 1)
+        self.assertTrue(processor.check_log(processor.parse_log_line(LINE)))
+        self.assertFalse(processor.check_log(processor.parse_log_line(other_line)))
+
+    def test_unknown_filter_field(self):
+        with self.assertRaises(ValueError):
+            LogParserProcessor(LogData(), filter_field="agent", filter_value="x")
@@ -0,0 +1,61 @@
+import os
+import tempfile
+import unittest
+
+from src.bench.log_generator import LogProfile, generate_lines, write_log
+from src.bench.suite import SCENARIOS, run_scenario
+from src.databases.log_data import LogData
+from src.parser_process.line_parser import LineParser
+from src.parser_process.log_processor import LogParserProcessor
+
+
+class TestLogGenerator(unittest.TestCase):
+    def test_deterministic(self):
+        profile = LogProfile(seed=7)
+        self.assertEqual(
+            list(generate_lines(500, profile)), list(generate_lines(500, profile))
+        )
+        self.assertNotEqual(
+            list(generate_lines(500, profile)),
+            list(generate_lines(500, LogProfile(seed=8))),
+        )
+
+    def test_profile(self):
+        profile = LogProfile(urls=50, ips=20, error_rate=0.2, malformed_ratio=0.05)
+        lines = list(generate_lines(20_000, profile))
+        parsed = [LineParser().parse(line) for line in lines]
+        valid = [log for log in parsed if log is not None]
+
+        # Доли примерные: строки генерируются случайно
+        self.assertAlmostEqual(1 - len(valid) / len(lines), 0.05, delta=0.01)
+        errors = sum(log["status"] >= "400" for log in valid)
+        self.assertAlmostEqual(errors / len(valid), 0.2, delta=0.02)
+        self.assertLessEqual(len({log["source"] for log in valid}), 50)
+        self.assertLessEqual(len({log["remote_addr"] for log in valid}), 20)
+
+    def test_time_bounds(self):
+        profile = LogProfile(lines_per_second=1)
+        self.assertEqual(
+            profile.time_bounds(3600), ("2024-11-09T00:20:00", "2024-11-09T00:40:00")
+        )
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "access.log")
+            write_log(path, 3600, LogProfile(lines_per_second=1, malformed_ratio=0))
+            from_date, to_date = profile.time_bounds(3600)
+            log_data = LogData(from_date=from_date, to_date=to_date)
+            LogParserProcessor(log_data).process(path)
+            self.assertEqual(log_data.total_requests_cnt, 1201)
+
+
+class TestBenchmarkSuite(unittest.TestCase):
+    def test_scenarios(self):
+        profile = LogProfile()
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "access.log")
+            write_log(path, 2000, profile)
+            for name in SCENARIOS:
+                result = run_scenario(name, path, profile, 2000, repeat=1)
+                self.assertEqual(result.name, name)
+                self.assertGreater(result.items, 0)
+                self.assertGreater(result.items_per_second, 0)
@@ -0,0 +1,111 @@
+import gzip
+import os
+import tempfile
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from itertools import chain
+
+from src.databases.log_data import LogData
+from src.parser_process.log_processor import LogParserProcessor
+from src.parser_process.pipeline import iter_batches_in_thread, map_ordered
+from src.parser_process.profiler import Profiler
+from src.tests.conftest import make_line
+
+
+class TestBatchesInThread(unittest.TestCase):
+    def test_batches(self):
+        batches = list(iter_batches_in_thread(range(1000), batch_size=300))
+        self.assertEqual([len(batch) for batch in batches], [300, 300, 300, 100])
+        self.assertEqual(list(chain.from_iterable(batches)), list(range(1000)))
+
+    def test_reader_error(self):
+        def lines():
+            yield from range(500)
+            raise OSError("disk error")
+
+        received = []
+        with self.assertRaisesRegex(OSError, "disk error"):
+            for batch in iter_batches_in_thread(lines(), batch_size=100):
+                received.extend(batch)
+        self.assertEqual(received, list(range(500)))
+
+    def test_backpressure_and_stop(self):
+        produced = 0
+        closed = threading.Event()
+
+        def lines():
+            nonlocal produced
+            try:
+                while True:
+                    produced += 1
+                    yield produced
+            finally:
+                closed.set()
+
+        batches = iter_batches_in_thread(lines(), batch_size=10, queue_size=2)
+        next(batches)
+        time.sleep(0.2)
+        # Чтение ждет, пока освободится место в очереди
+        self.assertLessEqual(produced, 10 * 5)
+
+        # Потребитель закончил раньше: источник закрывается
+        batches.close()
+        self.assertTrue(closed.wait(2))
+
+
+class TestMapOrdered(unittest.TestCase):
+    def test_order_and_window(self):
+        running = 0
+        max_running = 0
+        lock = threading.Lock()
+
+        def square(delay: float, item: int) -> int:
+            nonlocal running, max_running
+            with lock:
+                running += 1
+                max_running = max(max_running, running)
+            time.sleep(delay * (item % 3))
+            with lock:
+                running -= 1
+            return item * item
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            results = list(map_ordered(pool, square, range(20), 0.01, window=3))
+        self.assertEqual(results, [item * item for item in range(20)])
+        self.assertLessEqual(max_running, 3)
+
+
+class TestPipelineProcessing(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.TemporaryDirectory()
+        with open(os.path.join(self.test_dir.name, "access.log"), "w") as f:
+            f.write("".join(make_line(i) + "\n" for i in range(700)))
+        with gzip.open(os.path.join(self.test_dir.name, "access.log.1.gz"), "wt") as f:
+            f.write("".join(make_line(i) + "\n" for i in range(700, 1000)))
+        self.pattern = os.path.join(self.test_dir.name, "access.log*")
+
+    def tearDown(self):
+        self.test_dir.cleanup()
+
+    def run_processor(self, **kwargs) -> LogData:
+        log_data = LogData(from_date="2024-11-09T10:05:00")
+        LogParserProcessor(
+            log_data, filter_expression="status != 301", **kwargs
+        ).process(self.pattern)
+        return log_data
+
+    def test_same_statistics(self):
+        expected = self.run_processor()
+        for kwargs in (
+            {},
+            {"reader": "mmap"},
+            {"engine": "columnar"},
+            {"workers": 2},
+            {"workers": 2, "profiler": Profiler()},
+        ):
+            with self.subTest(**{k: v for k, v in kwargs.items() if k != "profiler"}):
+                log_data = self.run_processor(pipeline=True, batch_size=128, **kwargs)
+                self.assertEqual(log_data, expected)
+                self.assertEqual(repr(log_data), repr(expected))
@@ -0,0 +1,117 @@
+import json
+import os
+import pickle
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from src.databases.log_data import LogData
+from src.parser_process.log_processor import LogParserProcessor
+from src.parser_process.profiler import Profiler, deep_size
+from src.parser_process.sharding import plan_shards
+from src.tests.conftest import make_line
+
+
+class TestProfiler(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.TemporaryDirectory()
+        self.log = os.path.join(self.test_dir.name, "access.log")
+        with open(self.log, "w") as f:
+            # Каждая 50-я строка испорчена
+            f.write(
+                "".join(
+                    (make_line(i) if i % 50 else "broken line") + "\n"
+                    for i in range(3000)
+                )
+            )
+
+    def tearDown(self):
+        self.test_dir.cleanup()
+
+    def run_processor(self, profiler: Profiler | None, **kwargs) -> LogData:
+        log_data = LogData(from_date="2024-11-09T10:10:00")
+        LogParserProcessor(
+            log_data, filter_expression="method != DELETE", profiler=profiler, **kwargs
+        ).process(self.log)
+        return log_data
+
+    @patch("src.parser_process.profiler.PROFILE_CHUNK_SIZE", 256)
+    def test_profiled_matches_plain(self):
+        for kwargs in ({}, {"engine": "columnar"}, {"reader": "mmap"}):
+            with self.subTest(**kwargs):
+                profiler = Profiler()
+                log_data = self.run_processor(profiler, **kwargs)
+                self.assertEqual(log_data, self.run_processor(None, **kwargs))
+
+                counters = profiler.counters
+                self.assertEqual(counters["lines_read"], 3000)
+                self.assertEqual(counters["counted"], log_data.total_requests_cnt)
+                self.assertEqual(
+                    counters["prefiltered"]
+                    + counters["malformed"]
+                    + counters["filtered"]
+                    + counters["out_of_range"]
+                    + counters["counted"],
+                    counters["lines_read"],
+                )
+                self.assertLessEqual(
+                    {"discover", "read", "prefilter", "parse", "filter"},
+                    set(profiler.stages),
+                )
+
+    def test_parallel_profile(self):
+        profiler = Profiler()
+        with patch(
+            "src.parser_process.log_processor.plan_shards",
+            lambda files, workers: plan_shards(files, workers, min_shard_size=1000),
+        ):
+            log_data = self.run_processor(profiler, workers=3)
+        self.assertEqual(log_data, self.run_processor(None))
+        # Замеры из процессов пула складываются
+        self.assertEqual(profiler.counters["lines_read"], 3000)
+        self.assertGreater(profiler.stages["parse"].calls, 1)
+        # Время этапов сложено по процессам, что отмечено в отчете
+        self.assertTrue(profiler.merged)
+        self.assertIn("сумма по процессам пула", profiler.render_table())
+        self.assertNotIn("сумма по процессам пула", Profiler().render_table())
+
+    def test_bytes_read(self):
+        with open(self.log, "w") as f:
+            f.write("".join(make_line(i) + ' "/ссылка"\n' for i in range(300)))
+        # Байты файла без переводов строк, а не символы
+        expected = os.path.getsize(self.log) - 300
+        for kwargs in ({}, {"reader": "mmap"}):
+            with self.subTest(**kwargs):
+                profiler = Profiler()
+                self.run_processor(profiler, **kwargs)
+                self.assertEqual(profiler.counters["bytes_read"], expected)
+
+    def test_report(self):
+        profile_dump = os.path.join(self.test_dir.name, "profile.pstats")
+        profiler = Profiler(profile_dump)
+        profiler.start()
+        log_data = self.run_processor(profiler)
+        profiler.stop()
+        profiler.measure_memory(log_data)
+
+        self.assertTrue(os.path.getsize(profile_dump))
+        self.assertGreater(profiler.total.wall, 0)
+        self.assertGreater(profiler.memory["response_sizes"], 0)
+        self.assertIn("lines/s", profiler.render_table())
+
+        path = os.path.join(self.test_dir.name, "profile.json")
+        profiler.save(path)
+        with open(path) as f:
+            report = json.load(f)
+        self.assertEqual(report["counters"]["lines_read"], 3000)
+        self.assertEqual(set(report["stages"]["parse"]), {"wall", "cpu", "calls"})
+
+        # Профиль передается в процессы пула без cProfile
+        self.assertEqual(
+            pickle.loads(pickle.dumps(profiler)).counters, profiler.counters
+        )
+
+    def test_deep_size(self):
+        shared = "x" * 1000
+        self.assertGreater(deep_size({"a": shared}), 1000)
+        self.assertLess(deep_size([shared, shared]), 2000)
@@ -0,0 +1,165 @@
+import gzip
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from src.bench.log_generator import write_log
+from src.databases.log_data import LogData
+from src.databases.quantiles import DDSketchQuantiles
+from src.databases.sampling import SampleStats
+from src.parser_process.log_processor import LogParserProcessor
+from src.parser_process.sampling import iter_sample_runs, plan_sample_blocks
+from src.parser_process.sharding import iter_shard_lines
+from src.renderer.log_data_repr import LogDataRepr
+
+
+@patch("src.parser_process.log_processor.plan_sample_blocks")
+class TestSampling(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.TemporaryDirectory()
+        self.log = os.path.join(self.test_dir.name, "access.log")
+        self.compressed = os.path.join(self.test_dir.name, "access.log.1.gz")
+        self.pattern = os.path.join(self.test_dir.name, "access.log*")
+        write_log(self.log, 20_000)
+        with open(self.log, "rb") as source, gzip.open(self.compressed, "wb") as f:
+            shutil.copyfileobj(source, f)
+
+    def tearDown(self):
+        self.test_dir.cleanup()
+
+    @staticmethod
+    def small_blocks(path: str, fraction: float, seed: int, stratum: int):
+        # Блоки по 20 КБ, чтобы в небольшом логе их было много
+        return plan_sample_blocks(path, fraction, seed, stratum, block_size=20_000)
+
+    def run_sample(self, fraction: float, seed: int = 0, **kwargs) -> LogData:
+        log_data = LogData()
+        LogParserProcessor(
+            log_data, sample=fraction, sample_seed=seed, **kwargs
+        ).process(self.pattern)
+        return log_data
+
+    def test_blocks_cover_file(self, mock_plan):
+        blocks = self.small_blocks(self.log, 1, 0, 0)
+        self.assertGreater(len(blocks), 50)
+        lines = [line for block in blocks for line in iter_shard_lines(block)]
+        with open(self.log) as f:
+            self.assertEqual(lines, [line.strip() for line in f])
+
+        # Из каждых 1 / fraction подряд идущих блоков выбран один
+        indexes = [
+            block.start // 20_000 for block in self.small_blocks(self.log, 0.1, 0, 0)
+        ]
+        self.assertEqual([index // 10 for index in indexes], list(range(len(indexes))))
+
+        runs = list(iter_sample_runs(map(str, range(2500)), 0.5, 0, 0, 100))
+        self.assertEqual(len(runs), 25)
+        self.assertEqual(
+            sum(size for size, _ in runs), len("".join(map(str, range(2500)))) + 2500
+        )
+        self.assertTrue(12 <= sum(run is not None for _, run in runs) <= 13)
+
+    def test_small_logs_are_sampled(self, mock_plan):
+        mock_plan.side_effect = plan_sample_blocks
+        # Логи меньше одного блока: выбирается хотя бы один блок на файл
+        small = os.path.join(self.test_dir.name, "small")
+        os.mkdir(small)
+        write_log(os.path.join(small, "access.log"), 50)
+        with open(os.path.join(small, "access.log"), "rb") as source:
+            data = source.read()
+        with gzip.open(os.path.join(small, "access.log.1.gz"), "wb") as f:
+            f.write(data)
+        log_data = LogData()
+        LogParserProcessor(log_data, sample=0.01).process(small)
+        self.assertEqual(log_data.sample.units, 2)
+        self.assertEqual(log_data.total_requests_cnt, 100)
+
+        runs = list(iter_sample_runs(map(str, range(250)), 0.01, 0, 0, 100))
+        self.assertEqual([run is not None for _, run in runs], [False, False, True])
+        self.assertEqual(runs[-1][1], list(map(str, range(200, 250))))
+
+    def test_run_sizes_in_bytes(self, mock_plan):
+        lines = ["путь"] * 10
+        ((size, _),) = iter_sample_runs(lines, 1, 0, 0)
+        self.assertEqual(size, len("\n".join(lines).encode()) + 1)
+
+    def test_full_sample_is_exact(self, mock_plan):
+        mock_plan.side_effect = self.small_blocks
+        exact = LogData()
+        LogParserProcessor(exact).process(self.pattern)
+
+        sampled = self.run_sample(1)
+        self.assertEqual(sampled.sample.scale, 1)
+        self.assertEqual(sampled.total_requests_cnt, exact.total_requests_cnt)
+        self.assertEqual(
+            dict(sampled.sources_statistics), dict(exact.sources_statistics)
+        )
+        self.assertEqual(
+            dict(sampled.response_codes_statistics),
+            dict(exact.response_codes_statistics),
+        )
+        self.assertEqual(sorted(sampled.response_sizes), sorted(exact.response_sizes))
+        # Выбраны все блоки: интервалы нулевой ширины
+        self.assertEqual(sampled.sample.total_error(), 0)
+
+    def test_estimates_within_intervals(self, mock_plan):
+        mock_plan.side_effect = self.small_blocks
+        exact = LogData()
+        LogParserProcessor(exact).process(self.pattern)
+        sampled = self.run_sample(0.2, seed=3, workers=2)
+        sample = sampled.sample
+
+        self.assertGreater(sample.units, 20)
+        self.assertLess(len(sampled.response_sizes), exact.total_requests_cnt / 3)
+        self.assertLessEqual(
+            abs(sampled.total_requests_cnt - exact.total_requests_cnt),
+            sample.total_error(),
+        )
+        sizes, exact_sizes = sampled.size_quantiles, exact.size_quantiles
+        self.assertLessEqual(
+            abs(sizes.mean() - exact_sizes.mean()), sample.mean_error(sizes)
+        )
+        low, high = sample.percentile_interval(sizes, 95)
+        self.assertTrue(low <= exact_sizes.percentile(95) <= high)
+        share, error = sample.share("200")
+        exact_share = exact.response_codes_statistics["200"] / exact.total_requests_cnt
+        self.assertLessEqual(abs(share - exact_share), error)
+
+    def test_deterministic(self, mock_plan):
+        mock_plan.side_effect = self.small_blocks
+        first, second = self.run_sample(0.1, seed=5), self.run_sample(0.1, seed=5)
+        self.assertEqual(first, second)
+        self.assertNotEqual(first.sample, self.run_sample(0.1, seed=6).sample)
+
+    def test_report(self, mock_plan):
+        mock_plan.side_effect = self.small_blocks
+        log_data = self.run_sample(0.2)
+
+        report = LogDataRepr(log_data).get_repr("markdown")
+        self.assertIn("20% логов", report)
+        self.assertRegex(report, r"\|\s+\d[\d_]* ± \d[\d_]*\|")
+        self.assertRegex(
+            report, r"\| 200 \|\s+OK\s+\|\s+[\d_]+\|\s+[\d.]+% ± [\d.]+%\|"
+        )
+
+        document = json.loads(LogDataRepr(log_data).get_repr("json"))
+        sample = document["sample"]
+        low, high = sample["total_requests"]
+        self.assertTrue(low <= document["total_requests"] <= high)
+        low, high = sample["percentiles"]["95"]
+        self.assertTrue(low <= document["percentiles"]["95"] <= high)
+        self.assertIn("200", sample["status_shares"])
+
+        # Ни один блок не выбран: оценки нулевые, интервалов нет
+        empty = LogData(sample=SampleStats(0.01, total_size=1000))
+        for format_type in ("markdown", "adoc", "json", "ndjson", "csv"):
+            self.assertIn("0", LogDataRepr(empty).get_repr(format_type))
+
+    def test_invalid_settings(self, mock_plan):
+        with self.assertRaises(ValueError):
+            LogParserProcessor(LogData(), sample=0)
+        with self.assertRaises(ValueError):
+            LogParserProcessor(LogData(size_sketch=DDSketchQuantiles()), sample=0.1)
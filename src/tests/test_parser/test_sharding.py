@@ -0,0 +1,95 @@
+import gzip
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from src.databases.log_data import LogData
+from src.iterators.local_path_iterator import LocalPathIterator
+from src.parser_process.log_processor import LogParserProcessor
+from src.parser_process.sharding import (
+    Shard,
+    iter_shard_lines,
+    plan_shards,
+    schedule_order,
+)
+from src.tests.conftest import make_line
+
+
+class TestSharding(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.TemporaryDirectory()
+        self.file1 = os.path.join(self.test_dir.name, "access1.log")
+        self.file2 = os.path.join(self.test_dir.name, "access2.log")
+
+        # Переводы строк \r\n, пустые строки и последняя строка без перевода
+        with open(self.file1, "w", newline="") as f:
+            f.write("\r\n".join(make_line(i) for i in range(300)) + "\r\n\r\n")
+        with open(self.file2, "w") as f:
+            f.write("\n".join(make_line(i) for i in range(300, 500)))
+
+    def tearDown(self):
+        self.test_dir.cleanup()
+
+    def test_shards_cover_files(self):
+        files = sorted(
+            LocalPathIterator(os.path.join(self.test_dir.name, "*.log")).files
+        )
+        shards = plan_shards(files, workers=4, min_shard_size=1000)
+
+        # Файлы разбиты на несколько частей по границам строк
+        self.assertGreater(len(shards), len(files))
+        self.assertEqual([s.path for s in shards], sorted(s.path for s in shards))
+
+        lines = [line for shard in shards for line in iter_shard_lines(shard)]
+        expected = [line for path in files for line in LocalPathIterator(path)]
+        self.assertEqual(lines, expected)
+
+    @patch("src.parser_process.sharding.MIN_SHARD_SIZE", 1000)
+    def test_parallel_matches_serial(self):
+        pattern = os.path.join(self.test_dir.name, "*.log")
+
+        serial = LogData(from_date="2024-11-09T10:10:00")
+        LogParserProcessor(serial, "method", "GET").process(pattern)
+
+        parallel = LogData(from_date="2024-11-09T10:10:00")
+        LogParserProcessor(parallel, "method", "GET", workers=3).process(pattern)
+
+        self.assertGreater(serial.total_requests_cnt, 0)
+        self.assertEqual(parallel, serial)
+        self.assertEqual(
+            list(parallel.sources_statistics), list(serial.sources_statistics)
+        )
+        self.assertEqual(repr(parallel), repr(serial))
+
+    def test_schedule_order(self):
+        compressed = os.path.join(self.test_dir.name, "access3.log.gz")
+        with gzip.open(compressed, "wt") as f:
+            f.write("\n".join(make_line(i) for i in range(2000)))
+        shards = [
+            Shard(self.file2),
+            Shard(self.file1, 0, 100),
+            Shard(compressed),
+            Shard(self.file1, 100, 200),
+            Shard(self.file1, 200),
+        ]
+        # Сначала самые большие части, сжатый файл весит больше своего размера
+        order = schedule_order(shards)
+        self.assertEqual(order[:2], [2, 4])
+        self.assertEqual(order[-2:], [1, 3])
+        self.assertEqual(sorted(order), list(range(len(shards))))
+
+    def test_merge(self):
+        first = LogData(total_requests_cnt=2, response_sizes=[1, 2], error_urls={"/a"})
+        first.sources_statistics.update({"/a": 1, "/b": 1})
+        second = LogData(total_requests_cnt=2, response_sizes=[3, 4], error_urls={"/c"})
+        second.sources_statistics.update({"/c": 1, "/a": 1})
+
+        first.merge(second)
+
+        self.assertEqual(first.total_requests_cnt, 4)
+        self.assertEqual(
+            list(first.sources_statistics.items()), [("/a", 2), ("/b", 1), ("/c", 1)]
+        )
+        self.assertEqual(first.response_sizes, [1, 2, 3, 4])
+        self.assertEqual(first.error_urls, {"/a", "/c"})
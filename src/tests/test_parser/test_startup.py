@@ -0,0 +1,25 @@
+import os
+import tempfile
+import unittest
+
+from src.bench.log_generator import write_log
+from src.bench.startup_bench import run_report
+
+
+class TestStartup(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.TemporaryDirectory()
+        self.log = os.path.join(self.test_dir.name, "access.log")
+        write_log(self.log, 200)
+
+    def tearDown(self):
+        self.test_dir.cleanup()
+
+    def test_local_report_without_heavy_modules(self):
+        # Отчет по небольшому локальному файлу не импортирует NumPy и requests
+        _, modules = run_report(self.log, "--filter", "status >= 400")
+        self.assertEqual(modules, [])
+
+    def test_heavy_modules_when_needed(self):
+        _, modules = run_report(self.log, "--engine", "columnar")
+        self.assertEqual(modules, ["numpy"])
@@ -0,0 +1,48 @@
+import unittest
+from datetime import datetime
+from unittest.mock import patch
+
+from src.databases.log_data import LogData
+from src.parser_process.log_processor import LogParserProcessor
+from src.parser_process.time_decoder import TIME_LOCAL_FORMAT, TimeDecoder
+
+
+class TestTimeDecoder(unittest.TestCase):
+    def test_decode_matches_strptime(self):
+        decoder = TimeDecoder()
+        for time_local in [
+            "09/Nov/2024:10:00:00 +0000",
+            "09/Nov/2024:10:00:00 +0000",  # повтор той же секунды
+            "09/Nov/2024:10:00:01 +0000",
+            "09/Nov/2024:10:00:01 +0300",
+            "31/Dec/2023:23:59:59 -0130",
+            "29/Feb/2024:00:00:00 +0000",
+            "9/nov/2024:10:00:00 +00:00",  # нестандартный вид, разбор через strptime
+        ]:
+            expected = datetime.strptime(time_local, TIME_LOCAL_FORMAT).timestamp()
+            self.assertEqual(decoder.decode(time_local), expected)
+
+    def test_invalid_time(self):
+        decoder = TimeDecoder()
+        with self.assertRaises(ValueError):
+            decoder.decode("31/Feb/2024:10:00:00 +0000")
+        with self.assertRaises(ValueError):
+            decoder.decode("not a time")
+
+    @patch(
+        "src.iterators.local_path_iterator.LocalPathIterator.__iter__",
+        return_value=iter(
+            [
+                '127.0.0.1 - - [09/Nov/2024:10:00:00 +0000] "GET /index.html HTTP/1.1" 200 1234 "-" "Mozilla/5.0"',
+                '127.0.0.2 - - [unknown] "GET /login HTTP/1.1" 200 5678 "-" "Mozilla/5.0"',
+            ]
+        ),
+    )
+    def test_no_time_bounds(self, mock_file):
+        # Без --from/--to время не разбирается вовсе
+        log_data = LogData()
+        processor = LogParserProcessor(log_data)
+        processor.process("test_path")
+
+        self.assertNotIn("time_local", processor._line_parser.fields)
+        self.assertEqual(log_data.total_requests_cnt, 2)
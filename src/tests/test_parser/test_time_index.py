@@ -0,0 +1,107 @@
+import gzip
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from src.databases.log_data import LogData
+from src.parser_process.log_processor import LogParserProcessor
+from src.parser_process.time_decoder import TimeDecoder
+from src.parser_process.time_index import TimeIndex, search_shards
+from src.tests.conftest import make_line
+
+
+def make_minute_line(minute: int, i: int) -> str:
+    return make_line(
+        i,
+        time_local=f"09/Nov/2024:{10 + minute // 60:02}:{minute % 60:02}:00 +0000",
+        method="GET",
+    )
+
+
+def make_lines(start: int, stop: int) -> str:
+    # По три строки в минуту, минуты подряд
+    return "".join(make_minute_line(i // 3, i) + "\n" for i in range(start, stop))
+
+
+class TestTimeIndex(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.TemporaryDirectory()
+        self.log = os.path.join(self.test_dir.name, "access.log")
+        self.old = os.path.join(self.test_dir.name, "access.log.1.gz")
+        self.pattern = os.path.join(self.test_dir.name, "access.log*")
+
+        with open(self.log, "w") as f:
+            f.write(make_lines(900, 1500))
+        with gzip.open(self.old, "wt") as f:
+            f.write(make_lines(0, 900))
+
+    def tearDown(self):
+        self.test_dir.cleanup()
+
+    def run_processor(self, time_index: bool, **kwargs) -> LogData:
+        log_data = LogData(
+            from_date="2024-11-09T16:10:00", to_date="2024-11-09T17:20:00"
+        )
+        LogParserProcessor(log_data, time_index=time_index, **kwargs).process(
+            self.pattern
+        )
+        return log_data
+
+    def build_indexes(self) -> None:
+        LogParserProcessor(LogData()).build_time_index(self.pattern)
+
+    def test_index_sidecar_is_not_a_log(self):
+        self.build_indexes()
+        self.assertTrue(os.path.exists(TimeIndex.index_path(self.log)))
+        self.assertEqual(self.run_processor(False), self.run_processor(True))
+
+    @patch("src.parser_process.time_index.SEARCH_BLOCK_SIZE", 256)
+    def test_binary_search_matches_full_scan(self):
+        expected = self.run_processor(False)
+        self.assertGreater(expected.total_requests_cnt, 0)
+        self.assertEqual(self.run_processor(True), expected)
+        self.assertEqual(self.run_processor(True, workers=2), expected)
+
+        # Читается только часть файла вокруг интервала
+        decoder = TimeDecoder()
+        start = decoder.decode("09/Nov/2024:16:10:00 +0000")
+        end = decoder.decode("09/Nov/2024:17:20:00 +0000")
+        (shard,) = search_shards(self.log, start, end, decoder.decode)
+        self.assertGreater(shard.start, 0)
+        self.assertLess(shard.end, os.path.getsize(self.log))
+
+    def test_index_matches_full_scan(self):
+        self.build_indexes()
+        expected = self.run_processor(False)
+        self.assertEqual(self.run_processor(True), expected)
+
+        # Сжатый файл целиком вне интервала и не открывается
+        with patch("src.parser_process.log_processor._process_shard") as mock_shard:
+            mock_shard.return_value = LogData(), None
+            self.run_processor(True)
+        paths = {call.args[1].path for call in mock_shard.call_args_list}
+        self.assertEqual(paths, {self.log})
+
+    def test_appended_and_unordered_lines(self):
+        self.build_indexes()
+        # Строка старше предыдущих попадает в интервал, дописанный конец читается
+        with open(self.log, "a") as f:
+            f.write(make_minute_line(400, 1) + "\n" + make_lines(1500, 1600))
+        self.assertEqual(self.run_processor(True), self.run_processor(False))
+
+        self.build_indexes()
+        index = TimeIndex.load(self.log)
+        self.assertEqual(index.disorder, (499 - 400) * 60)
+        self.assertEqual(self.run_processor(True), self.run_processor(False))
+
+    def test_stale_index_is_ignored(self):
+        self.build_indexes()
+        with open(self.log, "w") as f:
+            f.write(make_lines(1000, 1100))
+        self.assertIsNone(TimeIndex.load(self.log))
+        self.assertEqual(self.run_processor(True), self.run_processor(False))
+
+
+if __name__ == "__main__":
+    unittest.main()
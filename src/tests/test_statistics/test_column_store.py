@@ -0,0 +1,107 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import numpy as np
+
+from src.bench.parser_bench import make_lines
+from src.databases.column_store import ColumnStore
+from src.databases.log_data import LogData
+from src.parser_process.log_processor import LogParserProcessor
+
+
+def run(path: str, **settings) -> LogData:
+    log_data = LogData(**settings.pop("log_data", {}))
+    LogParserProcessor(log_data, **settings).process(path)
+    return log_data
+
+
+class TestColumnStore(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.TemporaryDirectory()
+        self.log_path = os.path.join(self.test_dir.name, "access.log")
+        # Строки двух дней и одна неразобранная строка
+        lines = make_lines(2000)
+        lines += [line.replace("09/Nov", "10/Nov") for line in make_lines(500)]
+        lines.insert(7, "broken line")
+        with open(self.log_path, "w") as file:
+            file.write("\n".join(lines) + "\n")
+        self.store_path = os.path.join(self.test_dir.name, "store")
+
+    def tearDown(self):
+        self.test_dir.cleanup()
+
+    def export(self) -> int:
+        processor = LogParserProcessor(LogData())
+        return processor.export_columns(self.log_path, self.store_path)
+
+    def assert_same_stats(self, expected: LogData, actual: LogData):
+        self.assertEqual(actual.file_names, [self.store_path])
+        actual.file_names = expected.file_names
+        self.assertEqual(actual, expected)
+
+    def test_query_matches_raw_logs(self):
+        self.assertEqual(self.export(), 2500)
+        store = ColumnStore.open(self.store_path)
+        self.assertEqual(
+            [partition["day"] for partition in store.partitions],
+            ["2024-11-09", "2024-11-10"],
+        )
+
+        for settings in (
+            {},
+            {"filter_expression": "status >= 400 AND method = GET"},
+            {"filter_expression": "time_local like '10/Nov*'"},
+            {
+                "log_data": {
+                    "from_date": "2024-11-09T10:30:00",
+                    "to_date": "2024-11-10T10:05:00",
+                }
+            },
+        ):
+            with self.subTest(settings=settings):
+                self.assert_same_stats(
+                    run(self.log_path, **dict(settings)),
+                    run(self.store_path, **dict(settings)),
+                )
+
+    def test_partition_pruning_and_projection(self):
+        self.export()
+        log_data = LogData(from_date="2024-11-10T00:00:00")
+
+        with patch("numpy.load", wraps=np.load) as mock_load:
+            LogParserProcessor(log_data).process(self.store_path)
+
+        # Открыта только часть за 10 ноября
+        ((args, _),) = mock_load.call_args_list
+        self.assertIn("day=2024-11-10", args[0])
+        self.assertEqual(log_data.total_requests_cnt, 500)
+
+        store = ColumnStore.open(self.store_path)
+        part = store.read(store.partitions[0], ["status"])
+        self.assertEqual(
+            sorted(part.arrays), ["status.ids", "status.values", "timestamp"]
+        )
+
+    def test_append(self):
+        self.export()
+        self.export()
+
+        store = ColumnStore.open(self.store_path)
+        self.assertEqual(store.rows_count, 5000)
+        # Каждый экспорт дописывает свои части для обоих дней
+        paths = [partition["path"] for partition in store.partitions]
+        self.assertEqual(len(set(paths)), 4)
+        self.assertEqual(run(self.store_path).total_requests_cnt, 5000)
+
+    def test_unknown_version(self):
+        self.export()
+        store = ColumnStore.open(self.store_path)
+        with open(os.path.join(self.store_path, "columns.json"), "w") as file:
+            file.write('{"version": 0}')
+
+        with self.assertRaises(ValueError):
+            ColumnStore.open(self.store_path)
+        self.assertTrue(ColumnStore.is_store(self.store_path))
+        self.assertEqual(len(store.partitions), 2)
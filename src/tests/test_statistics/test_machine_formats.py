@@ -0,0 +1,75 @@
+import csv
+import io
+import json
+import unittest
+from unittest.mock import patch
+
+from src.databases.quantiles import DDSketchQuantiles
+from src.databases.sketches import TopKCounter
+from src.renderer.log_data_repr import LogDataRepr
+from src.tests.test_statistics.test_saver import make_log_data
+
+
+class TestMachineFormats(unittest.TestCase):
+    def setUp(self):
+        self.log_data = make_log_data("json")
+
+    def test_json_document(self):
+        with patch("src.renderer.log_data_repr.ROWS_PER_WRITE", 100):
+            document = json.loads(LogDataRepr(self.log_data).get_repr("json"))
+        self.assertEqual(document["total_requests"], self.log_data.total_requests_cnt)
+        self.assertEqual(document["files"], ["access.log"])
+        self.assertEqual(len(document["sources"]), 3000)
+        self.assertEqual(document["sources"][0], {"source": "/page/0", "count": 1})
+        self.assertEqual(
+            [record["code"] for record in document["status_codes"]],
+            ["200", "301", "404", "500"],
+        )
+        self.assertEqual(document["status_codes"][2]["name"], "Not Found")
+        # IP-адреса по убыванию количества, как в отчете
+        counts = [record["count"] for record in document["ips"]]
+        self.assertEqual(counts, sorted(counts, reverse=True))
+        self.assertEqual(len(document["error_urls"]), document["error_urls_total"])
+
+    def test_ndjson_records(self):
+        report = LogDataRepr(self.log_data, top=10).get_repr("ndjson")
+        records = [json.loads(line) for line in report.split("\n")]
+        self.assertEqual(records[0]["section"], "summary")
+        self.assertEqual(records[0]["error_urls_total"], 1500)
+        sections = [record["section"] for record in records[1:]]
+        self.assertEqual(sections.count("sources"), 10)
+        self.assertEqual(sections.count("error_urls"), 10)
+        self.assertEqual(
+            sections[-1], "error_urls", "секции идут одна за другой, без заголовков"
+        )
+
+    def test_csv_rows(self):
+        report = LogDataRepr(self.log_data).get_repr("csv")
+        rows = list(csv.DictReader(io.StringIO(report)))
+        summary = {
+            row["key"]: row["value"] for row in rows if row["section"] == "summary"
+        }
+        self.assertEqual(
+            summary["total_requests"], str(self.log_data.total_requests_cnt)
+        )
+        self.assertIn("p95", summary)
+        statuses = [row for row in rows if row["section"] == "status_codes"]
+        self.assertEqual(statuses[-1]["name"], "Internal Server Error")
+        sources = [row for row in rows if row["section"] == "sources"]
+        self.assertEqual(len(sources), 3000)
+
+    def test_json_backends_match(self):
+        self.log_data.size_sketch = DDSketchQuantiles()
+        self.log_data.size_sketch.add(10)
+        self.log_data.ip_statistics = TopKCounter(5, 20)
+        self.log_data.ip_statistics.update({"10.0.0.1": 7, "10.0.0.2": 3})
+        self.log_data.sources_statistics["/страница"] += 2
+        expected = LogDataRepr(self.log_data).get_repr("json")
+        with patch("src.renderer.serialization.orjson", None):
+            self.assertEqual(LogDataRepr(self.log_data).get_repr("json"), expected)
+        self.assertIn("/страница", expected)
+        self.assertIn('"top_k":{"ips"', expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,83 @@
+import random
+import unittest
+from unittest.mock import patch
+
+import numpy as np
+
+from src.databases.log_data import LogData
+from src.databases.quantiles import DDSketchQuantiles, ExactQuantiles
+from src.parser_process.log_processor import LogParserProcessor
+
+
+class TestQuantiles(unittest.TestCase):
+    def setUp(self):
+        rng = random.Random(42)
+        self.values = [int(rng.lognormvariate(8, 2)) for _ in range(20_000)]
+
+    def test_exact_quantiles(self):
+        quantiles = ExactQuantiles()
+        for value in self.values:
+            quantiles.add(value)
+
+        self.assertEqual(len(quantiles), len(self.values))
+        self.assertEqual(quantiles.mean(), np.mean(self.values))
+        self.assertEqual(quantiles.percentile(95), np.percentile(self.values, 95))
+
+    def test_exact_quantiles_small_inputs(self):
+        # Небольшие списки считаются без NumPy, результат совпадает до бита
+        rng = random.Random(7)
+        for size in (1, 2, 3, 10, 101, 5000):
+            values = rng.sample(self.values, size)
+            quantiles = ExactQuantiles(values)
+            self.assertEqual(quantiles.mean(), np.mean(values))
+            for percent in (0, 50, 95, 99, 99.9, 100, rng.uniform(0, 100)):
+                self.assertEqual(
+                    quantiles.percentile(percent), np.percentile(values, percent)
+                )
+
+    def test_sketch_relative_accuracy(self):
+        sketch = DDSketchQuantiles(accuracy=0.01)
+        for value in self.values:
+            sketch.add(value)
+
+        # Среднее считается точно, перцентили - с относительной ошибкой 1%
+        self.assertAlmostEqual(sketch.mean(), np.mean(self.values))
+        ordered = sorted(self.values)
+        for percent in (50, 90, 95, 99, 99.9):
+            expected = ordered[int(percent / 100 * (len(ordered) - 1))]
+            self.assertLessEqual(
+                abs(sketch.percentile(percent) - expected), 0.01 * expected
+            )
+
+    def test_sketch_merge_and_bounded_bins(self):
+        whole = DDSketchQuantiles(accuracy=0.05, max_bins=64)
+        first, second = whole.new_empty(), whole.new_empty()
+        for i, value in enumerate(self.values):
+            whole.add(value)
+            (first if i % 2 else second).add(value)
+        first.merge(second)
+
+        self.assertLessEqual(whole.bins_count, 64)
+        self.assertEqual(len(first), len(whole))
+        for percent in (50, 95, 99):
+            self.assertEqual(first.percentile(percent), whole.percentile(percent))
+
+    @patch(
+        "src.iterators.local_path_iterator.LocalPathIterator.__iter__",
+        return_value=iter(
+            [
+                '127.0.0.1 - - [09/Nov/2024:09:00:00 +0000] "GET /index.html HTTP/1.1" 200 1234 "-" "Mozilla/5.0"',
+                '127.0.0.2 - - [09/Nov/2024:09:05:00 +0000] "POST /login HTTP/1.1" 200 5678 "-" "Mozilla/5.0"',
+                '127.0.0.3 - - [09/Nov/2024:09:40:00 +0000] "GET /about.html HTTP/1.1" 404 2345 "-" "Mozilla/5.0"',
+            ]
+        ),
+    )
+    def test_process_with_sketch(self, mock_file):
+        log_data = LogData(size_sketch=DDSketchQuantiles(), percentiles=(50, 99))
+        LogParserProcessor(log_data).process("mock_path")
+
+        # Размеры не накапливаются в списке, а попадают в скетч
+        self.assertEqual(log_data.response_sizes, [])
+        self.assertEqual(len(log_data.size_quantiles), 3)
+        self.assertAlmostEqual(log_data.size_quantiles.mean(), 3085.666, places=2)
+        self.assertIn("99p размера ответа", repr(log_data))
@@ -0,0 +1,120 @@
+import os
+import sqlite3
+import tempfile
+import unittest
+
+from src.databases.log_data import LogData
+from src.databases.quantiles import DDSketchQuantiles
+from src.databases.rollup_store import RollupStore
+from src.databases.sketches import TopKCounter
+from src.parser_process.log_processor import LogParserProcessor
+from src.tests.conftest import make_line as make_log_line
+
+
+def make_line(i: int) -> str:
+    # Строки идут по 30 секунд: 120 строк в час
+    second = i * 30
+    return make_log_line(
+        i,
+        time_local=f"09/Nov/2024:{10 + second // 3600:02}:"
+        f"{second // 60 % 60:02}:{second % 60:02} +0000",
+    )
+
+
+def make_settings(kind: str) -> dict:
+    if kind == "sketch":
+        return {"size_sketch": DDSketchQuantiles()}
+    if kind == "top_k":
+        return {
+            "sources_statistics": TopKCounter(3, 20),
+            "ip_statistics": TopKCounter(3, 20),
+        }
+    return {}
+
+
+class TestRollupStore(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.TemporaryDirectory()
+        self.log1 = os.path.join(self.test_dir.name, "access1.log")
+        self.log2 = os.path.join(self.test_dir.name, "access2.log")
+        # Второй файл начинается в середине часа первого
+        with open(self.log1, "w") as f:
+            f.write("\n".join(make_line(i) for i in range(300)) + "\nbroken line\n")
+        with open(self.log2, "w") as f:
+            f.write("\n".join(make_line(i) for i in range(300, 500)) + "\n")
+        self.pattern = os.path.join(self.test_dir.name, "access*.log")
+        self.database = os.path.join(self.test_dir.name, "rollups.sqlite")
+
+    def tearDown(self):
+        self.test_dir.cleanup()
+
+    def run_processor(self, path: str, kind: str = "exact", **kwargs) -> LogData:
+        log_data = LogData(
+            from_date=kwargs.pop("from_date", None),
+            to_date=kwargs.pop("to_date", None),
+            **make_settings(kind),
+        )
+        LogParserProcessor(log_data, **kwargs).process(path)
+        log_data.file_names = []
+        return log_data
+
+    def export(self, path: str, kind: str = "exact", **kwargs) -> int:
+        processor = LogParserProcessor(LogData(**make_settings(kind)), **kwargs)
+        return processor.export_rollups(path, self.database)
+
+    def test_report_matches_raw_logs(self):
+        for kind in ("exact", "sketch", "top_k"):
+            with self.subTest(kind=kind):
+                if os.path.exists(self.database):
+                    os.remove(self.database)
+                # Файлы добавляются по одному, общий час объединяется
+                self.assertEqual(self.export(self.log1, kind), 300)
+                self.assertEqual(self.export(self.log2, kind), 200)
+                self.assertTrue(RollupStore.is_store(self.database))
+                self.assertFalse(RollupStore.is_store(self.log1))
+
+                expected = self.run_processor(self.pattern, kind)
+                actual = self.run_processor(self.database, kind)
+                self.assertEqual(repr(actual), repr(expected))
+                if kind != "sketch":
+                    # У скетча нет сравнения, он проверяется по отчету
+                    self.assertEqual(actual, expected)
+
+    def test_range_selects_whole_hours(self):
+        self.export(self.pattern, filter_expression="status >= 400")
+        expected = self.run_processor(
+            self.pattern,
+            from_date="2024-11-09T11:00:00",
+            to_date="2024-11-09T12:59:59",
+            filter_expression="status >= 400",
+        )
+        self.assertGreater(expected.total_requests_cnt, 0)
+        # Границы интервала внутри часов округляются до целых часов
+        actual = self.run_processor(
+            self.database,
+            from_date="2024-11-09T11:20:00",
+            to_date="2024-11-09T12:10:00",
+            filter_expression="status >= 400",
+        )
+        actual.from_date, actual.to_date = expected.from_date, expected.to_date
+        self.assertEqual(actual, expected)
+
+    def test_settings_must_match(self):
+        self.export(self.pattern)
+        with self.assertRaises(ValueError):
+            self.run_processor(self.database, "sketch")
+        with self.assertRaises(ValueError):
+            self.export(self.log1, filter_expression="method = GET")
+
+    def test_database_uses_wal(self):
+        self.export(self.pattern)
+        with sqlite3.connect(self.database) as connection:
+            mode = connection.execute("PRAGMA journal_mode").fetchone()[0]
+            hours = connection.execute("SELECT COUNT(*) FROM hours").fetchone()[0]
+        self.assertEqual(mode, "wal")
+        # 500 строк по 30 секунд - 5 часов
+        self.assertEqual(hours, 5)
+
+
+if __name__ == "__main__":
+    unittest.main()
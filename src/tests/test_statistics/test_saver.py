@@ -0,0 +1,108 @@
+import io
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from src.databases.log_data import LogData
+from src.renderer.log_data_repr import LogDataRepr
+from src.saver.saver import Saver
+
+
+def make_log_data(repr_format: str, sources: int = 3000) -> LogData:
+    log_data = LogData(repr_format=repr_format, file_names=["access.log"])
+    for i in range(sources):
+        count = i % 17 + 1
+        source = f"/page/{i}"
+        log_data.total_requests_cnt += count
+        log_data.sources_statistics[source] += count
+        log_data.ip_statistics[f"10.0.{i % 256}.{i % 199}"] += count
+        log_data.request_types[("GET", "POST", "PUT")[i % 3]] += count
+        log_data.response_codes_statistics[("200", "404", "500", "301")[i % 4]] += count
+        log_data.response_sizes.extend([i] * count)
+        if i % 4 in (1, 2):
+            log_data.error_urls.add(source)
+    return log_data
+
+
+class TestSaver(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.test_dir.name, "out")
+
+    def tearDown(self):
+        self.test_dir.cleanup()
+
+    def test_file_and_echo_are_rendered_once(self):
+        for repr_format, extension in (("markdown", ".md"), ("adoc", ".adoc")):
+            with self.subTest(repr_format=repr_format):
+                log_data = make_log_data(repr_format)
+                expected = repr(log_data)
+                echo = io.StringIO()
+                with patch.object(
+                    LogDataRepr, "write", autospec=True, side_effect=LogDataRepr.write
+                ) as mock_write:
+                    Saver(log_data).save(self.path, echo=echo)
+                self.assertEqual(mock_write.call_count, 1)
+
+                with open(self.path + extension, encoding="utf-8") as f:
+                    self.assertEqual(f.read(), expected)
+                # На экран - как print: с переводом строки в конце
+                self.assertEqual(echo.getvalue(), expected + "\n")
+
+    def test_closed_echo_does_not_truncate_file(self):
+        log_data = make_log_data("markdown")
+        echo = io.StringIO()
+        writes = []
+
+        def write(text: str) -> int:
+            # Как stdout при `| head`: после нескольких записей канал закрыт
+            if len(writes) == 3:
+                raise BrokenPipeError(32, "Broken pipe")
+            writes.append(text)
+            return len(text)
+
+        echo.write = write
+        Saver(log_data).save(self.path, echo=echo)
+
+        with open(self.path + ".md", encoding="utf-8") as f:
+            self.assertEqual(f.read(), repr(log_data))
+        self.assertEqual(len(writes), 3)
+        self.assertTrue(repr(log_data).startswith("".join(writes)))
+
+    def test_report_is_written_in_parts(self):
+        stream = io.StringIO()
+        writes = []
+        stream.write = lambda text: writes.append(text)
+        LogDataRepr(make_log_data("markdown")).write(stream, "markdown")
+        # Большие таблицы пишутся пачками строк, а не одной строкой
+        self.assertGreater(len(writes), 10)
+        self.assertEqual("".join(writes), repr(make_log_data("markdown")))
+
+    def test_rendering_does_not_change_statistics(self):
+        log_data = make_log_data("markdown")
+        codes = log_data.response_codes_statistics
+        expected = list(codes.items())
+        repr(log_data)
+        LogDataRepr(log_data, top=2).get_repr("adoc")
+        self.assertIs(log_data.response_codes_statistics, codes)
+        self.assertEqual(list(codes.items()), expected)
+
+    def test_top_limits_sections(self):
+        log_data = make_log_data("markdown")
+        report = LogDataRepr(log_data, top=5).get_repr("markdown")
+        self.assertIn("#### Запрашиваемые ресурсы (топ-5 из 3_000)", report)
+        self.assertIn("#### Статистика по запросам\n", report)
+        source_rows = [line for line in report.splitlines() if "`/page/" in line]
+        self.assertEqual(len(source_rows), 5)
+        # Самые частые ресурсы: i % 17 == 16
+        self.assertIn("`/page/16`", source_rows[0])
+        self.assertIn("…", report.rsplit("\n", 1)[-1])
+
+        adoc = LogDataRepr(make_log_data("adoc"), top=2).get_repr("adoc")
+        self.assertIn("=== Коды ответа (топ-2 из 4)", adoc)
+        self.assertEqual(adoc.count("|`/page/"), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,85 @@
+import random
+import unittest
+from collections import Counter
+from unittest.mock import patch
+
+from src.databases.log_data import LogData
+from src.databases.sketches import HyperLogLog, TopKCounter
+from src.parser_process.log_processor import LogParserProcessor
+
+
+class TestSketches(unittest.TestCase):
+    def setUp(self):
+        # Несколько частых ключей на фоне длинного хвоста редких
+        rng = random.Random(7)
+        self.keys = [
+            (
+                f"/hot/{rng.randrange(5)}"
+                if rng.random() < 0.3
+                else f"/cold/{rng.randrange(50_000)}"
+            )
+            for _ in range(60_000)
+        ]
+        self.exact = Counter(self.keys)
+
+    def check_estimates(self, counter: TopKCounter) -> None:
+        # Оценка не меньше реальной частоты и превышает ее не больше чем на floor
+        for key, estimate in counter.items():
+            self.assertLessEqual(self.exact[key], estimate)
+            self.assertLessEqual(estimate - self.exact[key], counter.floor)
+        self.assertEqual(
+            {key for key, _ in counter.top(5)}, {f"/hot/{i}" for i in range(5)}
+        )
+
+    def test_top_k_counter(self):
+        counter = TopKCounter(k=5, capacity=200)
+        for key in self.keys:
+            counter[key] += 1
+
+        self.assertLessEqual(len(counter), 200)
+        self.check_estimates(counter)
+
+    def test_top_k_merge(self):
+        first = TopKCounter(k=5, capacity=200)
+        second = first.new_empty()
+        for i, key in enumerate(self.keys):
+            (first if i < 25_000 else second)[key] += 1
+        first.merge(second)
+
+        self.assertLessEqual(len(first), 200)
+        self.check_estimates(first)
+
+    def test_hyperloglog(self):
+        hll = HyperLogLog(precision=12)
+        for key in self.keys:
+            hll.add(key)
+        # Стандартная ошибка при precision=12 около 1.6%
+        self.assertLess(abs(hll.count() - len(self.exact)) / len(self.exact), 0.05)
+
+        small = HyperLogLog()
+        for key in ["a", "b", "c", "a"]:
+            small.add(key)
+        self.assertEqual(small.count(), 3)
+
+    @patch(
+        "src.iterators.local_path_iterator.LocalPathIterator.__iter__",
+        return_value=iter(
+            [
+                '127.0.0.1 - - [09/Nov/2024:09:00:00 +0000] "GET /index.html HTTP/1.1" 200 1234 "-" "Mozilla/5.0"',
+                '127.0.0.1 - - [09/Nov/2024:09:05:00 +0000] "POST /login HTTP/1.1" 200 5678 "-" "Mozilla/5.0"',
+                '127.0.0.3 - - [09/Nov/2024:09:40:00 +0000] "GET /index.html HTTP/1.1" 404 2345 "-" "Mozilla/5.0"',
+            ]
+        ),
+    )
+    def test_process_with_top_k(self, mock_file):
+        log_data = LogData(
+            sources_statistics=TopKCounter(k=1), ip_statistics=TopKCounter(k=1)
+        )
+        LogParserProcessor(log_data).process("mock_path")
+
+        self.assertEqual(log_data.sources_statistics.top(), [("/index.html", 2)])
+        self.assertEqual(log_data.ip_statistics.top(), [("127.0.0.1", 2)])
+        report = repr(log_data)
+        self.assertIn("Запрашиваемые ресурсы (топ-1, погрешность ±0)", report)
+        self.assertIn("Уникальных IP-адресов", report)
+        self.assertNotIn("/login", report.split("Коды ответа")[0])
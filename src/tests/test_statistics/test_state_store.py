@@ -0,0 +1,105 @@
+import json
+import os
+import tempfile
+import unittest
+
+from src.databases.log_data import LogData
+from src.databases.quantiles import DDSketchQuantiles
+from src.databases.sketches import TopKCounter
+from src.databases.state_store import FileState, StateStore
+
+
+def fill(log_data: LogData) -> LogData:
+    for i in range(500):
+        log_data.total_requests_cnt += 1
+        log_data.sources_statistics[f"/page/{i % 37}"] += 1
+        log_data.ip_statistics[f"10.0.0.{i % 13}"] += 1
+        log_data.response_codes_statistics[("200", "404", "500")[i % 3]] += 1
+        log_data.request_types[("GET", "POST")[i % 2]] += 1
+        log_data.size_quantiles.add(i * 7)
+    log_data.error_urls.update({"/page/1", "/page/2"})
+    return log_data
+
+
+def roundtrip(log_data: LogData) -> LogData:
+    # Сохраняем через JSON, как StateStore
+    return LogData.from_dict(json.loads(json.dumps(log_data.to_dict())))
+
+
+class TestStateSerialization(unittest.TestCase):
+    def test_exact_roundtrip(self):
+        log_data = fill(LogData(from_date="2024-11-09", percentiles=(50, 99)))
+        restored = roundtrip(log_data)
+        self.assertEqual(restored, log_data)
+        self.assertEqual(repr(restored), repr(log_data))
+
+        # Восстановленные счетчики продолжают считать
+        restored.sources_statistics["/new"] += 1
+        self.assertEqual(restored.sources_statistics["/new"], 1)
+
+    def test_sketch_and_top_k_roundtrip(self):
+        log_data = fill(
+            LogData(
+                size_sketch=DDSketchQuantiles(0.02),
+                sources_statistics=TopKCounter(5, 10),
+                ip_statistics=TopKCounter(3),
+            )
+        )
+        restored = roundtrip(log_data)
+        self.assertEqual(repr(restored), repr(log_data))
+        self.assertEqual(
+            restored.sources_statistics.floor, log_data.sources_statistics.floor
+        )
+        self.assertEqual(
+            restored.sources_statistics.distinct.count(),
+            log_data.sources_statistics.distinct.count(),
+        )
+
+        # Объединение восстановленной статистики равно объединению исходной
+        merged = fill(log_data.new_partial())
+        restored_merged = fill(log_data.new_partial())
+        merged.merge(log_data)
+        restored_merged.merge(restored)
+        self.assertEqual(repr(restored_merged), repr(merged))
+
+
+class TestStateStore(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.test_dir.name, "state.json")
+
+    def tearDown(self):
+        self.test_dir.cleanup()
+
+    def test_missing_file_is_empty(self):
+        store = StateStore.load(self.path)
+        self.assertIsNone(store.config)
+        self.assertEqual(store.files, {})
+
+    def test_sizes_are_stored_compactly(self):
+        log = os.path.join(self.test_dir.name, "access.log")
+        with open(log, "w") as f:
+            f.write("line\n")
+        log_data = LogData(response_sizes=[i * 37 % 90_000 for i in range(20_000)])
+        store = StateStore.load(self.path)
+        store.use_config({})
+        store.files[log] = FileState.snapshot(log, os.stat(log), 5, log_data)
+        store.save()
+
+        # Меньше, чем список чисел в JSON
+        self.assertLess(
+            os.path.getsize(self.path), len(json.dumps(log_data.response_sizes)) / 2
+        )
+        restored = StateStore.load(self.path).files[log].log_data()
+        self.assertEqual(restored.response_sizes, log_data.response_sizes)
+
+    def test_config_change_resets_files(self):
+        store = StateStore.load(self.path)
+        store.use_config({"filter": ("status", "200")})
+        store.files = {"/var/log/access.log": None}
+
+        # Те же настройки после чтения из JSON не сбрасывают состояние
+        store.use_config({"filter": ("status", "200")})
+        self.assertEqual(len(store.files), 1)
+        store.use_config({"filter": ("status", "404")})
+        self.assertEqual(store.files, {})
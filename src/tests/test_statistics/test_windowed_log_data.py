@@ -0,0 +1,44 @@
+import unittest
+
+from src.databases.log_data import LogData
+from src.databases.windowed_log_data import WindowedLogData
+
+
+def add_request(log_data: LogData, source: str) -> None:
+    log_data.total_requests_cnt += 1
+    log_data.sources_statistics[source] += 1
+
+
+class TestWindowedLogData(unittest.TestCase):
+    def test_windows(self):
+        windowed = WindowedLogData(LogData(), windows=(60, 300), bucket_seconds=10)
+        now = 10_000
+        # По одному запросу в секунду за последние 10 минут
+        for second in range(600):
+            add_request(windowed.bucket(now - 599 + second), f"/page/{second % 3}")
+
+        windowed.expire(now)
+        self.assertLessEqual(windowed.buckets_count, 31)
+        # Окна точны до длины корзины
+        self.assertEqual(windowed.window(60, now).total_requests_cnt, 61)
+        self.assertEqual(windowed.window(300, now).total_requests_cnt, 301)
+        self.assertEqual(windowed.window(60, now).sources_statistics["/page/0"], 20)
+
+        # Запросы старше самого длинного окна отбрасываются
+        self.assertIsNone(windowed.bucket(now - 320))
+
+    def test_out_of_order_buckets(self):
+        windowed = WindowedLogData(LogData(), windows=(60,), bucket_seconds=10)
+        for timestamp in (1050, 1010, 1030):
+            add_request(windowed.bucket(timestamp), "/")
+        windowed.expire(1085)
+        # Остались корзины, начиная с 1020-1030
+        self.assertEqual(windowed.window(60, 1085).total_requests_cnt, 2)
+        self.assertEqual(windowed.buckets_count, 2)
+
+    def test_bucket_settings(self):
+        windowed = WindowedLogData(LogData(), windows=(3600, 60))
+        self.assertEqual(windowed.windows, (60, 3600))
+        self.assertEqual(windowed.bucket_seconds, 5)
+        with self.assertRaises(ValueError):
+            WindowedLogData(LogData(), windows=(0,))